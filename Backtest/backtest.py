@@ -29,6 +29,8 @@ class BackTestHandler:
         load_dotenv()
         self.api = BinanceAPI()
         self.reaction = ZoneReactor()
+        # bumped whenever warmup_zones changes, keeps the reactor's level index in between
+        self.zones_version = 0
         self.ohclv_paths=[]
         self.time_frames = time_frames
         self.symbol = symbol
@@ -82,7 +84,7 @@ class BackTestHandler:
                         # Generate signal only if touch
                         if len(history) > 1:
                             try:
-                                reaction_data = self.reaction.get_last_candle_reaction(self.warmup_zones, candle)
+                                reaction_data = self.reaction.get_last_candle_reaction(self.warmup_zones, candle, version=self.zones_version)
                                 
                                 tempATH = ATHHandler(self.symbol,pd.DataFrame(history)).getATHFromCandles()
                                 if self.ATH['zone_high'] < tempATH['zone_high']:
@@ -109,6 +111,7 @@ class BackTestHandler:
                                     
                                     self.used_zones =  self.used_zones + [item['timestamp'] for item in use_zones]
                                     self.warmup_zones = utility.removeDataFromListByKeyValueList(self.warmup_zones,key='timestamp',to_remove=self.used_zones)
+                                    self.zones_version += 1
                                     use_zones = list(datagen.extract_input_data(use_zones))
                                     try:
                                         signal = signalGen.generate(use_zones, backtest=True)
@@ -187,6 +190,7 @@ class BackTestHandler:
             temp_zones = list(datagen.extract_input_data(confluent_zones))
             self.warmup_zones =  utility.merge_lists_by_key(self.warmup_zones,temp_zones,"timestamp")
             self.warmup_zones = utility.removeDataFromListByKeyValueList(self.warmup_zones,self.used_zones,'timestamp')
+            self.zones_version += 1
         except Exception as e:
             print(f"error updating zones : {e}")
             raise e
@@ -214,6 +218,7 @@ class BackTestHandler:
             zones = list(datagen.extract_input_data(confluent_zones))
             zones = sorted(zones,key=lambda x : x.get("timestamp",None))
             self.warmup_zones = zones
+            self.zones_version += 1
         except Exception as e:
             print(f"Error during warm-up: {e}")
             traceback.print_exc()
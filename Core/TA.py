@@ -4,6 +4,8 @@ from .TechnicalAnalysis.MA import MovingAverage
 from .TechnicalAnalysis.EMA import EMA
 from .TechnicalAnalysis.RSI import RSI
 from .TechnicalAnalysis.RollingRegression import RollingRegression
+from .TechnicalAnalysis.FusedTA import FusedTA
+from .TechnicalAnalysis.CrossOver import CrossOverTable
 
 class TA:
     def __init__(self):
@@ -20,9 +22,15 @@ class TA:
         data = self.RSI.add(data)
         data = self.BollingerBands.add(data)
         return data
+
+    def add_fused(self,data):
+        """
+        Same columns as add() in one float32 block, without a frame copy per indicator
+        """
+        return FusedTA().add(data)
     
-    def add_RollingRegression(self,data,market_data):
-        RR = RollingRegression(data,market_data)
+    def add_RollingRegression(self,data,market_data,market_returns=None):
+        RR = RollingRegression(data,market_data,market_returns)
         return RR.AddRegressionValues()
     
     def detectCrossOvers(self,data):
@@ -30,5 +38,15 @@ class TA:
         EMA_cross = self.EMA.detectCrossOver(data)
         BB_cross = self.BollingerBands.detectCrossOver(data)
         zones = MA_cross+EMA_cross+BB_cross
-        return zones.sort(key='timestamp')
+        return sorted(zones, key=lambda zone: zone['timestamp'])
+
+    def detectCrossOverTable(self, data):
+        """
+        MA, EMA and Bollinger crossovers of data as one CrossOverTable ordered by timestamp
+        """
+        return CrossOverTable.concat([
+            self.MA.detectCrossOverTable(data),
+            self.EMA.detectCrossOverTable(data),
+            self.BollingerBands.detectCrossOverTable(data),
+        ])
 
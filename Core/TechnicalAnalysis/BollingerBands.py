@@ -1,4 +1,5 @@
 import ta
+from .CrossOver import CrossOverTable
 class BollingerBands:
     """
     Detects moving average crossover signals (Golden Cross & Death Cross).
@@ -39,85 +40,43 @@ class BollingerBands:
                     'bb_low': ...
                 }
         """
-        close = data['close']
-        high = data['bb_high']
-        mid = data['bb_mid']
-        low = data['bb_low']
-        timestamps = data['timestamp']
+        table = self.detectCrossOverTable(data)
+        index = table['index']
+        names = CrossOverTable.labels(table)
+        timestamps = data['timestamp'].iloc[index].tolist()
+        columns = [data[key].to_numpy()[index] for key in ('close', 'bb_high', 'bb_mid', 'bb_low')]
+        return [
+            {'timestamp': t, 'type': name, 'close': close, 'bb_high': high, 'bb_mid': mid, 'bb_low': low}
+            for t, name, close, high, mid, low in zip(timestamps, names, *columns)
+        ]
 
-        crossovers = []
-
-        for i in range(1, len(data)):
-            prev_close = close.iloc[i-1]
-            curr_close = close.iloc[i]
-            prev_high, curr_high = high.iloc[i-1], high.iloc[i]
-            prev_low, curr_low = low.iloc[i-1], low.iloc[i]
-            prev_mid, curr_mid = mid.iloc[i-1], mid.iloc[i]
-
-            # === Upper Band Cross ===
-            if prev_close <= prev_high and curr_close > curr_high:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'upper_breakout',
-                    'close': curr_close,
-                    'bb_high': curr_high,
-                    'bb_mid': curr_mid,
-                    'bb_low': curr_low
-                })
-
-            elif prev_close >= prev_high and curr_close < curr_high:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'upper_rejection',
-                    'close': curr_close,
-                    'bb_high': curr_high,
-                    'bb_mid': curr_mid,
-                    'bb_low': curr_low
-                })
-
-            # === Lower Band Cross ===
-            elif prev_close >= prev_low and curr_close < curr_low:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'lower_breakout',
-                    'close': curr_close,
-                    'bb_high': curr_high,
-                    'bb_mid': curr_mid,
-                    'bb_low': curr_low
-                })
-
-            elif prev_close <= prev_low and curr_close > curr_low:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'lower_rejection',
-                    'close': curr_close,
-                    'bb_high': curr_high,
-                    'bb_mid': curr_mid,
-                    'bb_low': curr_low
-                })
-
-            # === Middle Band Cross ===
-            elif prev_close < prev_mid and curr_close > curr_mid:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'mid_cross_up',
-                    'close': curr_close,
-                    'bb_high': curr_high,
-                    'bb_mid': curr_mid,
-                    'bb_low': curr_low
-                })
+    def detectCrossOverTable(self, data):
+        """
+        Bollinger Band crossovers of data as a CrossOverTable (value = close, level = the band crossed).
 
-            elif prev_close > prev_mid and curr_close < curr_mid:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'mid_cross_down',
-                    'close': curr_close,
-                    'bb_high': curr_high,
-                    'bb_mid': curr_mid,
-                    'bb_low': curr_low
-                })
+        Same events and precedence as detectCrossOver (upper band, then lower band, then
+        middle band), found with shifted-array comparisons.
+        """
+        close = data['close'].to_numpy()
+        high = data['bb_high'].to_numpy()
+        mid = data['bb_mid'].to_numpy()
+        low = data['bb_low'].to_numpy()
+        prev_close, curr_close = close[:-1], close[1:]
+        prev_high, curr_high = high[:-1], high[1:]
+        prev_mid, curr_mid = mid[:-1], mid[1:]
+        prev_low, curr_low = low[:-1], low[1:]
 
-        return crossovers
+        conditions = [
+            (prev_close <= prev_high) & (curr_close > curr_high),
+            (prev_close >= prev_high) & (curr_close < curr_high),
+            (prev_close >= prev_low) & (curr_close < curr_low),
+            (prev_close <= prev_low) & (curr_close > curr_low),
+            (prev_close < prev_mid) & (curr_close > curr_mid),
+            (prev_close > prev_mid) & (curr_close < curr_mid),
+        ]
+        types = ['upper_breakout', 'upper_rejection', 'lower_breakout', 'lower_rejection', 'mid_cross_up', 'mid_cross_down']
+        levels = [high, high, low, low, mid, mid]
+        return CrossOverTable.build(data, 'BB', conditions, types, close, levels)
 
 
 
@@ -0,0 +1,84 @@
+import numpy as np
+
+class CrossOverTable:
+    """
+    Compact, typed table of crossover events.
+
+    One NumPy structured array row per event:
+        timestamp  candle time (datetime64[ns])
+        index      candle position in the frame the events were detected on
+        source     code of the indicator (SOURCES)
+        type       code of the event (TYPES)
+        value      the crossing series (short average, or close for Bollinger)
+        level      the line it crossed (long average, or the Bollinger band)
+
+    Events are found with comparisons on shifted arrays, so detection is O(n)
+    NumPy work. Tables of the same dtype concatenate and sort by timestamp, and the
+    numeric columns can be used directly as model features.
+    """
+    SOURCES = ['MA', 'EMA', 'BB']
+    TYPES = ['golden_cross', 'death_cross', 'upper_breakout', 'upper_rejection',
+             'lower_breakout', 'lower_rejection', 'mid_cross_up', 'mid_cross_down']
+    DTYPE = np.dtype([
+        ('timestamp', 'datetime64[ns]'),
+        ('index', np.int64),
+        ('source', np.uint8),
+        ('type', np.uint8),
+        ('value', np.float64),
+        ('level', np.float64),
+    ])
+
+    @classmethod
+    def empty(cls):
+        return np.empty(0, dtype=cls.DTYPE)
+
+    @classmethod
+    def build(cls, data, source, conditions, types, value, levels):
+        """
+        Events of one indicator.
+
+        conditions are boolean arrays over candles 1..n-1 (each candle against the one
+        before), checked in order like an if/elif chain; levels[k] is the line crossed
+        by conditions[k].
+        """
+        if len(data) < 2:
+            return cls.empty()
+        code = np.select(conditions, [cls.TYPES.index(t) for t in types], default=-1)
+        level = np.select(conditions, [l[1:] for l in levels], default=np.nan)
+        found = np.flatnonzero(code >= 0)
+        index = found + 1
+        table = np.empty(len(found), dtype=cls.DTYPE)
+        table['timestamp'] = data['timestamp'].to_numpy()[index]
+        table['index'] = index
+        table['source'] = cls.SOURCES.index(source)
+        table['type'] = code[found]
+        table['value'] = value[index]
+        table['level'] = level[found]
+        return table
+
+    @classmethod
+    def moving_average(cls, data, source, short_key, long_key):
+        """
+        Golden / death crosses of a short average over a long one
+        """
+        short = data[short_key].to_numpy()
+        long = data[long_key].to_numpy()
+        prev_short, prev_long, curr_short, curr_long = short[:-1], long[:-1], short[1:], long[1:]
+        golden = (prev_short < prev_long) & (curr_short > curr_long)
+        death = (prev_short > prev_long) & (curr_short < curr_long)
+        return cls.build(data, source, [golden, death], ['golden_cross', 'death_cross'], short, [long, long])
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        One table of all events, ordered by timestamp (ties keep the given order)
+        """
+        table = np.concatenate([cls.empty()] + list(tables))
+        return table[np.argsort(table['timestamp'], kind='stable')]
+
+    @classmethod
+    def labels(cls, table):
+        """
+        Event type names of a table
+        """
+        return [cls.TYPES[code] for code in table['type'].tolist()]
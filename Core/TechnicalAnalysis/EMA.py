@@ -1,4 +1,5 @@
 import ta
+from .CrossOver import CrossOverTable
 class EMA:
     
 
@@ -35,35 +36,24 @@ class EMA:
                     'long_ema': ...
                 }
         """
-        short_ema = data['ema_short']
-        long_ema = data['ema_long']
-        timestamps = data['timestamp']
+        table = self.detectCrossOverTable(data)
+        index = table['index']
+        names = CrossOverTable.labels(table)
+        timestamps = data['timestamp'].iloc[index].tolist()
+        short_ema = data['ema_short'].to_numpy()[index]
+        long_ema = data['ema_long'].to_numpy()[index]
+        return [
+            {'timestamp': t, 'type': name, 'short_ema': short, 'long_ema': long}
+            for t, name, short, long in zip(timestamps, names, short_ema, long_ema)
+        ]
 
-        crossovers = []
-
-        for i in range(1, len(data)):
-            prev_short, prev_long = short_ema.iloc[i-1], long_ema.iloc[i-1]
-            curr_short, curr_long = short_ema.iloc[i], long_ema.iloc[i]
-
-            # Golden cross
-            if prev_short < prev_long and curr_short > curr_long:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'golden_cross',
-                    'short_ema': curr_short,
-                    'long_ema': curr_long
-                })
-
-            # Death cross
-            elif prev_short > prev_long and curr_short < curr_long:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'death_cross',
-                    'short_ema': curr_short,
-                    'long_ema': curr_long
-                })
+    def detectCrossOverTable(self, data):
+        """
+        Crossovers of data as a CrossOverTable (value = short EMA, level = long EMA).
 
-        return crossovers
+        Same events as detectCrossOver, found with shifted-array comparisons.
+        """
+        return CrossOverTable.moving_average(data, 'EMA', 'ema_short', 'ema_long')
 
 
     def getPreviousCrossOver(self):
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from numpy.lib.stride_tricks import sliding_window_view
+from Utility.MemoryUsage import MemoryUsage as mu
+
+class FusedTA:
+    """
+    Every TA.add column from one pass over the close array.
+
+    The columns are written straight into one preallocated (columns x candles)
+    block, which is attached to the candles as a single DataFrame block, so no
+    per-indicator frame is copied. Work arrays are float64 and bounded by `chunk`
+    candles. EMAs are first-order IIR filters run through scipy's lfilter with the
+    filter state carried between chunks. Rolling means and stds reduce sliding windows.
+
+    Values match TA.add to the precision of `dtype`.
+    """
+    COLUMNS = ['atr', 'atr_mean', 'ma_short', 'ma_long', 'ema_short', 'ema_long', 'rsi', 'bb_high', 'bb_low', 'bb_mid']
+
+    # windows of ATR, MovingAverage, EMA, RSI and BollingerBands
+    ATR_WINDOW = 20
+    ATR_MEAN_WINDOW = 50
+    SHORT_WINDOW = 20
+    LONG_WINDOW = 50
+    RSI_WINDOW = 5
+    BB_WINDOW = 20
+    BB_DEV = 2
+
+    def __init__(self, dtype=np.float32, chunk=8192):
+        self.dtype = dtype
+        self.chunk = chunk
+
+    def chunks(self, length):
+        for start in range(0, length, self.chunk):
+            yield start, min(start + self.chunk, length)
+
+    def ema(self, values, alpha, min_periods, out):
+        """
+        y[i] = (1 - alpha) * y[i-1] + alpha * x[i] with y[0] = x[0] (ewm adjust=False)
+        """
+        if not len(values):
+            return
+        state = np.array([(1 - alpha) * float(values[0])])
+        for start, end in self.chunks(len(values)):
+            out[start:end], state = lfilter([alpha], [1.0, alpha - 1.0], values[start:end].astype(np.float64), zi=state)
+        out[:min_periods - 1] = np.nan
+
+    def rolling(self, values, window, start, end):
+        """
+        float64 windows ending at candles start..end-1 (empty while fewer than window candles)
+        """
+        first = max(start, window - 1)
+        if first >= end:
+            return first, np.empty((0, window))
+        return first, sliding_window_view(values[first - window + 1:end].astype(np.float64), window)
+
+    def rolling_mean(self, values, window, out):
+        out[:window - 1] = np.nan
+        for start, end in self.chunks(len(values)):
+            first, windows = self.rolling(values, window, start, end)
+            out[first:end] = windows.mean(axis=1)
+
+    def rsi(self, close, window, out):
+        """
+        Wilder RSI: close-to-close gains and losses (in the closes' dtype) smoothed with alpha = 1 / window
+        """
+        length = len(close)
+        if not length:
+            return
+        diff = np.empty(length, dtype=close.dtype)
+        diff[0] = 0
+        np.subtract(close[1:], close[:-1], out=diff[1:])
+        up = np.maximum(diff, 0)
+        down = np.maximum(-diff, 0)
+        del diff
+        alpha = 1 / window
+        up_state = down_state = np.array([0.0])
+        for start, end in self.chunks(length):
+            emaup, up_state = lfilter([alpha], [1.0, alpha - 1.0], up[start:end].astype(np.float64), zi=up_state)
+            emadn, down_state = lfilter([alpha], [1.0, alpha - 1.0], down[start:end].astype(np.float64), zi=down_state)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[start:end] = np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+        out[:window - 1] = np.nan
+
+    def bollinger(self, close, window, dev, high, low):
+        high[:window - 1] = np.nan
+        low[:window - 1] = np.nan
+        for start, end in self.chunks(len(close)):
+            first, windows = self.rolling(close, window, start, end)
+            mean = windows.mean(axis=1)
+            std = np.sqrt(np.square(windows - mean[:, None]).mean(axis=1))
+            high[first:end] = mean + dev * std
+            low[first:end] = mean - dev * std
+
+    @mu.log_peak_memory
+    def add(self, data):
+        """
+        Candles with the TA.add columns appended, built from data['close'] only
+        """
+        close = data['close'].to_numpy()
+        block = np.empty((len(self.COLUMNS), len(close)), dtype=self.dtype)
+        columns = dict(zip(self.COLUMNS, block))
+
+        self.ema(close, 2 / (self.ATR_WINDOW + 1), self.ATR_WINDOW, columns['atr'])
+        self.rolling_mean(columns['atr'], self.ATR_MEAN_WINDOW, columns['atr_mean'])
+        self.rolling_mean(close, self.SHORT_WINDOW, columns['ma_short'])
+        self.rolling_mean(close, self.LONG_WINDOW, columns['ma_long'])
+        self.ema(close, 2 / (self.SHORT_WINDOW + 1), self.SHORT_WINDOW, columns['ema_short'])
+        self.ema(close, 2 / (self.LONG_WINDOW + 1), self.LONG_WINDOW, columns['ema_long'])
+        self.rsi(close, self.RSI_WINDOW, columns['rsi'])
+        self.bollinger(close, self.BB_WINDOW, self.BB_DEV, columns['bb_high'], columns['bb_low'])
+        # the Bollinger mid band is the short moving average
+        columns['bb_mid'][:] = columns['ma_short']
+
+        indicators = pd.DataFrame(block.T, index=data.index, columns=self.COLUMNS, copy=False)
+        return pd.concat([data, indicators], axis=1)
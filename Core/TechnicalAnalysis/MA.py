@@ -1,4 +1,5 @@
 import ta
+from .CrossOver import CrossOverTable
 class MovingAverage:
     """
     Detects moving average crossover signals (Golden Cross & Death Cross).
@@ -38,35 +39,24 @@ class MovingAverage:
                     'long_ma': ...
                 }
         """
-        short_ma = data['ma_short']
-        long_ma = data['ma_long']
-        timestamps = data['timestamp']
+        table = self.detectCrossOverTable(data)
+        index = table['index']
+        names = CrossOverTable.labels(table)
+        timestamps = data['timestamp'].iloc[index].tolist()
+        short_ma = data['ma_short'].to_numpy()[index]
+        long_ma = data['ma_long'].to_numpy()[index]
+        return [
+            {'timestamp': t, 'type': name, 'short_ma': short, 'long_ma': long}
+            for t, name, short, long in zip(timestamps, names, short_ma, long_ma)
+        ]
 
-        crossovers = []
-
-        for i in range(1, len(data)):
-            prev_short, prev_long = short_ma.iloc[i-1], long_ma.iloc[i-1]
-            curr_short, curr_long = short_ma.iloc[i], long_ma.iloc[i]
-
-            # Golden cross
-            if prev_short < prev_long and curr_short > curr_long:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'golden_cross',
-                    'short_ma': curr_short,
-                    'long_ma': curr_long
-                })
-
-            # Death cross
-            elif prev_short > prev_long and curr_short < curr_long:
-                crossovers.append({
-                    'timestamp': timestamps.iloc[i],
-                    'type': 'death_cross',
-                    'short_ma': curr_short,
-                    'long_ma': curr_long
-                })
+    def detectCrossOverTable(self, data):
+        """
+        Crossovers of data as a CrossOverTable (value = short MA, level = long MA).
 
-        return crossovers
+        Same events as detectCrossOver, found with shifted-array comparisons.
+        """
+        return CrossOverTable.moving_average(data, 'MA', 'ma_short', 'ma_long')
 
 
     def getPreviousCrossOver(self):
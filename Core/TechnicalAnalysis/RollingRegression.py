@@ -4,12 +4,32 @@ from sklearn.linear_model import LinearRegression
 from sklearn.preprocessing import PolynomialFeatures
 
 class RollingRegression():
-    def __init__(self,based_df,market_df):
+    def __init__(self,based_df,market_df,market_returns=None):
         self.based_df = based_df
         self.market_df = market_df
+        # market_df['close'].pct_change(), when already computed
+        self.market_returns = market_returns
         self.poly = PolynomialFeatures(degree=2)
         self.model = LinearRegression()
 
+    @staticmethod
+    def window_sums(values, window):
+        """
+        Sums of each row of values over [i - window, i) for every i in window..n-1,
+        from one cumulative sum per row.
+        """
+        cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(values, axis=1, out=cumulative[:, 1:])
+        return cumulative[:, window:-1] - cumulative[:, :-window - 1]
+
+    def fit_window(self, y, x):
+        """
+        sklearn fit of one window, for windows whose normal equations are near singular
+        """
+        X_poly = self.poly.fit_transform(x.reshape(-1, 1))
+        self.model.fit(X_poly, y)
+        return self.model.intercept_, self.model.coef_[1], self.model.coef_[2], self.model.score(X_poly, y)
+
     def rolling_regression(
         self,
         y: pd.Series,
@@ -18,51 +38,81 @@ class RollingRegression():
         fillna: bool = True
     ) -> pd.DataFrame:
         """
-        Rolling linear regression between two time series (like SOL vs BTC).
+        Rolling quadratic regression y = alpha + beta*x + gamma*x^2 between two time
+        series (like SOL vs BTC), fitted on the `window` rows before each row.
+
+        Every window is solved at once from the closed-form normal equations: windowed
+        sums of x^0..x^4, y, xy, x^2y and y^2 come from cumulative sums, and the 3x3
+        systems are solved in one batch. x is shifted and scaled by its overall mean
+        and std (and y shifted by its mean) to keep the systems well conditioned; the
+        coefficients are mapped back afterwards. Windows whose system is still near
+        singular (e.g. a flat market), or whose y is constant, are fitted with sklearn
+        as before.
 
-        Returns a DataFrame with columns: ['alpha', 'beta', 'r2'].
+        Returns a DataFrame with columns: ['alpha', 'beta', 'gamma', 'r2'].
         Similar to ta.trend indicators.
         """
         if len(y) != len(x):
             raise ValueError("Input series must have the same length.")
-        
-        alphas, betas, r2s = [np.nan] * len(y), [np.nan] * len(y), [np.nan] * len(y)
-        gammas = [np.nan] * len(y)
-
-        for i in range(window, len(y)):
-            y_window = y.iloc[i - window:i].values.reshape(-1, 1)
-            x_window = x.iloc[i - window:i].values.reshape(-1, 1)
-            X_poly = self.poly.fit_transform(x_window)
-            self.model.fit(X_poly, y_window)
-            
-            alpha = float(self.model.intercept_)
-            beta = float(self.model.coef_[0][1])
-            gamma = float(self.model.coef_[0][2])
-            r2 = self.model.score(X_poly, y_window)
-            alphas[i] = alpha
-            betas[i] = beta
-            r2s[i] = r2
-            gammas[i] = gamma
-
-        df_result = pd.DataFrame({
-            'alpha': alphas,
-            'beta': betas,
-            'gamma' : gammas,
-            'r2': r2s
-        }, index=y.index)
+
+        result = np.full((len(y), 4), np.nan)
+        if len(y) > window:
+            y_values = y.to_numpy(dtype=np.float64)
+            x_values = x.to_numpy(dtype=np.float64)
+            x_shift = x_values.mean()
+            x_scale = x_values.std() or 1.0
+            y_shift = y_values.mean()
+            u = (x_values - x_shift) / x_scale
+            v = y_values - y_shift
+
+            u2 = u * u
+            s1, s2, s3, s4, sv, suv, su2v, svv = self.window_sums(np.stack([u, u2, u2 * u, u2 * u2, v, u * v, u2 * v, v * v]), window)
+            normal = np.empty((len(s1), 3, 3))
+            normal[:, 0, 0] = window
+            normal[:, 0, 1] = normal[:, 1, 0] = s1
+            normal[:, 0, 2] = normal[:, 1, 1] = normal[:, 2, 0] = s2
+            normal[:, 1, 2] = normal[:, 2, 1] = s3
+            normal[:, 2, 2] = s4
+            rhs = np.stack([sv, suv, su2v], axis=1)
+
+            singular = ~(np.linalg.cond(normal) < 1e10)
+            normal[singular] = np.eye(3)
+            a, b, c = np.linalg.solve(normal, rhs[:, :, None])[:, :, 0].T
+
+            ss_res = svv - (a * sv + b * suv + c * su2v)
+            ss_tot = svv - sv * sv / window
+            # a constant y window leaves only round-off in ss_tot, so it goes to sklearn too
+            flat = ss_tot <= np.finfo(np.float64).eps * window * np.maximum(svv, 1.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r2 = 1 - ss_res / ss_tot
+
+            fitted = result[window:]
+            fitted[:, 0] = a - b * x_shift / x_scale + c * x_shift * x_shift / (x_scale * x_scale) + y_shift
+            fitted[:, 1] = b / x_scale - 2 * c * x_shift / (x_scale * x_scale)
+            fitted[:, 2] = c / (x_scale * x_scale)
+            fitted[:, 3] = r2
+            for k in np.flatnonzero(singular | flat):
+                i = window + k
+                fitted[k] = self.fit_window(y_values[i - window:i], x_values[i - window:i])
+
+        df_result = pd.DataFrame(result, columns=['alpha', 'beta', 'gamma', 'r2'], index=y.index)
 
         if fillna:
-            df_result = df_result.fillna(method='bfill')
+            df_result = df_result.bfill()
 
         return df_result
-    
+
     def AddRegressionValues(self):
         df = pd.DataFrame({
             'market': self.market_df['close'],
             'base': self.based_df['close']
         }).dropna()
 
-        df = df.pct_change().dropna()
+        if self.market_returns is not None and df.index.equals(self.market_df.index):
+            # no market rows were dropped, so the market returns are the precomputed ones
+            df = pd.DataFrame({'market': self.market_returns, 'base': df['base'].pct_change()}).dropna()
+        else:
+            df = df.pct_change().dropna()
 
         reg = self.rolling_regression(df['base'], df['market'], window=50)
 
@@ -0,0 +1,323 @@
+import math
+import numpy as np
+
+NAN = float('nan')
+
+class StreamingEMA:
+    """
+    Exponential moving average updated one value at a time.
+
+    Follows the recurrence pandas uses for ewm(adjust=False).mean(), which is what
+    ta.trend.ema_indicator and the RSI smoothing call, so streamed values equal the
+    batch column for the same history.
+    """
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        com = (span - 1) / 2.0 if span is not None else (1.0 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + com)
+        self.min_periods = max(int(min_periods), 1)
+        self.state = None  # (weighted, old_wt, nobs)
+
+    def _step(self, value):
+        cur = float(value)
+        observed = cur == cur
+        if self.state is None:
+            weighted, old_wt, nobs = cur, 1.0, int(observed)
+        else:
+            weighted, old_wt, nobs = self.state
+            nobs += observed
+            if weighted == weighted:
+                old_wt *= 1.0 - self.alpha
+                if observed:
+                    # constant series keep their value exactly
+                    if weighted != cur:
+                        weighted = (old_wt * weighted + self.alpha * cur) / (old_wt + self.alpha)
+                    old_wt = 1.0
+            elif observed:
+                weighted = cur
+        return (weighted, old_wt, nobs), (weighted if nobs >= self.min_periods else NAN)
+
+    def update(self, value):
+        self.state, result = self._step(value)
+        return result
+
+    def peek(self, value):
+        """
+        Value after `value` without consuming it
+        """
+        return self._step(value)[1]
+
+
+class RingBuffer:
+    """
+    Last `window` values, the oldest one overwritten first
+    """
+    def __init__(self, window):
+        self.window = window
+        self.values = np.full(window, np.nan)
+        self.count = 0
+
+    def leaving(self):
+        """
+        Value that drops out of the window when the next one is pushed (None while filling)
+        """
+        return float(self.values[self.count % self.window]) if self.count >= self.window else None
+
+    def push(self, value):
+        self.values[self.count % self.window] = value
+        self.count += 1
+
+
+class StreamingSMA:
+    """
+    Rolling mean over a ring buffer, O(1) per value.
+
+    Keeps the Kahan-compensated running sum pandas' rolling(window).mean() keeps
+    (ta.trend.sma_indicator, Bollinger mavg), so results match the batch column.
+    NaN values hold a slot but are not counted.
+    """
+    def __init__(self, window, min_periods=None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.buffer = RingBuffer(window)
+        self.state = None  # (nobs, sum_x, add_comp, remove_comp, neg_ct, same_count, prev_value)
+
+    def _step(self, value):
+        val = float(value)
+        if self.state is None:
+            nobs, sum_x, add_comp, remove_comp, neg_ct, same_count, prev_value = 0, 0.0, 0.0, 0.0, 0, 0, val
+        else:
+            nobs, sum_x, add_comp, remove_comp, neg_ct, same_count, prev_value = self.state
+
+        old = self.buffer.leaving()
+        if old is not None and old == old:
+            nobs -= 1
+            y = -old - remove_comp
+            t = sum_x + y
+            remove_comp = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, old) < 0:
+                neg_ct -= 1
+
+        if val == val:
+            nobs += 1
+            y = val - add_comp
+            t = sum_x + y
+            add_comp = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, val) < 0:
+                neg_ct += 1
+            same_count = same_count + 1 if val == prev_value else 1
+            prev_value = val
+
+        result = NAN
+        if nobs >= self.min_periods and nobs > 0:
+            result = sum_x / nobs
+            if same_count >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+        return (nobs, sum_x, add_comp, remove_comp, neg_ct, same_count, prev_value), result
+
+    def update(self, value):
+        self.state, result = self._step(value)
+        self.buffer.push(float(value))
+        return result
+
+    def peek(self, value):
+        return self._step(value)[1]
+
+
+class StreamingStd:
+    """
+    Rolling standard deviation over a ring buffer, O(1) per value.
+
+    Kahan-compensated Welford updates, as pandas' rolling(window).std(ddof) uses for
+    the Bollinger band width. Results match the batch column to float round-off.
+    """
+    def __init__(self, window, ddof=0, min_periods=None):
+        self.window = window
+        self.ddof = ddof
+        self.min_periods = window if min_periods is None else min_periods
+        self.buffer = RingBuffer(window)
+        self.state = None  # (nobs, mean_x, ssqdm_x, add_comp, remove_comp, same_count, prev_value)
+
+    def _step(self, value):
+        val = float(value)
+        if self.state is None:
+            nobs, mean_x, ssqdm_x, add_comp, remove_comp, same_count, prev_value = 0, 0.0, 0.0, 0.0, 0.0, 0, val
+        else:
+            nobs, mean_x, ssqdm_x, add_comp, remove_comp, same_count, prev_value = self.state
+
+        old = self.buffer.leaving()
+        if old is not None and old == old:
+            nobs -= 1
+            if nobs:
+                prev_mean = mean_x - remove_comp
+                y = old - remove_comp
+                t = y - mean_x
+                remove_comp = t + mean_x - y
+                mean_x = mean_x - t / nobs
+                ssqdm_x = ssqdm_x - (old - prev_mean) * (old - mean_x)
+            else:
+                mean_x = ssqdm_x = 0.0
+
+        if val == val:
+            nobs += 1
+            same_count = same_count + 1 if val == prev_value else 1
+            prev_value = val
+            prev_mean = mean_x - add_comp
+            y = val - add_comp
+            t = y - mean_x
+            add_comp = t + mean_x - y
+            mean_x = mean_x + t / nobs
+            ssqdm_x = ssqdm_x + (val - prev_mean) * (val - mean_x)
+
+        result = NAN
+        if nobs >= self.min_periods and nobs > self.ddof:
+            variance = 0.0 if nobs == 1 or same_count >= nobs else ssqdm_x / (nobs - self.ddof)
+            result = math.sqrt(variance) if variance > 0 else 0.0
+        return (nobs, mean_x, ssqdm_x, add_comp, remove_comp, same_count, prev_value), result
+
+    def update(self, value):
+        self.state, result = self._step(value)
+        self.buffer.push(float(value))
+        return result
+
+    def peek(self, value):
+        return self._step(value)[1]
+
+
+class StreamingRSI:
+    """
+    Wilder RSI (ta.momentum.rsi) from closes, one close at a time.
+
+    Gains and losses are the close-to-close differences in the closes' dtype,
+    smoothed with alpha = 1 / window.
+    """
+    def __init__(self, window=5):
+        self.up = StreamingEMA(alpha=1 / window, min_periods=window)
+        self.down = StreamingEMA(alpha=1 / window, min_periods=window)
+        self.prev_close = None
+
+    def _moves(self, close):
+        diff = close - self.prev_close if self.prev_close is not None else NAN
+        up = diff if diff > 0 else 0.0
+        down = -(diff if diff < 0 else 0.0)
+        return up, down
+
+    @staticmethod
+    def _rsi(up, down):
+        if down == 0:
+            return 100.0
+        return 100 - (100 / (1 + up / down))
+
+    def update(self, close):
+        up, down = self._moves(close)
+        self.prev_close = close
+        return self._rsi(self.up.update(up), self.down.update(down))
+
+    def peek(self, close):
+        up, down = self._moves(close)
+        return self._rsi(self.up.peek(up), self.down.peek(down))
+
+
+class StreamingBollinger:
+    """
+    Bollinger bands (ta.volatility.BollingerBands) from a rolling mean and std
+    """
+    def __init__(self, window=20, window_dev=2):
+        self.window_dev = window_dev
+        self.mean = StreamingSMA(window)
+        self.std = StreamingStd(window)
+
+    def _bands(self, mavg, mstd):
+        return {
+            'bb_high': mavg + self.window_dev * mstd,
+            'bb_low': mavg - self.window_dev * mstd,
+            'bb_mid': mavg,
+        }
+
+    def update(self, close):
+        return self._bands(self.mean.update(close), self.std.update(close))
+
+    def peek(self, close):
+        return self._bands(self.mean.peek(close), self.std.peek(close))
+
+
+class StreamingTA:
+    """
+    Streaming counterpart of TA.add for one symbol/timeframe.
+
+    Seeded once from a candle history, then updated with each closed candle in
+    O(1). peek() gives the columns for a candle that has not closed yet without
+    changing the state. Closes are cast to `dtype` first, as get_ohlcv does.
+    """
+    COLUMNS = ['atr', 'atr_mean', 'ma_short', 'ma_long', 'ema_short', 'ema_long', 'rsi', 'bb_high', 'bb_low', 'bb_mid']
+
+    def __init__(self, dtype=np.float32):
+        self.dtype = dtype
+        self.atr = StreamingEMA(span=20, min_periods=20)
+        self.atr_mean = StreamingSMA(50)
+        self.ma_short = StreamingSMA(20)
+        self.ma_long = StreamingSMA(50)
+        self.ema_short = StreamingEMA(span=20, min_periods=20)
+        self.ema_long = StreamingEMA(span=50, min_periods=50)
+        self.rsi = StreamingRSI(window=5)
+        self.bollinger = StreamingBollinger(window=20, window_dev=2)
+        self.last_timestamp = None
+
+    def seed(self, data):
+        """
+        Feed every candle of a history frame (with 'close' and 'timestamp')
+        """
+        for close, timestamp in zip(data['close'].to_numpy(), data['timestamp'].to_numpy()):
+            self.update(close, timestamp)
+        return self
+
+    def update_frame(self, data):
+        """
+        Feed the candles of data newer than the last one seen.
+
+        Returns:
+            False when data does not reach back to the last candle seen (a gap), else True.
+        """
+        timestamps = data['timestamp'].to_numpy()
+        if self.last_timestamp is not None:
+            if not len(timestamps) or timestamps[0] > self.last_timestamp:
+                return False
+            data = data[timestamps > self.last_timestamp]
+        self.seed(data)
+        return True
+
+    def update(self, close, timestamp=None):
+        close = self.dtype(close)
+        atr = self.atr.update(close)
+        values = {
+            'atr': atr,
+            'atr_mean': self.atr_mean.update(atr),
+            'ma_short': self.ma_short.update(close),
+            'ma_long': self.ma_long.update(close),
+            'ema_short': self.ema_short.update(close),
+            'ema_long': self.ema_long.update(close),
+            'rsi': self.rsi.update(close),
+            **self.bollinger.update(close),
+        }
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        return values
+
+    def peek(self, close):
+        close = self.dtype(close)
+        atr = self.atr.peek(close)
+        return {
+            'atr': atr,
+            'atr_mean': self.atr_mean.peek(atr),
+            'ma_short': self.ma_short.peek(close),
+            'ma_long': self.ma_long.peek(close),
+            'ema_short': self.ema_short.peek(close),
+            'ema_long': self.ema_long.peek(close),
+            'rsi': self.rsi.peek(close),
+            **self.bollinger.peek(close),
+        }
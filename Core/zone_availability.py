@@ -0,0 +1,77 @@
+import copy
+import numpy as np
+
+class AvailabilityIndex:
+    """
+    Shared, time-ordered index of the liquidity zones still available to a zone.
+
+    A liquidity zone is available at time t when it was never swept or was swept
+    after t. Each zone's reference time (touch_time, else swept_time) is kept as a
+    column, and the candidate list is produced on demand from the swept times
+    sorted once, instead of being stored on every zone.
+    """
+    def __init__(self, zones, swept_time, unswept, ref_time, has_ref):
+        self.zones = zones
+        times = self.to_ns(swept_time)
+        self.unswept = np.flatnonzero(unswept)
+        swept = np.flatnonzero(~np.asarray(unswept, dtype=bool))
+        self.swept_order = swept[np.argsort(times[swept], kind='stable')]
+        self.swept_times = times[self.swept_order]
+        self.until = np.where(unswept, np.iinfo(np.int64).max, times)
+        self.ref_time = self.to_ns(ref_time)
+        self.has_ref = np.asarray(has_ref, dtype=bool)
+
+    def __len__(self):
+        return len(self.zones)
+
+    @staticmethod
+    def to_ns(values):
+        """
+        int64 nanoseconds for a datetime-like value or array
+        """
+        return np.asarray(values).astype('datetime64[ns]').astype(np.int64)
+
+    def positions_at(self, time):
+        """
+        Positions (ascending) of the zones never swept or swept after time
+        """
+        start = np.searchsorted(self.swept_times, self.to_ns(time), side='right')
+        return np.sort(np.concatenate([self.unswept, self.swept_order[start:]]))
+
+    def positions(self, i):
+        """
+        Positions of the zones available to zone i (none when i has no reference time)
+        """
+        if i >= len(self.has_ref) or not self.has_ref[i]:
+            return np.array([], dtype=np.int64)
+        return self.positions_at(self.ref_time[i])
+
+    def count(self, i):
+        """
+        Number of zones available to zone i
+        """
+        if i >= len(self.has_ref) or not self.has_ref[i]:
+            return 0
+        start = np.searchsorted(self.swept_times, self.ref_time[i], side='right')
+        return len(self.unswept) + len(self.swept_times) - start
+
+    def select(self, positions):
+        """
+        Index over the same liquidity zones for the reference zones at the given positions only
+        """
+        index = copy.copy(self)
+        index.ref_time = self.ref_time[positions]
+        index.has_ref = self.has_ref[positions]
+        return index
+
+    def is_available(self, k, i):
+        """
+        True when zone k is available to zone i
+        """
+        return bool(self.has_ref[i]) and self.until[k] > self.ref_time[i]
+
+    def zones_at(self, time):
+        return [self.zones[k] for k in self.positions_at(time)]
+
+    def available_zones(self, i):
+        return [self.zones[k] for k in self.positions(i)]
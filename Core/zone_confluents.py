@@ -3,18 +3,61 @@ import numpy as np
 from Data.timeFrames import timeFrame
 from Data.indexCalculate import IndexCalculator
 from Utility.MemoryUsage import MemoryUsage as mu
+from .zone_table import ZoneTable
+from .zone_interval_index import ZoneIntervalIndex
+from .zone_availability import AvailabilityIndex
 from tqdm import tqdm
 class ConfluentsFinder():
+    LIQ_TYPES = ['Buy-Side Liq','Sell-Side Liq']
+
     def __init__(self,zones,threshold):
-        self.zones = zones
+        # zones can be a ZoneTable or a list of zone dicts; searches run on the table columns
+        if isinstance(zones, ZoneTable):
+            self.table = zones
+            self.zones = zones.to_records()
+        else:
+            self.table = ZoneTable.from_records(zones)
+            self.zones = zones
         self.threshold = threshold
         self. timeframes = timeFrame()
         self.indexCalculate = IndexCalculator(self.zones)
 
-    def seperate(self):
-        self.liq_zones = [z for z in self.zones if  z['zone_type'] in ['Buy-Side Liq','Sell-Side Liq']]
-        self.core_zones = [z for z in self.zones if z['zone_type'] not in ['Buy-Side Liq','Sell-Side Liq']]
-        self.based_zones = self.timeframes.getBasedZone(self.zones)
+    def seperate(self,only=None):
+        if len(self.table) == 0:
+            self.liq_index = self.core_index = self.based_index = np.array([], dtype=np.int64)
+        else:
+            liq_mask = self.table.isin('zone_type', self.LIQ_TYPES)
+            self.liq_index = np.flatnonzero(liq_mask)
+            self.core_index = np.flatnonzero(~liq_mask)
+            present = [self.table.categories['time_frame'][c] for c in np.unique(self.table.columns['time_frame'])]
+            smallest = min(present, key=self.timeframes.getTFOrder)
+            self.based_index = np.flatnonzero(self.table.isin('time_frame', [smallest]))
+            if only is not None:
+                self.based_index = np.intersect1d(self.based_index, only)
+        self.liq_zones = [self.zones[i] for i in self.liq_index]
+        self.core_zones = [self.zones[i] for i in self.core_index]
+        self.based_zones = [self.zones[i] for i in self.based_index]
+
+    def confluence_index(self, index, time_key):
+        """
+        Interval index over the given rows of the table plus their type and timeframe labels
+        """
+        table = self.table
+        if time_key in table:
+            times = table.columns[time_key][index]
+            untouched = table.is_null(time_key)[index]
+        else:
+            times = np.zeros(len(index), dtype='datetime64[ns]')
+            untouched = np.ones(len(index), dtype=bool)
+        interval = ZoneIntervalIndex(table.columns['zone_low'][index], table.columns['zone_high'][index], times, untouched)
+        return interval, table.column('zone_type')[index], table.column('time_frame')[index]
+
+    def find_confluents(self, m, index):
+        interval, types, timeframes = index
+        high = m['zone_high']+self.threshold
+        low = m['zone_high'] - self.threshold
+        hits = interval.query(low, high, pd.Timestamp(m['timestamp']))
+        return [{'type': types[k], 'timeframe': timeframes[k]} for k in hits]
 
     def getTimeFrameList(self):
         tfs = set()
@@ -25,92 +68,64 @@ class ConfluentsFinder():
         return list(tfs)
 
     def get_available_cores(self,zone):
-        available_core = []
-        touch_time = zone.get('touch_time')
-        swept_time = zone.get('swept_time')
-
         # Pick whichever is available as the reference
-        ref_time = touch_time or swept_time
+        ref_time = zone.get('touch_time') or zone.get('swept_time')
         if ref_time is None:
             return []
-
-        for z in self.liq_zones:
-            z_touch_time = z.get('swept_time')
-
-            # If zone never swept, always available
-            if z_touch_time is None:
-                available_core.append(z)
-            # Compare safely
-            elif ref_time < z_touch_time:
-                available_core.append(z)
-
-        return available_core
-
-
+        return self.availability.zones_at(ref_time)
 
     def get_available_liq(self, zone):
-        available_liq = []
-        touch_time = zone.get('touch_time')
-        swept_time = zone.get('swept_time')
-
         # Pick whichever is available as the reference
-        ref_time = touch_time or swept_time
+        ref_time = zone.get('touch_time') or zone.get('swept_time')
         if ref_time is None:
             return []
-
-        for z in self.liq_zones:
-            z_touch_time = z.get('swept_time')
-
-            # If zone never swept, always available
-            if z_touch_time is None:
-                available_liq.append(z)
-            # Compare safely
-            elif ref_time < z_touch_time:
-                available_liq.append(z)
-
-        return available_liq
-
+        return self.availability.zones_at(ref_time)
+
+    def time_column(self, key):
+        """
+        Column of a time field as int64 nanoseconds plus its null mask (all null when no zone has it)
+        """
+        if key not in self.table:
+            return np.zeros(len(self.table), dtype=np.int64), np.ones(len(self.table), dtype=bool)
+        nulls = self.table.is_null(key)
+        values = self.table.columns[key]
+        if values.dtype.kind != 'M':
+            # every zone had None here, the column holds placeholders
+            return np.zeros(len(self.table), dtype=np.int64), nulls
+        return AvailabilityIndex.to_ns(values), nulls
 
     @mu.log_memory
     def add_core_confluence(self,inner_func = False):
+        index = self.confluence_index(self.core_index, 'touch_time')
         for m in tqdm(self.based_zones,desc='Adding Core Confluents',disable=inner_func):
-            confluents = []
-            available_zones = [z for z in self.core_zones if ( (z['touch_time'] is not None and z['touch_time'] > m['timestamp'] ) or (z['touch_time'] is None )) ]
-            for lz in available_zones:
-                high = m['zone_high']+self.threshold
-                low = m['zone_high'] - self.threshold
-                if lz['zone_low'] <= high and lz['zone_high'] >= low:
-                    confluents.append({
-                        'type': lz['zone_type'],
-                        'timeframe': lz['time_frame'],
-                    })
-            m['core_confluence'] = confluents
+            m['core_confluence'] = self.find_confluents(m, index)
             
     @mu.log_memory
     def add_liq_confluence(self,inner_func = False):
+        index = self.confluence_index(self.liq_index, 'swept_time')
         for m in tqdm(self.based_zones,desc = 'Adding Liq Confluents',disable=inner_func):
-            confluents = []
-            available_zones = [z for z in self.liq_zones if ( (z['swept_time'] is not None and z['swept_time'] > m['timestamp'] ) or (z['swept_time'] is None )) ]
-            for lz in available_zones:
-                high = m['zone_high']+self.threshold
-                low = m['zone_high'] - self.threshold
-                if lz['zone_low'] <= high and lz['zone_high'] >= low:
-                    confluents.append({
-                        'type': lz['zone_type'],
-                        'timeframe': lz['time_frame'],
-                    })
-            m['liquidity_confluence'] = confluents
+            m['liquidity_confluence'] = self.find_confluents(m, index)
 
     @mu.log_memory
     def add_available_zones(self,inner_func = False):
-        for zone in tqdm(self.based_zones,desc='Adding Available Zones',disable= inner_func):
-            zone['available_liquidity'] = self.get_available_liq(zone)
-            zone['available_core'] = self.get_available_cores(zone)
+        """
+        Build the shared availability index. Based zones are referenced by their
+        touch_time (or swept_time) and query it instead of storing candidate lists.
+        """
+        touch, no_touch = self.time_column('touch_time')
+        swept, unswept = self.time_column('swept_time')
+        has_ref = np.zeros(len(self.table), dtype=bool)
+        has_ref[self.based_index] = ~(no_touch & unswept)[self.based_index]
+        ref_time = np.where(no_touch, swept, touch)
+        self.availability = AvailabilityIndex(self.liq_zones, swept[self.liq_index], unswept[self.liq_index], ref_time, has_ref)
     
     @mu.log_memory
-    def getConfluents(self,inner_func = False):
+    def getConfluents(self,inner_func = False,only=None):
+        """
+        Add confluence to the based zones, or only to those at the table positions in `only`
+        """
         #self.zones = self.indexCalculate.calculate()
-        self.seperate()
+        self.seperate(only)
         self.add_core_confluence(inner_func=inner_func)
         self.add_liq_confluence(inner_func=inner_func)
         self.add_available_zones(inner_func=inner_func)
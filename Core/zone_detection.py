@@ -1,12 +1,24 @@
 import numpy as np
+import pandas as pd
 from tqdm import tqdm
 from Utility.MemoryUsage import MemoryUsage as mu
+from numpy.lib.stride_tricks import sliding_window_view
+from .zone_touch_index import TouchIndex
+from .zone_table import ZoneTable
 class ZoneDetector:
+    FEATURE_KEYS = ['trades','ma_short','ma_long','ema_short','ema_long','atr','rsi','atr_mean',
+                    'bb_high','bb_low','bb_mid','alpha','beta','gamma','r2']
+    ZONE_KEYS = ['zone_type'] + FEATURE_KEYS + ['zone_high','zone_low','zone_width','body_size','wick_ratio',
+                'volume_on_creation','avg_volume_past_5','prev_volatility_5','momentum_5',
+                'touch_index','touch_time','time_frame','timestamp']
+    SWING_KEYS = ['index','Type','Price','swing_strength','trades','ema_short','ema_long','ma_short','ma_long',
+                  'atr','rsi','atr_mean','bb_high','bb_low','bb_mid','alpha','beta','gamma','r2','timestamp']
+
     def __init__(self, df, timeframe="1h"):
         self.df = df
         self.timeframe = timeframe
+        self._swings = None
         self.initialize()
-        self.detect_swings()
 
     def initialize(self):
         self.highs = self.df['high'].values
@@ -30,14 +42,42 @@ class ZoneDetector:
         self.betas = self.df['beta'].values if 'beta' in self.df else None
         self.gammas = self.df['gamma'].values if 'gamma' in self.df else None
         self.r2s = self.df['r2'].values if 'r2' in self.df else None
+        self.touches = TouchIndex(self.opens, self.highs, self.lows, self.closes)
 
-    @mu.log_memory
-    def detect_fvg(self,threshold = 300,inner_func = False):
+    def gather_features(self, idx):
         """
-        Detect Fair Value Gaps (FVGs)
+        Fancy-index every candle feature column at the given positions
+        """
+        return {
+            'trades': self.trades[idx],
+            'ma_short': self.ma_short[idx],
+            'ma_long': self.ma_long[idx],
+            'ema_short': self.ema_short[idx],
+            'ema_long': self.ema_long[idx],
+            'atr': self.atr[idx],
+            'rsi': self.rsi[idx],
+            'atr_mean': self.atr_mean[idx],
+            'bb_high': self.bb_high[idx],
+            'bb_low': self.bb_low[idx],
+            'bb_mid': self.bb_mid[idx],
+            'alpha': self.alphas[idx] if self.alphas is not None else None,
+            'beta': self.betas[idx] if self.betas is not None else None,
+            'gamma': self.gammas[idx] if self.gammas is not None else None,
+            'r2': self.r2s[idx] if self.r2s is not None else None,
+        }
+
+    @mu.log_memory
+    def detect_fvg_columns(self,threshold = 300):
         """
+        Vectorized Fair Value Gap detection.
+
+        Gaps are found with shifted-array masks over the whole history and every feature
+        is gathered with fancy indexing, so no per-candle Python work is done.
 
-        fvg_indices = []
+        Returns:
+            dict of np.ndarray, one entry per FVG, ordered by creation candle.
+            'touch_index' is -1 for untouched zones.
+        """
         length = len(self.df)
 
         close_rolling = self.df['close'].rolling(window=5)
@@ -47,286 +87,209 @@ class ZoneDetector:
         prev_volatility_5 = close_rolling.std().values
         momentum_5 = self.closes - np.roll(self.closes, 5)
 
-        for i in tqdm(range(5, length - 1),desc='Extracting FVG',disable=inner_func):
-            prev_high = self.highs[i - 1]
-            prev_low = self.lows[i - 1]
-            next_high = self.highs[i + 1]
-            next_low = self.lows[i + 1]
-
-            body = abs(self.opens[i] - self.closes[i])
-            candle_range = self.highs[i] - self.lows[i]
-            body_ratio = body / candle_range if candle_range != 0 else 0
-            wick_ratio = 1 - body_ratio
-            body_size = body
-            volume_on_creation = self.volumes[i]
-
-            if next_low > prev_high:
-                gap = next_low - prev_high
-                if gap >= threshold:
-                    # Touch index search — can be optimized further with precomputed conditions if needed
-                    touch_indx = next(
-                        (j for j in range(i + 2, length) if self.opens[j] > next_low and self.closes[j] < next_low), None
-                    )
-                    fvg_indices.append({
-                        
-                        'zone_type': 'Bullish FVG',
-                        'trades' : self.trades[i],
-                        'ma_short': self.ma_short[i],
-                        'ma_long': self.ma_long[i],
-                        'ema_short': self.ema_short[i],
-                        'ema_long': self.ema_long[i],
-                        'atr': self.atr[i],
-                        'rsi': self.rsi[i],
-                        'atr_mean': self.atr_mean[i],
-                        'bb_high':self.bb_high[i],
-                        'bb_low' : self.bb_low[i],
-                        'bb_mid' : self.bb_mid[i],
-                        'alpha' : self.alphas[i] if self.alphas is not None else None,
-                        'beta' : self.betas[i] if self.betas is not None else None,
-                        'gamma' : self.gammas[i] if self.gammas is not None else None,
-                        'r2' : self.r2s[i] if self.r2s is not None else None,
-                        'zone_high': next_low,
-                        'zone_low': prev_high,
-                        'zone_width': gap,
-                        'body_size': body_size,
-                        'wick_ratio': wick_ratio,
-                        'volume_on_creation': volume_on_creation,
-                        'avg_volume_past_5': avg_volume_past_5[i],
-                        'prev_volatility_5': prev_volatility_5[i],
-                        'momentum_5': momentum_5[i],
-                        'touch_index': touch_indx,
-                        'touch_time' : self.timestamps[touch_indx] if touch_indx is not None and touch_indx < len(self.timestamps) else None,
-                        'time_frame': self.timeframe,
-                        'timestamp' : self.timestamps[i]
-                    })
-
-            elif next_high < prev_low:
-                gap = prev_low - next_high
-                if gap >= threshold:
-                    touch_indx = next(
-                        (j for j in range(i + 2, length) if self.opens[j] < next_high and self.closes[j] > next_high), None
-                    )
-                    fvg_indices.append({
-                        
-                        'zone_type': 'Bearish FVG',
-                        'trades' : self.trades[i],
-                        'ma_short': self.ma_short[i],
-                        'ma_long': self.ma_long[i],
-                        'ema_short': self.ema_short[i],
-                        'ema_long': self.ema_long[i],
-                        'atr': self.atr[i],
-                        'rsi': self.rsi[i],
-                        'atr_mean': self.atr_mean[i],
-                        'bb_high': self.bb_high[i],
-                        'bb_low' : self.bb_low[i],
-                        'bb_mid' : self.bb_mid[i],
-                        'alpha' : self.alphas[i] if self.alphas is not None else None,
-                        'beta' : self.betas[i] if self.betas is not None else None,
-                        'gamma' : self.gammas[i] if self.gammas is not None else None,
-                        'r2' : self.r2s[i] if self.r2s is not None else None,
-                        'zone_high': prev_low,
-                        'zone_low': next_high,
-                        'zone_width': gap,
-                        'body_size': body_size,
-                        'wick_ratio': wick_ratio,
-                        'volume_on_creation': volume_on_creation,
-                        'avg_volume_past_5': avg_volume_past_5[i],
-                        'prev_volatility_5': prev_volatility_5[i],
-                        'momentum_5': momentum_5[i],
-                        'touch_index': touch_indx,
-                        'touch_time' : self.timestamps[touch_indx] if touch_indx is not None and touch_indx < len(self.timestamps) else None,
-                        'time_frame': self.timeframe,
-                        'timestamp' : self.timestamps[i]
-                    })
-
-        return fvg_indices
-    
+        centers = np.arange(5, length - 1)
+        prev_high = self.highs[centers - 1]
+        prev_low = self.lows[centers - 1]
+        next_high = self.highs[centers + 1]
+        next_low = self.lows[centers + 1]
+
+        is_up_gap = next_low > prev_high
+        bullish = is_up_gap & ((next_low - prev_high) >= threshold)
+        bearish = ~is_up_gap & (next_high < prev_low) & ((prev_low - next_high) >= threshold)
+        found = bullish | bearish
+
+        idx = centers[found]
+        bullish = bullish[found]
+        zone_high = np.where(bullish, next_low[found], prev_low[found])
+        zone_low = np.where(bullish, prev_high[found], next_high[found])
+
+        body = np.abs(self.opens[idx] - self.closes[idx])
+        candle_range = self.highs[idx] - self.lows[idx]
+        body_ratio = np.divide(body, candle_range, out=np.zeros_like(body), where=candle_range != 0)
+
+        touch_index = np.where(
+            bullish,
+            self.touches.first_cross_down(idx + 2, zone_high),
+            self.touches.first_cross_up(idx + 2, zone_low)
+        )
+
+        return {
+            'index': idx,
+            'zone_type': np.where(bullish, 'Bullish FVG', 'Bearish FVG').astype(object),
+            **self.gather_features(idx),
+            'zone_high': zone_high,
+            'zone_low': zone_low,
+            'zone_width': zone_high - zone_low,
+            'body_size': body,
+            'wick_ratio': 1 - body_ratio,
+            'volume_on_creation': self.volumes[idx],
+            'avg_volume_past_5': avg_volume_past_5[idx],
+            'prev_volatility_5': prev_volatility_5[idx],
+            'momentum_5': momentum_5[idx],
+            'touch_index': touch_index,
+            'touch_time': self.timestamps[np.maximum(touch_index, 0)],
+            'time_frame': self.timeframe,
+            'timestamp': self.timestamps[idx],
+        }
+
+    @classmethod
+    def columns_table(cls, columns):
+        """
+        ZoneTable of FVG/OB detector columns, untouched zones holding None touch fields
+        """
+        untouched = columns['touch_index'] < 0
+        return ZoneTable.from_columns(columns, cls.ZONE_KEYS, nulls={'touch_index': untouched, 'touch_time': untouched}, native=('touch_index',))
+
+    def detect_fvg_table(self,threshold = 300):
+        return self.columns_table(self.detect_fvg_columns(threshold=threshold))
+
+    @mu.log_memory
+    def detect_fvg(self,threshold = 300,inner_func = False):
+        """
+        Detect Fair Value Gaps (FVGs)
+        """
+        return self.detect_fvg_table(threshold=threshold).to_records()
+
+    @mu.log_memory
+    def detect_order_block_columns(self, threshold = 300):
+        """
+        Vectorized detection of bullish and bearish Order Blocks (OB).
+
+        Returns:
+            dict of np.ndarray, one entry per OB, ordered by creation candle.
+            'touch_index' is -1 for untouched zones.
+        """
+        length = len(self.df)
+        centers = np.arange(5, length - 2)
+        open_, close_ = self.opens[centers], self.closes[centers]
+        high_, low_ = self.highs[centers], self.lows[centers]
+        prev_close = self.closes[centers - 1]
+        next_close = self.closes[centers + 1]
+        next2_close = self.closes[centers + 2]
+
+        candle_range = high_ - low_
+        sized = (candle_range != 0) & ~(candle_range < threshold)
+        bearish_candle = close_ < open_
+        bullish = sized & bearish_candle & (prev_close > low_) & (next_close > high_) & (next2_close > next_close)
+        bearish = sized & ~bearish_candle & (close_ > open_) & (prev_close < high_) & (next_close < low_) & (next2_close < next_close)
+        found = bullish | bearish
+
+        idx = centers[found]
+        bullish = bullish[found]
+        zone_high = high_[found]
+        zone_low = low_[found]
+        body = np.abs(open_[found] - close_[found])
+
+        # stats over the 5 candles before the OB candle
+        past_5 = idx - 5
+        volume_windows = sliding_window_view(self.volumes, 5)[past_5] if len(idx) else np.empty((0, 5), dtype=self.volumes.dtype)
+        close_windows = sliding_window_view(self.closes, 5)[past_5] if len(idx) else np.empty((0, 5), dtype=self.closes.dtype)
+
+        touch_index = np.where(
+            bullish,
+            self.touches.first_cross_down(idx + 3, zone_high),
+            self.touches.first_cross_up(idx + 3, zone_low)
+        )
+
+        return {
+            'index': idx,
+            'zone_type': np.where(bullish, 'Bullish OB', 'Bearish OB').astype(object),
+            **self.gather_features(idx),
+            'zone_high': zone_high,
+            'zone_low': zone_low,
+            'zone_width': zone_high - zone_low,
+            'body_size': body,
+            'wick_ratio': 1 - body / candle_range[found],
+            'volume_on_creation': self.volumes[idx],
+            'avg_volume_past_5': volume_windows.mean(axis=1),
+            'prev_volatility_5': close_windows.std(axis=1),
+            'momentum_5': self.closes[idx] - self.closes[past_5],
+            'touch_index': touch_index,
+            'touch_time': self.timestamps[np.maximum(touch_index, 0)],
+            'time_frame': self.timeframe,
+            'timestamp': self.timestamps[idx],
+        }
+
+    def detect_order_block_table(self, threshold = 300):
+        return self.columns_table(self.detect_order_block_columns(threshold=threshold))
+
     @mu.log_memory
     def detect_order_blocks(self, threshold = 300,inner_func = False):
         """
-        Optimized detection of bullish and bearish Order Blocks (OB).
+        Detect bullish and bearish Order Blocks (OB).
         """
-        ob_list = []
-
-        for i in tqdm(range(5, len(self.df) - 2),desc='Extracting OBs',disable=inner_func):
-            open_, close_ = self.opens[i], self.closes[i]
-            high_, low_ = self.highs[i], self.lows[i]
-            prev_close = self.closes[i - 1]
-            next_close = self.closes[i + 1]
-            next2_close = self.closes[i + 2]
-
-            body = abs(open_ - close_)
-            candle_range = high_ - low_
-            if candle_range == 0:
-                continue
+        return self.detect_order_block_table(threshold=threshold).to_records()
 
-            body_ratio = body / candle_range
-            if candle_range < threshold:
-                continue
+    @property
+    def swings(self):
+        """
+        Swing records, detected on first use so FVG/OB-only callers never pay for them
+        """
+        if self._swings is None:
+            self.detect_swings()
+        return self._swings
+
+    @swings.setter
+    def swings(self, value):
+        self._swings = value
+
+    @staticmethod
+    def sliding_max(values, size):
+        """
+        Max of values[s:s + size] for every start s, in O(n) (van Herk / Gil-Werman).
+        Windows running past the end only see the remaining values.
+        """
+        n = len(values)
+        if n == 0:
+            return values.copy()
+        blocks = -(-(n + size - 1) // size)
+        padded = np.full(blocks * size, -np.inf, dtype=values.dtype)
+        padded[:n] = values
+        padded = padded.reshape(blocks, size)
+        prefix = np.maximum.accumulate(padded, axis=1).ravel()
+        suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+        starts = np.arange(n)
+        return np.maximum(suffix[starts], prefix[starts + size - 1])
 
-            wick_ratio = 1 - body_ratio
-            zone_high, zone_low = high_, low_
-            zone_width = zone_high - zone_low
-            body_size = body
-            volume_on_creation = self.volumes[i]
-
-            avg_volume_past_5 = self.volumes[i-5:i].mean()
-            prev_volatility_5 = self.closes[i-5:i].std()
-            momentum_5 = close_ - self.closes[i - 5]
-
-            # --- Bullish OB Detection ---
-            if close_ < open_:
-                if (prev_close > low_ and
-                    next_close > high_ and
-                    next2_close > self.closes[i + 1]):
-
-                    # Delay touch check until required
-                    touch_indx = next(
-                        (j for j in range(i + 3, len(self.df))
-                        if self.opens[j] > zone_high and self.closes[j] < zone_high),
-                        None
-                    )
-
-                    ob_list.append({
-                        
-                        'zone_type': 'Bullish OB',
-                        'trades' : self.trades[i],
-                        'ema_short': self.ema_short[i],
-                        'ema_long': self.ema_long[i],
-                        'ma_short' : self.ma_short[i],
-                        'ma_long' : self.ma_long[i],
-                        'atr': self.atr[i],
-                        'rsi': self.rsi[i],
-                        'atr_mean': self.atr_mean[i],
-                        'bb_high':self.bb_high[i],
-                        'bb_low' : self.bb_low[i],
-                        'bb_mid' : self.bb_mid[i],
-                        'alpha' : self.alphas[i] if self.alphas is not None else None,
-                        'beta' : self.betas[i] if self.betas is not None else None,
-                        'gamma' : self.gammas[i] if self.gammas is not None else None,
-                        'r2' : self.r2s[i] if self.r2s is not None else None,
-                        'zone_high': zone_high,
-                        'zone_low': zone_low,
-                        'zone_width': zone_width,
-                        'body_size': body_size,
-                        'wick_ratio': wick_ratio,
-                        'volume_on_creation': volume_on_creation,
-                        'avg_volume_past_5': avg_volume_past_5,
-                        'prev_volatility_5': prev_volatility_5,
-                        'momentum_5': momentum_5,
-                        'touch_index': touch_indx,
-                        'touch_time' : self.timestamps[touch_indx] if touch_indx is not None and touch_indx < len(self.timestamps) else None,
-                        'time_frame': self.timeframe,
-                        'timestamp' : self.timestamps[i]
-                    })
-
-            # --- Bearish OB Detection ---
-            elif close_ > open_:
-                if (prev_close < high_ and
-                    next_close < low_ and
-                    next2_close < self.closes[i + 1]):
-
-                    touch_indx = next(
-                        (j for j in range(i + 3, len(self.df))
-                        if self.opens[j] < zone_low and self.closes[j] > zone_low),
-                        None
-                    )
-
-                    ob_list.append({
-                        
-                        'zone_type': 'Bearish OB',
-                        'trades' : self.trades[i],
-                        'ma_short' : self.ma_short[i],
-                        'ma_long' : self.ma_long[i],
-                        'ema_short': self.ema_short[i],
-                        'ema_long': self.ema_long[i],
-                        'atr': self.atr[i],
-                        'rsi': self.rsi[i],
-                        'atr_mean': self.atr_mean[i],
-                        'bb_high':self.bb_high[i],
-                        'bb_low' : self.bb_low[i],
-                        'bb_mid' : self.bb_mid[i],
-                        'alpha' : self.alphas[i] if self.alphas is not None else None,
-                        'beta' : self.betas[i] if self.betas is not None else None,
-                        'gamma' : self.gammas[i] if self.gammas is not None else None,
-                        'r2' : self.r2s[i] if self.r2s is not None else None,
-                        'zone_high': zone_high,
-                        'zone_low': zone_low,
-                        'zone_width': zone_width,
-                        'body_size': body_size,
-                        'wick_ratio': wick_ratio,
-                        'volume_on_creation': volume_on_creation,
-                        'avg_volume_past_5': avg_volume_past_5,
-                        'prev_volatility_5': prev_volatility_5,
-                        'momentum_5': momentum_5,
-                        'touch_index': touch_indx,
-                        'touch_time' : self.timestamps[touch_indx] if touch_indx is not None and touch_indx < len(self.timestamps) else None,
-                        'time_frame': self.timeframe,
-                        'timestamp' : self.timestamps[i]
-                    })
-
-        return ob_list
-    
     @mu.log_memory
-    def detect_swings(self, window=20):
-        self.swings = []
+    def detect_swing_columns(self, window=20):
+        """
+        Linear-time swing detection.
 
-        for i in range(0, len(self.df)):
+        A candle is a swing high (low) when it holds the max high (min low) of
+        [i - window, i + window]. The first `window` candles only look forward
+        and the last ones see a truncated window, same as before.
 
-            if(i < window):
-                high_window = self.highs[i:i + window + 1]
-                low_window = self.lows[i:i + window + 1]
-            elif(i+window >= len(self.df)):
-                high_window = self.highs[i - window:]
-                low_window = self.lows[i - window:]
-            else:
-                high_window = self.highs[i - window:i + window + 1]
-                low_window = self.lows[i - window:i + window + 1]
-
-            center_high = self.highs[i]
-            center_low = self.lows[i]
-
-            is_swing_high = center_high == high_window.max()
-            is_swing_low = center_low == low_window.min()
-
-            if is_swing_high:
-                self.swings.append({'index': i, 'Type': 'Swing High', 'Price': center_high,'swing_strength':window,
-                            'trades' : self.trades[i],
-                            'ema_short' : self.ema_short[i],
-                            'ema_long' : self.ema_long[i],
-                            'ma_short' : self.ma_short[i],
-                            'ma_long' : self.ma_long[i],
-                            'atr' : self.atr[i],
-                            'rsi' : self.rsi[i],
-                            'atr_mean' : self.atr_mean[i],
-                            'bb_high' : self.bb_high[i],
-                            'bb_low' : self.bb_low[i],
-                            'bb_mid' : self.bb_mid[i],
-                            'alpha' : self.alphas[i] if 'alpha' in self.df else None,
-                            'beta' : self.betas[i] if 'beta' in self.df else None,
-                            'gamma' : self.gammas[i] if 'gamma' in self.df else None,
-                            'r2' : self.r2s[i] if 'r2' in self.df else None,
-                            'timestamp' : self.timestamps[i]
-                            })
-            elif is_swing_low:
-                self.swings.append({'index': i, 'Type': 'Swing Low', 'Price': center_low,'swing_strength':window,
-                            'trades' : self.trades[i],
-                            'ema_short' : self.ema_short[i],
-                            'ema_long' : self.ema_long[i],
-                            'ma_short' : self.ma_short[i],
-                            'ma_long' : self.ma_long[i],
-                            'atr' : self.atr[i],
-                            'rsi' : self.rsi[i],
-                            'atr_mean' : self.atr_mean[i],
-                            'bb_high' : self.bb_high[i],
-                            'bb_low' : self.bb_low[i],
-                            'bb_mid' : self.bb_mid[i],
-                            'alpha' : self.alphas[i] if 'alpha' in self.df else None,
-                            'beta' : self.betas[i] if 'beta' in self.df else None,
-                            'gamma' : self.gammas[i] if 'gamma' in self.df else None,
-                            'r2' : self.r2s[i] if 'r2' in self.df else None,
-                            'timestamp' : self.timestamps[i]
-                            })
+        Returns:
+            dict of np.ndarray, one entry per swing, ordered by candle index.
+        """
+        n = len(self.df)
+        positions = np.arange(n)
+        pad_high = np.full(window, -np.inf, dtype=self.highs.dtype)
+        pad_low = np.full(window, -np.inf, dtype=self.lows.dtype)
+
+        forward_max = self.sliding_max(self.highs, window + 1)
+        centered_max = self.sliding_max(np.concatenate([pad_high, self.highs]), 2 * window + 1)[:n]
+        forward_min = -self.sliding_max(-self.lows, window + 1)
+        centered_min = -self.sliding_max(np.concatenate([pad_low, -self.lows]), 2 * window + 1)[:n]
+
+        is_swing_high = self.highs == np.where(positions < window, forward_max, centered_max)
+        is_swing_low = ~is_swing_high & (self.lows == np.where(positions < window, forward_min, centered_min))
+
+        idx = np.flatnonzero(is_swing_high | is_swing_low)
+        is_high = is_swing_high[idx]
+        return {
+            'index': idx,
+            'Type': np.where(is_high, 'Swing High', 'Swing Low').astype(object),
+            'Price': np.where(is_high, self.highs[idx], self.lows[idx]),
+            'swing_strength': window,
+            **self.gather_features(idx),
+            'timestamp': self.timestamps[idx],
+        }
+
+    def detect_swings(self, window=20):
+        columns = self.detect_swing_columns(window=window)
+        self.swings = ZoneTable.from_columns(columns, self.SWING_KEYS, native=('index',)).to_records()
 
     def label_structure_from_swings(self):
         labeled_swings = []
@@ -358,127 +321,180 @@ class ZoneDetector:
             })
         self.swings = labeled_swings
 
+    def cluster_swings_greedy(self, candidates, pip_range, inner_func = False):
+        """
+        Reference clustering: every unused swing, in time order, collects all later
+        unused swings within +/- pip_range of its price. O(s^2).
+
+        Returns:
+            list of groups, each a time-ordered list of swing records.
+        """
+        groups = []
+        used = set()
+        for i, base in tqdm(enumerate(candidates),desc = 'extracting Liquidity Zones',disable=inner_func):
+            if base['timestamp'] in used:
+                continue
+
+            range_low = base['Price'] - pip_range
+            range_high = base['Price'] + pip_range
+
+            group = [base]
+            for other in candidates[i+1:]:
+                if other['timestamp'] in used:
+                    continue
+                if range_low <= other['Price'] <= range_high:
+                    group.append(other)
+                    used.add(other['timestamp'])
+
+            if len(group) >= 2:
+                groups.append(group)
+        return groups
+
+    def cluster_swings_sorted(self, candidates, pip_range, inner_func = False):
+        """
+        Same groups as cluster_swings_greedy in O(s log s).
+
+        Swings are sorted by price once and each base finds its price window with
+        searchsorted. Swings that are already grouped (or were a base) are skipped
+        with path-compressed "next alive" pointers, so each swing is visited once.
+
+        Returns:
+            list of groups, each a time-ordered list of swing records.
+        """
+        count = len(candidates)
+        if count == 0:
+            return []
+        prices = np.array([c['Price'] for c in candidates])
+        order = np.argsort(prices, kind='stable')
+        sorted_prices = prices[order]
+        window_start = np.searchsorted(sorted_prices, prices - pip_range, side='left').tolist()
+        window_end = np.searchsorted(sorted_prices, prices + pip_range, side='right').tolist()
+        slot_of = np.empty(count, dtype=np.int64)
+        slot_of[order] = np.arange(count)
+        slot_of = slot_of.tolist()
+        order = order.tolist()
+
+        next_alive = list(range(count + 1))
+        def find(slot):
+            root = slot
+            while next_alive[root] != root:
+                root = next_alive[root]
+            while next_alive[slot] != root:
+                next_alive[slot], slot = root, next_alive[slot]
+            return root
+
+        taken = [False] * count
+        groups = []
+        for i in tqdm(range(count),desc = 'extracting Liquidity Zones',disable=inner_func):
+            if taken[i]:
+                continue
+            # every earlier swing is gone from the pool, so what is left in the window is later in time
+            next_alive[slot_of[i]] = slot_of[i] + 1
+            members = []
+            slot = find(window_start[i])
+            while slot < window_end[i]:
+                member = order[slot]
+                members.append(member)
+                taken[member] = True
+                next_alive[slot] = slot + 1
+                slot = find(slot + 1)
+
+            if members:
+                groups.append([candidates[i]] + [candidates[m] for m in sorted(members)])
+        return groups
+
+    def liquidity_zone(self, group, direction, pip_range, swept_index):
+        """
+        Liquidity zone record for one group of clustered swings (swept_index -1 when unswept)
+        """
+        prices = [g['Price'] for g in group]
+        avg_level = sum(prices) / len(prices)
+        zone_high = avg_level + pip_range
+        zone_low = avg_level - pip_range
+        equal_level_deviation = np.std(prices)
+        duration = group[-1]['timestamp'] - group[0]['timestamp']
+
+        # Average volume around touches, looked up by swing position
+        volumes = self.volumes[[g['index'] for g in group]]
+
+        avg_volume = np.mean(volumes)
+        trades = [g['trades'] for g in group if 'trades' in g]
+        ma_shorts = [g['ma_short'] for g in group if 'ma_short' in g]
+        ma_longs = [g['ma_long'] for g in group if 'ma_long' in g]
+        ema_shorts = [g['ema_short'] for g in group if 'ema_short' in g]
+        ema_longs = [g['ema_long'] for g in group if 'ema_long' in g]
+        rsis = [g['rsi'] for g in group if 'rsi' in g]
+        atrs = [g['atr'] for g in group if 'atr' in g]
+        atr_means = [g['atr_mean'] for g in group if 'atr_mean' in g]
+        bb_highs = [g['bb_high'] for g in group if 'bb_high' in g]
+        bb_lows = [g['bb_low'] for g in group if 'bb_low' in g]
+        bb_mids = [g['bb_mid'] for g in group if 'bb_mid' in g]
+        alphas = [g['alpha'] for g in group if 'alpha' in g and g['alpha'] is not None]
+        betas = [g['beta'] for g in group if 'beta' in g and g['beta'] is not None]
+        gammas = [g['gamma'] for g in group if 'gamma' in g and g['gamma'] is not None]
+        r2s = [g['r2'] for g in group if 'r2' in g and g['r2'] is not None]
+        swept_time = pd.Timestamp(self.timestamps[swept_index]) if swept_index >= 0 else None
+
+        return {
+            'zone_type': f'{direction} Liq',
+            'trades' : np.mean(trades),
+            'level': avg_level,
+            'zone_high': zone_high,
+            'zone_low': zone_low,
+            'count': len(group),
+            'swept_time': swept_time,
+            'equal_level_deviation': equal_level_deviation,
+            'avg_volume_around_zone': avg_volume,
+            'duration_between_first_last_touch': duration / np.timedelta64(1, 's'),
+            'ma_short' : np.mean(ma_shorts),
+            'ma_long' : np.mean(ma_longs),
+            'ema_short' : np.mean(ema_shorts),
+            'ema_long' : np.mean(ema_longs),
+            'rsi' : np.mean(rsis),
+            'atr' : np.mean(atrs),
+            'atr_mean' : np.mean(atr_means),
+            'bb_high': np.mean(bb_highs),
+            'bb_mid': np.mean(bb_mids),
+            'bb_low': np.mean(bb_lows),
+            'alpha': np.mean(alphas) if alphas else None,
+            'beta': np.mean(betas) if betas else None,
+            'gamma': np.mean(gammas) if gammas else None,
+            'r2': np.mean(r2s) if r2s else None,
+            'time_frame' : self.timeframe,
+            'timestamp' : group[0]['timestamp']
+        }
+
     @mu.log_memory
-    def detect_liquidity_zones(self, range_pct=0.01,inner_func = False):
+    def detect_liquidity_zones(self, range_pct=0.01,inner_func = False,method = 'sorted'):
         """
         Detect buy-side and sell-side liquidity zones based on repeated highs/lows.
 
         Args:
-            df (pd.DataFrame): OHLCV dataframe with 'high' and 'low' columns.
-            swings (list): Output of detect_swings(), containing swing highs/lows.
             range_pct (float): Percent range to cluster equal highs/lows.
+            method (str): 'sorted' (O(s log s)) or 'greedy' (reference O(s^2) grouping).
 
         Returns:
-            List of liquidity zones with type, level, start/end index, and swept index.
+            List of liquidity zones with type, level, zone bounds, and swept time.
         """
-        n = len(self.df)
-        liquidity_zones = []
-
         highs = [s for s in self.swings if s['Type'] == 'Swing High']
         lows = [s for s in self.swings if s['Type'] == 'Swing Low']
 
         pip_range = (self.highs.max() - self.lows.min()) * range_pct
+        cluster = self.cluster_swings_sorted if method == 'sorted' else self.cluster_swings_greedy
 
         def process_zone(candidates, direction):
-            result = []
-            used = set()
-            for i, base in tqdm(enumerate(candidates),desc = 'extracting Liquidity Zones',disable=inner_func):
-                if base['timestamp'] in used:
-                    continue
+            groups = cluster(candidates, pip_range, inner_func=inner_func)
+            if not groups:
+                return []
+
+            # Find sweep candles for every group at once
+            after_end = [group[-1]['index'] + 1 for group in groups]
+            if direction == 'Sell-Side':
+                swept = self.touches.first_high_reach(after_end, [group[0]['Price'] + pip_range for group in groups])
+            else:
+                swept = self.touches.first_low_reach(after_end, [group[0]['Price'] - pip_range for group in groups])
 
-                base_level = base['Price']
-                range_low = base_level - pip_range
-                range_high = base_level + pip_range
-
-                group = [base]
-                prices = [base['Price']]
-                end_idx = base['timestamp']
-
-                for other in candidates[i+1:]:
-                    if other['timestamp'] in used:
-                        continue
-                    if range_low <= other['Price'] <= range_high:
-                        group.append(other)
-                        used.add(other['timestamp'])
-                        prices.append(other['Price'])
-                        end_idx = other['timestamp']
-
-                if len(group) < 2:
-                    continue  # not enough for liquidity
-
-                avg_level = sum(prices) / len(prices)
-                zone_high = avg_level + pip_range
-                zone_low = avg_level - pip_range
-                equal_level_deviation = np.std(prices)
-                duration = end_idx - group[0]['timestamp']
-
-                # Average volume around touches
-                volumes = [self.df.loc[self.df['timestamp'] == g['timestamp'], 'volume'].iloc[0] for g in group]
-
-                avg_volume = np.mean(volumes) if volumes else None
-                trades = [g['trades'] for g in group if 'trades' in g]
-                ma_shorts = [g['ma_short'] for g in group if 'ma_short' in g]
-                ma_longs = [g['ma_long'] for g in group if 'ma_long' in g]
-                ema_shorts = [g['ema_short'] for g in group if 'ema_short' in g]
-                ema_longs = [g['ema_long'] for g in group if 'ema_long' in g]
-                rsis = [g['rsi'] for g in group if 'rsi' in g]
-                atrs = [g['atr'] for g in group if 'atr' in g]
-                atr_means = [g['atr_mean'] for g in group if 'atr_mean' in g]
-                bb_highs = [g['bb_high'] for g in group if 'bb_high' in g]
-                bb_lows = [g['bb_low'] for g in group if 'bb_low' in g]
-                bb_mids = [g['bb_mid'] for g in group if 'bb_mid' in g]
-                alphas = [g['alpha'] for g in group if 'alpha' in g and g['alpha'] is not None]
-                betas = [g['beta'] for g in group if 'beta' in g and g['beta'] is not None]
-                gammas = [g['gamma'] for g in group if 'gamma' in g and g['gamma'] is not None]
-                r2s = [g['r2'] for g in group if 'r2' in g and g['r2'] is not None]
-                timestamps = [g['timestamp'] for g in group if 'timestamp' in g]
-                # Find sweep candle
-                
-                swept_index = None
-                swept_time = None
-                df = self.df.loc[(self.df['timestamp'] > end_idx)]
-                ohlc_high = df['high'].values
-                ohlc_low = df['low'].values
-                if direction == 'Sell-Side':
-                    cond = ohlc_high >= range_high
-                else:
-                    cond = ohlc_low <= range_low
-
-                if np.any(cond):
-                    swept_index =  int(np.argmax(cond))
-                    swept_time = df['timestamp'].iloc[swept_index]
-
-                result.append({
-                    'zone_type': f'{direction} Liq',
-                    'trades' : np.mean(trades),
-                    'level': avg_level,
-                    'zone_high': zone_high,
-                    'zone_low': zone_low,
-                    'count': len(group),
-                    'swept_time': swept_time,
-                    'equal_level_deviation': equal_level_deviation,
-                    'avg_volume_around_zone': avg_volume,
-                    'duration_between_first_last_touch': duration / np.timedelta64(1, 's'),
-                    'ma_short' : np.mean(ma_shorts),
-                    'ma_long' : np.mean(ma_longs),
-                    'ema_short' : np.mean(ema_shorts),
-                    'ema_long' : np.mean(ema_longs),
-                    'rsi' : np.mean(rsis),
-                    'atr' : np.mean(atrs),
-                    'atr_mean' : np.mean(atr_means),
-                    'bb_high': np.mean(bb_highs),
-                    'bb_mid': np.mean(bb_mids),
-                    'bb_low': np.mean(bb_lows),
-                    'alpha': np.mean(alphas) if alphas else None,
-                    'beta': np.mean(betas) if betas else None,
-                    'gamma': np.mean(gammas) if gammas else None,
-                    'r2': np.mean(r2s) if r2s else None,
-                    'time_frame' : self.timeframe,
-                    'timestamp' : timestamps[0]
-                })
-
-
-            return result
+            return [self.liquidity_zone(group, direction, pip_range, swept_index) for group, swept_index in zip(groups, swept)]
 
         buy_side = process_zone(lows, 'Buy-Side')
         sell_side = process_zone(highs, 'Sell-Side')
@@ -512,11 +528,15 @@ class ZoneDetector:
         return results
     
     @mu.log_memory
-    def get_zones(self,threshold = 300,inner_func = False):
-        fvg = self.detect_fvg(threshold=threshold,inner_func=inner_func)
-        ob = self.detect_order_blocks(threshold=threshold,inner_func=inner_func)
-        liq = self.detect_liquidity_zones(inner_func=inner_func)
-        return fvg+ob+liq
-
-
+    def get_zone_table(self,threshold = 300,inner_func = False):
+        """
+        All FVG, OB and liquidity zones as one columnar ZoneTable
+        """
+        fvg = self.detect_fvg_table(threshold=threshold)
+        ob = self.detect_order_block_table(threshold=threshold)
+        liq = ZoneTable.from_records(self.detect_liquidity_zones(inner_func=inner_func))
+        return ZoneTable.concat([fvg, ob, liq])
 
+    @mu.log_memory
+    def get_zones(self,threshold = 300,inner_func = False):
+        return self.get_zone_table(threshold=threshold,inner_func=inner_func).to_records()
@@ -0,0 +1,342 @@
+import numpy as np
+import pandas as pd
+from Utility.MemoryUsage import MemoryUsage as mu
+from Utility.Logger import Logger
+from .zone_detection import ZoneDetector
+from .zone_table import ZoneTable
+
+class CandleHistory(ZoneDetector):
+    """
+    High, low, volume and timestamp arrays of an incremental detector's frame,
+    appended in place (capacity doubles, so O(1) amortised per candle), with the
+    running high/low extremes. ZoneDetector's liquidity helpers run on them.
+    """
+    COLUMNS = {'highs': 'high', 'lows': 'low', 'volumes': 'volume', 'timestamps': 'timestamp'}
+
+    def __init__(self, df, timeframe="1h"):
+        self.timeframe = timeframe
+        self.length = 0
+        self.buffers = {name: df[column].to_numpy()[:0].copy() for name, column in self.COLUMNS.items()}
+        self.high_max = self.low_min = None
+        self.append(df)
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def highs(self):
+        return self.buffers['highs'][:self.length]
+
+    @property
+    def lows(self):
+        return self.buffers['lows'][:self.length]
+
+    @property
+    def volumes(self):
+        return self.buffers['volumes'][:self.length]
+
+    @property
+    def timestamps(self):
+        return self.buffers['timestamps'][:self.length]
+
+    def append(self, df):
+        if df.empty:
+            return
+        needed = self.length + len(df)
+        for name, column in self.COLUMNS.items():
+            buffer = self.buffers[name]
+            if needed > len(buffer):
+                grown = np.empty(max(needed, 2 * len(buffer)), dtype=buffer.dtype)
+                grown[:self.length] = buffer[:self.length]
+                self.buffers[name] = buffer = grown
+            buffer[self.length:needed] = df[column].to_numpy()
+        new_highs, new_lows = self.buffers['highs'][self.length:needed], self.buffers['lows'][self.length:needed]
+        self.high_max = new_highs.max() if self.high_max is None else np.max([self.high_max, new_highs.max()])
+        self.low_min = new_lows.min() if self.low_min is None else np.min([self.low_min, new_lows.min()])
+        self.length = needed
+
+
+class IncrementalZoneDetector:
+    """
+    ZoneDetector that keeps its state between closed candles.
+
+    update() appends the new candles and only redoes the work they can change:
+        - FVG / OB centres that just got their confirming candles are detected on a
+          short tail of the frame
+        - open FVG / OB zones are searched for a touch on the new candles only
+        - swings are re-detected within `WINDOW` candles of the old end, the only
+          ones whose window grew
+        - liquidity groups are re-clustered from the swing list and only new or
+          still unswept groups are searched for their sweep
+
+    The candles the searches read are kept in a CandleHistory and only a short tail
+    of the frame is run through ZoneDetector, so an update costs O(k) for k new
+    candles plus the swing re-clustering. The full frame (`df`) is concatenated
+    lazily when it is read.
+
+    Each update returns a delta of new, touched, swept and removed zones. Every
+    `check_every` updates the state is compared with a full ZoneDetector recompute
+    and rebuilt from it on mismatch (`drifted` is then set until the next update);
+    with max_candles the frame is also trimmed there.
+    """
+    WINDOW = 20
+    RANGE_PCT = 0.01
+    # candles kept before the new ones for the swing window and the 5-candle features
+    TAIL = 2 * WINDOW + 5
+
+    def __init__(self, df, timeframe="1h", threshold=300, check_every=24, max_candles=None):
+        self.timeframe = timeframe
+        self.threshold = threshold
+        self.check_every = check_every
+        self.max_candles = max_candles
+        self.updates = 0
+        self.drifted = False
+        self.logger = Logger()
+        self.rebuild(df)
+
+    def __len__(self):
+        return len(self.history)
+
+    @property
+    def df(self):
+        """
+        The detector's candles, the appended ones concatenated on first read
+        """
+        if self.pending:
+            self._df = pd.concat([self._df] + self.pending)
+            self.pending = []
+        return self._df
+
+    def schema(self):
+        """
+        The frame's columns and dtypes as an empty frame
+        """
+        return self._df.iloc[:0]
+
+    def last_timestamp(self):
+        return pd.Timestamp(self.history.timestamps[-1]) if len(self.history) else None
+
+    # ------------------------------------------------------------------
+    # state
+    # ------------------------------------------------------------------
+    def rebuild(self, df):
+        """
+        Reset the state from a full detection over df
+        """
+        if self.max_candles is not None:
+            df = df.iloc[-self.max_candles:]
+        self._df = df
+        self.pending = []
+        self.recent = df.iloc[-self.TAIL:]
+        self.history = CandleHistory(df, self.timeframe)
+        detector = ZoneDetector(df, self.timeframe)
+        self.fvg = self.core_state(detector.detect_fvg_columns(threshold=self.threshold))
+        self.ob = self.core_state(detector.detect_order_block_columns(threshold=self.threshold))
+        detector.detect_swings(window=self.WINDOW)
+        self.swings = detector.swings
+        self.pip_range = None
+        self.liq_state = {}
+        self.liq = []
+        self.update_liquidity(0, None)
+
+    @staticmethod
+    def core_state(columns, offset=0):
+        """
+        Records of FVG / OB detector columns with the arrays needed to search their touches
+        """
+        touch_index = columns['touch_index']
+        columns['touch_index'] = np.where(touch_index >= 0, touch_index + offset, -1)
+        bullish = np.array([t.startswith('Bullish') for t in columns['zone_type']], dtype=bool)
+        return {
+            'records': ZoneDetector.columns_table(columns).to_records(),
+            'bullish': bullish,
+            'level': np.where(bullish, columns['zone_high'], columns['zone_low']),
+            'open': np.flatnonzero(touch_index < 0),
+        }
+
+    def get_zone_table(self):
+        """
+        Current zones as one ZoneTable, laid out like ZoneDetector.get_zone_table
+        """
+        return ZoneTable.concat([
+            ZoneTable.from_records(self.fvg['records']),
+            ZoneTable.from_records(self.ob['records']),
+            ZoneTable.from_records(self.liq),
+        ])
+
+    def get_zones(self):
+        return self.get_zone_table().to_records()
+
+    def positions(self, zones):
+        """
+        Positions in get_zone_table() of the given zones, matched by zone_type and timestamp
+        """
+        keys = {(z['zone_type'], z['timestamp']) for z in zones}
+        records = self.fvg['records'] + self.ob['records'] + self.liq
+        return np.array([k for k, z in enumerate(records) if (z['zone_type'], z['timestamp']) in keys], dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # update
+    # ------------------------------------------------------------------
+    @mu.log_memory
+    def update(self, candles):
+        """
+        Append newly closed candles (rows after the last known timestamp) and update the zones.
+
+        Returns:
+            dict of zone lists: 'new', 'touched' (FVG/OB), 'swept' and 'removed' (liquidity).
+        """
+        delta = {'new': [], 'touched': [], 'swept': [], 'removed': []}
+        self.drifted = False
+        if len(self.history):
+            candles = candles[candles['timestamp'] > self.last_timestamp()]
+        if candles.empty:
+            return delta
+
+        first_new = len(self.history)
+        candles = candles[self._df.columns]
+        self.pending.append(candles)
+        self.history.append(candles)
+        # enough history before the new candles for the swing window and the 5-candle features
+        offset = max(0, first_new - self.TAIL)
+        frame = pd.concat([self.recent, candles])
+        self.recent = frame.iloc[-self.TAIL:]
+        tail = ZoneDetector(frame, self.timeframe)
+
+        self.update_core(self.fvg, tail, tail.detect_fvg_columns(threshold=self.threshold), offset, first_new - 1, first_new, delta)
+        self.update_core(self.ob, tail, tail.detect_order_block_columns(threshold=self.threshold), offset, first_new - 2, first_new, delta)
+        self.update_swings(tail, offset, first_new)
+        self.update_liquidity(first_new, delta)
+
+        self.updates += 1
+        if self.check_every and self.updates % self.check_every == 0:
+            self.drifted = not self.check()
+        return {key: [dict(z) for z in zones] for key, zones in delta.items()}
+
+    def update_core(self, state, tail, columns, offset, first_center, first_new, delta):
+        """
+        Touch the open zones on the new candles and add zones centred at or after first_center
+        """
+        open_ = state['open']
+        if len(open_):
+            # open zones were not touched before first_new, so only the new candles can touch them
+            starts = np.full(len(open_), first_new - offset)
+            levels = state['level'][open_]
+            touch = np.where(
+                state['bullish'][open_],
+                tail.touches.first_cross_down(starts, levels),
+                tail.touches.first_cross_up(starts, levels)
+            )
+            for k, t in zip(open_[touch >= 0].tolist(), touch[touch >= 0].tolist()):
+                record = state['records'][k]
+                record['touch_index'] = offset + t
+                record['touch_time'] = self.history.timestamps[offset + t]
+                delta['touched'].append(record)
+            state['open'] = open_[touch < 0]
+
+        found = columns['index'] + offset >= first_center
+        added = self.core_state({key: value[found] if isinstance(value, np.ndarray) else value for key, value in columns.items()}, offset)
+        start = len(state['records'])
+        state['records'] += added['records']
+        state['bullish'] = np.concatenate([state['bullish'], added['bullish']])
+        state['level'] = np.concatenate([state['level'], added['level']])
+        state['open'] = np.concatenate([state['open'], added['open'] + start])
+        delta['new'] += added['records']
+
+    def update_swings(self, tail, offset, first_new):
+        """
+        Replace the swings whose window reaches the new candles with the tail's
+        """
+        settled = first_new - self.WINDOW
+        tail.detect_swings(window=self.WINDOW)
+        swings = [s for s in self.swings if s['index'] < settled]
+        for swing in tail.swings:
+            if swing['index'] + offset >= settled:
+                swing['index'] += offset
+                swings.append(swing)
+        self.swings = swings
+
+    def first_reach(self, direction, level, start):
+        """
+        First candle at or after start whose high (Sell-Side) or low (Buy-Side) reaches level
+        """
+        if direction == 'Sell-Side':
+            hits = self.history.highs[start:] >= level
+        else:
+            hits = self.history.lows[start:] <= level
+        k = int(hits.argmax()) if len(hits) else 0
+        return start + k if len(hits) and hits[k] else -1
+
+    def update_liquidity(self, first_new, delta):
+        """
+        Re-cluster the swings into liquidity zones, reusing the sweeps already found.
+
+        A group keeps its record while its members and the pip range stay the same;
+        an unswept group is only searched again from the first new candle.
+        """
+        detector = self.history
+        pip_range = (detector.high_max - detector.low_min) * self.RANGE_PCT if len(detector) else 0
+        known = self.liq_state if pip_range == self.pip_range else {}
+        state, records = {}, []
+        for direction, kind in (('Buy-Side', 'Swing Low'), ('Sell-Side', 'Swing High')):
+            candidates = [s for s in self.swings if s['Type'] == kind]
+            for group in detector.cluster_swings_sorted(candidates, pip_range, inner_func=True):
+                key = (direction, tuple(g['index'] for g in group))
+                swept_index, record = known.get(key, (-1, None))
+                if record is None or swept_index < 0:
+                    start = group[-1]['index'] + 1
+                    if record is not None:
+                        start = max(start, first_new)
+                    level = group[0]['Price'] + pip_range if direction == 'Sell-Side' else group[0]['Price'] - pip_range
+                    swept_index = self.first_reach(direction, level, start)
+                    if record is None or swept_index >= 0:
+                        swept = record is not None
+                        record = detector.liquidity_zone(group, direction, pip_range, swept_index)
+                        if delta is not None:
+                            delta['swept' if swept else 'new'].append(record)
+                state[key] = (swept_index, record)
+                records.append(record)
+
+        if delta is not None:
+            delta['removed'] += [record for key, (_, record) in self.liq_state.items() if key not in state or key not in known]
+        self.pip_range = pip_range
+        self.liq_state = state
+        self.liq = records
+
+    # ------------------------------------------------------------------
+    # consistency check
+    # ------------------------------------------------------------------
+    @staticmethod
+    def same_zone(a, b):
+        if a.keys() != b.keys():
+            return False
+        for key, value in a.items():
+            other = b[key]
+            if value is None or other is None:
+                if value is not other:
+                    return False
+            elif isinstance(value, (float, np.floating)):
+                # rolling features of new zones come from the tail, so allow float round-off
+                if not np.isclose(value, other, rtol=1e-5, equal_nan=True):
+                    return False
+            elif value != other:
+                return False
+        return True
+
+    @mu.log_memory
+    def check(self):
+        """
+        Compare the state with a full recompute and rebuild from it on mismatch.
+        Frames longer than max_candles are trimmed and rebuilt here as well.
+
+        Returns:
+            True when the incremental state matched the full recompute.
+        """
+        expected = ZoneDetector(self.df, self.timeframe).get_zones(threshold=self.threshold, inner_func=True)
+        actual = self.get_zones()
+        consistent = len(expected) == len(actual) and all(self.same_zone(a, b) for a, b in zip(actual, expected))
+        if not consistent:
+            self.logger.warning(f"{self.__class__}: incremental zones drifted from the full recompute ({len(actual)} vs {len(expected)} zones), rebuilding")
+        if not consistent or (self.max_candles is not None and len(self.df) > self.max_candles):
+            self.rebuild(self.df)
+        return consistent
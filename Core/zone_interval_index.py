@@ -0,0 +1,57 @@
+import numpy as np
+
+class ZoneIntervalIndex:
+    """
+    Price interval index over zones with an availability time.
+
+    Zones are sorted by zone_low. A query for zones overlapping [low, high] only
+    has to look at zones whose zone_low lies in [low - max_width, high], found
+    with two binary searches, then filters on zone_high and availability time.
+
+    A zone is available at time t while it is untouched or its touch/swept time
+    is later than t.
+    """
+    NEVER = np.iinfo(np.int64).max
+
+    def __init__(self, zone_low, zone_high, available_until, untouched):
+        zone_low = np.asarray(zone_low)
+        zone_high = np.asarray(zone_high)
+        until = np.asarray(available_until).astype('datetime64[ns]').astype(np.int64)
+        until = np.where(untouched, self.NEVER, until)
+
+        self.order = np.argsort(zone_low, kind='stable')
+        self.lows = zone_low[self.order]
+        self.highs = zone_high[self.order]
+        self.until = until[self.order]
+        width = (zone_high.astype(np.float64) - zone_low) if len(zone_low) else np.zeros(1)
+        self.max_width = max(float(np.max(width)), 0.0)
+
+    def __len__(self):
+        return len(self.order)
+
+    @staticmethod
+    def to_time(value):
+        """
+        int64 nanoseconds for a datetime-like value
+        """
+        return np.datetime64(value, 'ns').astype(np.int64)
+
+    def window(self, low, high):
+        """
+        Slice of the sorted arrays that can overlap [low, high]
+        """
+        floor = np.nextafter(float(low) - self.max_width, -np.inf)
+        start = np.searchsorted(self.lows, floor, side='left')
+        end = np.searchsorted(self.lows, high, side='right')
+        return start, end
+
+    def query(self, low, high, time=None):
+        """
+        Positions (in construction order, ascending) of zones overlapping [low, high]
+        that are still available at time (every zone when time is None).
+        """
+        start, end = self.window(low, high)
+        hits = self.highs[start:end] >= low
+        if time is not None:
+            hits &= self.until[start:end] > self.to_time(time)
+        return np.sort(self.order[start:end][hits])
@@ -0,0 +1,45 @@
+from bisect import bisect_left
+
+class ZoneLevelIndex:
+    """
+    Zones sorted by zone_low and by zone_high for single-candle touch queries.
+
+    A candle touches a zone when zone_low lies in (open, high] or zone_high lies in
+    [low, open). Both are contiguous ranges of the sorted levels, found with two
+    binary searches each, so a query costs O(log n + k) for k touched zones.
+
+    Levels are compared as stored on the zones, with the same comparisons the
+    linear scan made.
+    """
+    def __init__(self, zones):
+        self.zones = zones
+        self.lows = [z.get('zone_low') for z in zones]
+        self.highs = [z.get('zone_high') for z in zones]
+        # zones without a usable level can never satisfy the comparisons
+        self.by_low = sorted((k for k, v in enumerate(self.lows) if v is not None and v == v), key=lambda k: self.lows[k])
+        self.by_high = sorted((k for k, v in enumerate(self.highs) if v is not None and v == v), key=lambda k: self.highs[k])
+
+    def __len__(self):
+        return len(self.zones)
+
+    @staticmethod
+    def first_true(order, predicate):
+        """
+        First j in order where predicate(j) holds, for a predicate that is False then True
+        """
+        return bisect_left(range(len(order)), True, key=predicate)
+
+    def touched(self, open_, high, low):
+        """
+        Positions (ascending) of the zones touched by a candle
+        """
+        lows, by_low = self.lows, self.by_low
+        start = self.first_true(by_low, lambda j: lows[by_low[j]] > open_)
+        end = self.first_true(by_low, lambda j: not (lows[by_low[j]] <= high))
+        hits = set(by_low[start:max(start, end)])
+
+        highs, by_high = self.highs, self.by_high
+        start = self.first_true(by_high, lambda j: highs[by_high[j]] >= low)
+        end = self.first_true(by_high, lambda j: not (highs[by_high[j]] < open_))
+        hits.update(by_high[start:max(start, end)])
+        return sorted(hits)
@@ -1,87 +1,230 @@
-
-import numpy as np
-from Data.timeFrames import timeFrame
-from .zone_reactions import ZoneReactor
-from Data.indexCalculate import IndexCalculator
-
-class ZoneMerger:
-    def __init__(self,candles, zones, threshold=0.002):
-        self.zones = zones
-        self.threshold = threshold
-        self.reactor = ZoneReactor(candles)
-        self.indexcalculator = IndexCalculator(self.zones)
-        self.zones  = self.indexcalculator.calculate()
-        self.seperate()
-
-    def seperate(self):
-        self.liq_zones = [z for z in self.zones if  z['type'] in ['Buy-Side Liq','Sell-Side Liq']]
-        self.core_zones = [z for z in self.zones if z['type'] not in ['Buy-Side Liq','Sell-Side Liq']]
-        
-    
-    def merge(self):
-        merged = []
-        core_zones = self.core_zones
-        liq_zones = self.liq_zones
-
-        for i, zone in enumerate(core_zones):
-            group = [zone]
-            z_high = zone['zone_high'] 
-            z_low = zone['zone_low'] 
-            z_index = zone['index']
-            matched = False
-
-            # Filter once instead of combining inside loop
-            
-            available_liq = [
-                z for z in liq_zones 
-                if z['index'] < z_index and (z['swept_index'] is None or z['swept_index'] > z_index)
-            ]
-            
-            available_merged = [ z for z in merged if z['touch_index'] is None or (not z['touch_index'] is None and z['touch_index'] < z_index)]
-            for other in available_liq:
-                other_high = other['zone_high'] 
-                other_low = other['zone_low'] 
-
-                # Check overlap using simple range logic
-                if not (z_high < other_low or z_low > other_high):
-                    group.append(other)
-                    z_high = max(z_high, other_high)
-                    z_low = min(z_low, other_low)
-
-            # Use generator expressions for memory efficiency
-            for merged_zone in available_merged:
-                m_high = merged_zone['zone_high'] 
-                m_low = merged_zone['zone_low'] 
-
-                # Check for overlap
-                if not (z_high < m_low or z_low > m_high):
-                    # Merge zone into existing merged zone
-                    merged_zone['zone_high'] = max(merged_zone['zone_high'], zone['zone_high'])
-                    merged_zone['zone_low'] = min(merged_zone['zone_low'], zone['zone_low'])
-                    merged_zone['zone_width'] = merged_zone['zone_high'] - merged_zone['zone_low']
-                    merged_zone['types'].append(zone['type'])
-                    merged_zone['timeframes'].append(zone['time_frame'])
-                    merged_zone['count'] += 1
-                    merged_zone['end_index'] = z_index  # optional
-                    merged_zone['built_by'].append(zone)
-                    matched = True
-                    break
-            if not matched:  
-                z = {
-                    'zone_high': max(z['zone_high'] for z in group),
-                    'zone_low': min(z['zone_low'] for z in group),
-                    'zone_width': max(z['zone_high'] for z in group) - min(z['zone_low'] for z in group),
-                    'types': [z['type'] for z in group],
-                    'timeframes': [z['time_frame'] for z in group],
-                    'count': len(group),
-                    'zone_index' : z_index,
-                    'end_index' : z_index,
-                    'built_by' : [zone for zone in group],
-                }  
-                z = self.reactor.get_zone_reaction(z)
-                merged.append(z)
-
-        return merged
-   
-    
-
+
+import heapq
+import numpy as np
+import pandas as pd
+from bisect import bisect_left, bisect_right, insort
+from Data.timeFrames import timeFrame
+from .zone_reactions import ZoneReactor
+from Data.indexCalculate import IndexCalculator
+
+class ZoneMerger:
+    LIQ_TYPES = ['Buy-Side Liq','Sell-Side Liq']
+
+    def __init__(self,candles, zones, threshold=0.002):
+        self.zones = zones
+        self.threshold = threshold
+        self.candles = candles
+        self.reactor = ZoneReactor()
+        self.indexcalculator = IndexCalculator(self.zones)
+        self.zones  = self.indexcalculator.calculate()
+        self.seperate()
+
+    def seperate(self):
+        self.liq_zones = [z for z in self.zones if  z['zone_type'] in self.LIQ_TYPES]
+        self.core_zones = [z for z in self.zones if z['zone_type'] not in self.LIQ_TYPES]
+
+    @staticmethod
+    def to_time(value):
+        return None if value is None else pd.Timestamp(value).value
+
+    def touched_time(self,merged_zone):
+        """
+        Time of the candle that touched a merged zone, None while untouched
+        """
+        touch_candle = merged_zone.get('touch_candle')
+        return None if touch_candle is None else self.to_time(touch_candle['timestamp'])
+
+    def new_merged_zone(self,zone,group):
+        z = {
+            'zone_high': max(z['zone_high'] for z in group),
+            'zone_low': min(z['zone_low'] for z in group),
+            'zone_width': max(z['zone_high'] for z in group) - min(z['zone_low'] for z in group),
+            'types': [z['zone_type'] for z in group],
+            'timeframes': [z['time_frame'] for z in group],
+            'count': len(group),
+            'zone_index' : zone.get('index'),
+            'end_index' : zone.get('index'),
+            'built_by' : [zone for zone in group],
+            'timestamp' : zone['timestamp'],
+        }  
+        return self.reactor.get_zone_reaction(z,self.candles)
+
+    def add_to_merged_zone(self,merged_zone,zone):
+        # Merge zone into existing merged zone
+        merged_zone['zone_high'] = max(merged_zone['zone_high'], zone['zone_high'])
+        merged_zone['zone_low'] = min(merged_zone['zone_low'], zone['zone_low'])
+        merged_zone['zone_width'] = merged_zone['zone_high'] - merged_zone['zone_low']
+        merged_zone['types'].append(zone['zone_type'])
+        merged_zone['timeframes'].append(zone['time_frame'])
+        merged_zone['count'] += 1
+        merged_zone['end_index'] = zone.get('index')  # optional
+        merged_zone['built_by'].append(zone)
+
+    def merged_available(self,merged_zone,z_time):
+        """
+        A merged zone takes new zones while untouched or once its touch lies before them
+        """
+        touched = self.touched_time(merged_zone)
+        return touched is None or touched < z_time
+
+    def merge(self,method='greedy'):
+        """
+        Merge core zones with the liquidity zones and earlier merged zones they overlap.
+
+        A liquidity zone is available to a core zone created after it and not swept
+        before it; a merged zone is available while untouched or touched before the
+        core zone. 'greedy' walks the zones pairwise in list order, 'sweep' processes
+        core zones in time order over sorted price indexes (see merge_sweep).
+        """
+        if method == 'sweep':
+            return self.merge_sweep()
+        merged = []
+        core_zones = self.core_zones
+        liq_zones = self.liq_zones
+
+        for i, zone in enumerate(core_zones):
+            group = [zone]
+            z_high = zone['zone_high'] 
+            z_low = zone['zone_low'] 
+            z_time = self.to_time(zone['timestamp'])
+            matched = False
+
+            # Filter once instead of combining inside loop
+            
+            available_liq = [
+                z for z in liq_zones 
+                if self.to_time(z['timestamp']) < z_time and (z.get('swept_time') is None or self.to_time(z['swept_time']) > z_time)
+            ]
+            
+            available_merged = [ z for z in merged if self.merged_available(z,z_time)]
+            for other in available_liq:
+                other_high = other['zone_high'] 
+                other_low = other['zone_low'] 
+
+                # Check overlap using simple range logic
+                if not (z_high < other_low or z_low > other_high):
+                    group.append(other)
+                    z_high = max(z_high, other_high)
+                    z_low = min(z_low, other_low)
+
+            # Use generator expressions for memory efficiency
+            for merged_zone in available_merged:
+                m_high = merged_zone['zone_high'] 
+                m_low = merged_zone['zone_low'] 
+
+                # Check for overlap
+                if not (z_high < m_low or z_low > m_high):
+                    self.add_to_merged_zone(merged_zone,zone)
+                    matched = True
+                    break
+            if not matched:  
+                merged.append(self.new_merged_zone(zone,group))
+
+        return merged
+
+    def liquidity_events(self):
+        """
+        Time-ordered queue of liquidity availability changes: a zone opens at its
+        timestamp and closes at its swept time. Closes sort before opens at the same time.
+        """
+        events = []
+        for k, z in enumerate(self.liq_zones):
+            events.append((self.to_time(z['timestamp']), 1, k))
+            if z.get('swept_time') is not None:
+                events.append((self.to_time(z['swept_time']), 0, k))
+        heapq.heapify(events)
+        return events
+
+    @staticmethod
+    def window(by_low,z_low,z_high,max_width):
+        """
+        Positions in a (zone_low, k) list sorted by zone_low of the entries that can
+        overlap [z_low, z_high]: no zone wider than max_width starts below z_low - max_width
+        """
+        floor = np.nextafter(float(z_low) - max_width, -np.inf)
+        start = bisect_left(by_low, floor, key=lambda entry: entry[0])
+        end = bisect_right(by_low, z_high, key=lambda entry: entry[0])
+        return range(start, end)
+
+    def overlap_group(self,active,z_low,z_high,max_width):
+        """
+        Available liquidity zones overlapping [z_low, z_high], widening the range
+        until no available zone sticks out of it. Returns (positions, z_low, z_high).
+        """
+        liq_zones = self.liq_zones
+        while True:
+            group = [active[j][1] for j in self.window(active, z_low, z_high, max_width) if liq_zones[active[j][1]]['zone_high'] >= z_low]
+            new_low = min([z_low] + [liq_zones[k]['zone_low'] for k in group])
+            new_high = max([z_high] + [liq_zones[k]['zone_high'] for k in group])
+            if new_low == z_low and new_high == z_high:
+                return sorted(group), z_low, z_high
+            z_low, z_high = new_low, new_high
+
+    def merge_sweep(self):
+        """
+        Sort-and-sweep merge.
+
+        Core zones are processed in time order while a heap of liquidity events
+        keeps the available liquidity zones in a list sorted by zone_low, updated by
+        bisection as zones open and close. Each core zone takes the whole overlap
+        group of available liquidity zones around it (widened until closed), where
+        the greedy pass grows its group in list order and can miss a zone that only
+        overlaps once the group has widened. Merged zones are kept sorted by zone_low
+        the same way, so the earliest available merged zone overlapping the group is
+        found from a price window instead of a scan over every merged zone.
+
+        Complexity: the price windows start max_width (the widest merged zone so far,
+        or the widest liquidity zone) below the group, so each lookup costs
+        O(log n + w) for the w zones starting in that window. Zones of similar width
+        keep w small. One zone much wider than the rest widens every later window,
+        and the worst case is O(n^2) like the greedy pass.
+        """
+        liq_zones = self.liq_zones
+        events = self.liquidity_events()
+        active, closed = [], set()
+        liq_width = max((float(z['zone_high']) - float(z['zone_low']) for z in liq_zones), default=0.0)
+
+        merged = []
+        merged_by_low = []
+        max_width = 0.0
+
+        order = sorted(range(len(self.core_zones)), key=lambda k: self.to_time(self.core_zones[k]['timestamp']))
+        for zone in (self.core_zones[k] for k in order):
+            z_time = self.to_time(zone['timestamp'])
+            # closes apply from their time on, opens only after it
+            while events and (events[0][0] < z_time or (events[0][0] == z_time and events[0][1] == 0)):
+                _, kind, k = heapq.heappop(events)
+                entry = (liq_zones[k]['zone_low'], k)
+                if kind == 0:
+                    closed.add(k)
+                    j = bisect_left(active, entry)
+                    if j < len(active) and active[j] == entry:
+                        del active[j]
+                elif k not in closed:
+                    insort(active, entry)
+
+            members, z_low, z_high = self.overlap_group(active, zone['zone_low'], zone['zone_high'], liq_width)
+            group = [zone] + [liq_zones[k] for k in members]
+
+            # earliest available merged zone overlapping [z_low, z_high]
+            target = None
+            for j in self.window(merged_by_low, z_low, z_high, max_width):
+                m = merged_by_low[j][1]
+                merged_zone = merged[m]
+                if merged_zone['zone_high'] >= z_low and self.merged_available(merged_zone, z_time) and (target is None or m < target):
+                    target = m
+
+            if target is None:
+                merged_zone = self.new_merged_zone(zone, group)
+                merged.append(merged_zone)
+                target = len(merged) - 1
+            else:
+                merged_zone = merged[target]
+                merged_by_low.pop(bisect_left(merged_by_low, (merged_zone['zone_low'], target)))
+                self.add_to_merged_zone(merged_zone, zone)
+            insort(merged_by_low, (merged_zone['zone_low'], target))
+            max_width = max(max_width, float(merged_zone['zone_high']) - float(merged_zone['zone_low']))
+
+        return merged
+   
+    
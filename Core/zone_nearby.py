@@ -2,46 +2,104 @@ import pandas as pd
 import numpy as np
 from tqdm import tqdm
 from Utility.MemoryUsage import MemoryUsage as mu
+from .zone_price_index import NearestZoneIndex
 class NearbyZones():
-    def __init__(self,based_zones=[],candles=[],threshold = 300):
+    def __init__(self,based_zones=[],candles=[],threshold = 300,availability=None):
         self.based_zones = based_zones
         self.threshold = threshold
         self.candles = candles
+        # AvailabilityIndex built by ConfluentsFinder over the same zone list
+        self.availability = availability
+
+    def nearest_index(self,zones):
+        """
+        NearestZoneIndex over zones, reused while the zones' prices are unchanged
+        """
+        key = [(z.get('timestamp'),z.get('zone_low'),z.get('zone_high')) for z in zones]
+        index = getattr(self,'_nearest',None)
+        if index is None or self._nearest_key != key:
+            index = self._nearest = NearestZoneIndex(zones)
+            self._nearest_key = key
+        index.zones = zones
+        return index
+
+    def available_nearest(self):
+        """
+        compute_nearest results of the zones with available liquidity zones, by position.
+        Zones are visited by reference time and each liquidity zone leaves the index
+        once it is swept, so every search only sees the zones available to it.
+        """
+        availability = self.availability
+        index = NearestZoneIndex(availability.zones)
+        order = np.flatnonzero(availability.has_ref[:len(self.based_zones)])
+        order = order[np.argsort(availability.ref_time[order],kind='stable')]
+        removed = 0
+        results = {}
+        for i in order.tolist():
+            # swept at or before the reference time: no longer available
+            end = int(np.searchsorted(availability.swept_times,availability.ref_time[i],side='right'))
+            for k in availability.swept_order[removed:end].tolist():
+                index.remove(k)
+            removed = max(removed,end)
+            if availability.count(i):
+                zone = self.based_zones[i]
+                results[i] = self.compute_nearest(zone,index,self.getATHzone(zone.get('timestamp')))
+        return results
+
+    def scan_nearest(self,zone,zones,ATH):
+        this_high = zone.get('zone_high')
+        this_low = zone.get('zone_low')
+        min_dist_below = float('inf')
+        nearest_above_zone = ATH
+        min_dist_above = nearest_above_zone['zone_low'] - this_high
+        nearest_below_zone = None
+
+        for other in zones:
+            other_high = other.get('zone_high')
+            other_low = other.get('zone_low')
+            if other_low > this_high:
+                dist = other_low - this_high
+                if dist < min_dist_above and dist >= self.threshold:
+                    min_dist_above = dist
+                    nearest_above_zone = other.copy()
+            elif other_high < this_low:
+                dist = this_low - other_high
+                if dist < min_dist_below and dist>=self.threshold:
+                    min_dist_below = dist
+                    nearest_below_zone = other.copy()
+
+        return min_dist_above, nearest_above_zone, min_dist_below, nearest_below_zone
+
+    def compute_nearest(self,zone,index,ATH,skip=None):
+        """
+        Nearest zone at least threshold above zone_high (ATH when none is closer) and
+        below zone_low, found by binary search; only the winners are copied.
+        """
+        if index.inverted:
+            zones = [z for k,z in enumerate(index.zones) if index.alive[k] and (skip is None or not skip(k))]
+            return self.scan_nearest(zone,zones,ATH)
+        this_high = zone.get('zone_high')
+        this_low = zone.get('zone_low')
+        min_dist_above, above = index.nearest_above(this_high,self.threshold,ATH['zone_low'] - this_high,skip)
+        min_dist_below, below = index.nearest_below(this_low,self.threshold,float('inf'),skip)
+        nearest_above_zone = ATH if above is None else index.zones[above].copy()
+        nearest_below_zone = None if below is None else index.zones[below].copy()
+        return min_dist_above, nearest_above_zone, min_dist_below, nearest_below_zone
     
     @mu.log_memory
     def getNearbyZone(self,inner_func = False):
         results = []
+        available = self.available_nearest() if self.availability is not None else None
 
         for i, zone in tqdm(enumerate(self.based_zones),desc="Adding Nearby Zones",dynamic_ncols=True,disable=inner_func):
-            this_high = zone.get('zone_high')
-            this_low = zone.get('zone_low')
-            valid_zones = zone.get('available_core',[])+zone.get('available_liquidity',[])
             base_data = {k:v for k,v in zone.items() if k not in ['available_core','available_liquidity']}
             zone_id = zone.get('timestamp')
-            def compute_nearest(valid_zones):
-                
-                min_dist_below = float('inf')
-                nearest_above_zone = self.getATHzone(zone_id)
-                min_dist_above = nearest_above_zone['zone_low'] - this_high
-                nearest_below_zone = None
-
-                for other in valid_zones:
-                    
-                    other_high = other.get('zone_high')
-                    other_low = other.get('zone_low')
-                    if other_low > this_high:
-                        dist = other_low - this_high
-                        if dist < min_dist_above and dist >= self.threshold:
-                            min_dist_above = dist
-                            nearest_above_zone = other.copy()
-                    elif other_high < this_low:
-                        dist = this_low - other_high
-                        if dist < min_dist_below and dist>=self.threshold:
-                            min_dist_below = dist
-                            nearest_below_zone = other.copy()
-
-                return min_dist_above, nearest_above_zone, min_dist_below, nearest_below_zone
-            if valid_zones == []:
+            if available is not None:
+                nearest = available.get(i)
+            else:
+                valid_zones = zone.get('available_core',[])+zone.get('available_liquidity',[])
+                nearest = self.compute_nearest(zone,NearestZoneIndex(valid_zones),self.getATHzone(zone_id)) if valid_zones else None
+            if nearest is None:
                 
                 base_data['distance_to_nearest_zone_above'] = None
                 base_data['distance_to_nearest_zone_below'] = None
@@ -50,7 +108,7 @@ class NearbyZones():
             else:
 
                 # Handle liquidity zones with multiple touches
-                min_above, above_zone, min_below, below_zone = compute_nearest(valid_zones)
+                min_above, above_zone, min_below, below_zone = nearest
                 temp_above,temp_below = {},{}
                 base_data['distance_to_nearest_zone_above'] = min_above
                 if above_zone is not None:
@@ -63,20 +121,41 @@ class NearbyZones():
 
         return results
     
-    def getATHzone(self,zone_id):
-        data = self.candles.loc[self.candles['timestamp'] <= zone_id]
-        # Find ATH index (timestamp) and integer position
-        ath_idx = data['high'].idxmax()
-        index = data.index.get_loc(ath_idx)  # integer position
-        ATH_zone = data.iloc[index]
-
-        # Rolling stats
-        close_rolling = data['close'].rolling(window=5)
-        volume_rolling = data['volume'].rolling(window=5)
+    def ath_index(self):
+        """
+        Running ATH over the candles, built once per candle set: position of the
+        first candle holding the highest high so far, plus the 5-candle rolling
+        features (causal, so equal to recomputing them on any prefix).
+        """
+        if getattr(self,'_ath_candles',None) is self.candles:
+            return self._ath
+        candles = self.candles
+        highs = candles['high'].to_numpy(dtype=np.float64)
+        highs = np.where(np.isnan(highs), -np.inf, highs)
+        running = np.maximum.accumulate(highs) if len(highs) else highs
+        new_high = highs > np.r_[-np.inf, running[:-1]]
+        argmax = np.maximum.accumulate(np.where(new_high, np.arange(len(highs)), 0)) if len(highs) else np.array([], dtype=np.int64)
+
+        close_rolling = candles['close'].rolling(window=5)
+        volume_rolling = candles['volume'].rolling(window=5)
+        self._ath = {
+            'timestamps': candles['timestamp'].to_numpy(),
+            'argmax': argmax,
+            'avg_volume_past_5': volume_rolling.mean().values,
+            'prev_volatility_5': close_rolling.std().values,
+            'momentum_5': candles['close'] - candles['close'].shift(5),
+        }
+        self._ath_candles = candles
+        return self._ath
 
-        avg_volume_past_5 = volume_rolling.mean().values
-        prev_volatility_5 = close_rolling.std().values
-        momentum_5 = data['close'] - data['close'].shift(5)
+    def getATHzone(self,zone_id):
+        ath_index = self.ath_index()
+        # candles up to zone_id are a prefix of the frame
+        count = np.searchsorted(ath_index['timestamps'], np.datetime64(pd.Timestamp(zone_id)), side='right')
+        if count == 0:
+            raise ValueError("attempt to get argmax of an empty sequence")
+        index = int(ath_index['argmax'][count - 1])
+        ATH_zone = self.candles.iloc[index]
 
         # Build ATH zone dict
         ath = {
@@ -90,9 +169,9 @@ class NearbyZones():
             'rsi': ATH_zone['rsi'],
             'atr': ATH_zone['atr'],
             'volume_on_creation': ATH_zone['volume'],
-            'avg_volume_past_5': avg_volume_past_5[index],
-            'prev_volatility_5': prev_volatility_5[index],
-            'momentum_5': momentum_5.iloc[index],
+            'avg_volume_past_5': ath_index['avg_volume_past_5'][index],
+            'prev_volatility_5': ath_index['prev_volatility_5'][index],
+            'momentum_5': ath_index['momentum_5'].iloc[index],
             'zone_type': 'ATH',
             'index': index,
             'timestamp' : ATH_zone['timestamp']
@@ -101,29 +180,9 @@ class NearbyZones():
         return ath
     
     def getAboveBelowZones(self,zone,zones,ATH):
-        this_high = zone.get('zone_high',None)
-        this_low = zone.get('zone_low',None)
-        min_dist_below = float('inf')
-        nearest_above_zone = ATH
-        min_dist_above =  nearest_above_zone['zone_low'] - this_high
-        nearest_below_zone = None
-
-        for other in zones:
-            if other['timestamp'] == zone['timestamp']:
-                continue
-            
-            other_high = other.get('zone_high')
-            other_low = other.get('zone_low')
-            if other_low > this_high:
-                dist = other_low - this_high
-                if dist < min_dist_above and dist >= self.threshold:
-                    min_dist_above = dist
-                    nearest_above_zone = other.copy()
-            elif other_high < this_low:
-                dist = this_low - other_high
-                if dist < min_dist_below and dist>=self.threshold:
-                    min_dist_below = dist
-                    nearest_below_zone = other.copy()
+        index = self.nearest_index(zones)
+        skip = lambda k: zones[k]['timestamp'] == zone['timestamp']
+        min_dist_above, nearest_above_zone, min_dist_below, nearest_below_zone = self.compute_nearest(zone,index,ATH,skip)
         temp_above,temp_below = {},{}
         base_data = zone.copy()
         base_data['distance_to_nearest_zone_above'] = min_dist_above
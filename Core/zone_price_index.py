@@ -0,0 +1,94 @@
+from bisect import bisect_left
+
+class NearestZoneIndex:
+    """
+    Candidate zones sorted by price for nearest-zone searches.
+
+    Zones are sorted by zone_low (for zones above) and by zone_high (for zones
+    below). The nearest zone at least threshold away is found by binary search on
+    the same distance test the linear scan used, and ties on distance go to the
+    zone that comes first in the original list, as with the scan.
+
+    Distances are computed from the zone values themselves, so they keep the
+    zones' numeric types. remove() drops a zone that stops being a candidate.
+    """
+    def __init__(self, zones):
+        self.zones = zones
+        self.lows = [z.get('zone_low') for z in zones]
+        self.highs = [z.get('zone_high') for z in zones]
+        self.alive = [True] * len(zones)
+        # NaN never passes a comparison, so those zones can never be picked
+        self.by_low = sorted((k for k, v in enumerate(self.lows) if v == v), key=lambda k: (self.lows[k], k))
+        self.by_high = sorted((k for k, v in enumerate(self.highs) if v == v), key=lambda k: (self.highs[k], k))
+        # a zone with zone_low > zone_high could qualify both above and below
+        self.inverted = any(lo > hi for lo, hi in zip(self.lows, self.highs) if lo == lo and hi == hi)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def remove(self, k):
+        """
+        Drop the zone at position k from the searches
+        """
+        if not self.alive[k]:
+            return
+        self.alive[k] = False
+        for values, order in ((self.lows, self.by_low), (self.highs, self.by_high)):
+            if values[k] == values[k]:
+                del order[bisect_left(order, (values[k], k), key=lambda j: (values[j], j))]
+
+    def nearest_above(self, this_high, threshold, limit, skip=None):
+        """
+        (distance, position) of the zone with the smallest zone_low - this_high that
+        is >= threshold and < limit, or (limit, None)
+        """
+        lows, order = self.lows, self.by_low
+
+        def qualifies(j):
+            low = lows[order[j]]
+            return low > this_high and low - this_high >= threshold
+
+        # qualifying zones form a suffix of the zone_low order
+        j = bisect_left(range(len(order)), True, key=qualifies)
+        best = best_dist = None
+        while j < len(order):
+            k = order[j]
+            j += 1
+            if skip is not None and skip(k):
+                continue
+            dist = lows[k] - this_high
+            if best is not None and dist != best_dist:
+                break
+            if best is None or k < best:
+                best, best_dist = k, dist
+        if best is None or not best_dist < limit:
+            return limit, None
+        return best_dist, best
+
+    def nearest_below(self, this_low, threshold, limit, skip=None):
+        """
+        (distance, position) of the zone with the smallest this_low - zone_high that
+        is >= threshold and < limit, or (limit, None)
+        """
+        highs, order = self.highs, self.by_high
+
+        def too_close(j):
+            high = highs[order[j]]
+            return not (high < this_low and this_low - high >= threshold)
+
+        # qualifying zones form a prefix of the zone_high order
+        j = bisect_left(range(len(order)), True, key=too_close) - 1
+        best = best_dist = None
+        while j >= 0:
+            k = order[j]
+            j -= 1
+            if skip is not None and skip(k):
+                continue
+            dist = this_low - highs[k]
+            if best is not None and dist != best_dist:
+                break
+            if best is None or k < best:
+                best, best_dist = k, dist
+        if best is None or not best_dist < limit:
+            return limit, None
+        return best_dist, best
@@ -1,155 +1,129 @@
 from tqdm import tqdm
 import pandas as pd
+import numpy as np
 from Utility.MemoryUsage import  MemoryUsage as mu
 import os
 from dotenv import load_dotenv
 from Exceptions.ServiceExceptions import *
+from .zone_level_index import ZoneLevelIndex
 class ZoneReactor:
     def __init__(self):
         self.reaction_storage = os.getenv(key='REACTION_STORAGE')
 
     def get_zone_reaction(self,zone,candles_data):
-        candles = candles_data.copy()
-        candles['timestamp'] = pd.to_datetime(candles['timestamp'])
-        
-        zone_high = zone['zone_high']
-        zone_low = zone['zone_low']
-        end_timestamp = pd.to_datetime(zone['timestamp'])
+        """
+        First candle after the zone's timestamp that opens outside the zone and
+        wicks into it. Works on the cached candle arrays, so successive zones on the
+        same frame share one index and nothing is copied per call.
+        """
+        if not pd.api.types.is_datetime64_any_dtype(candles_data['timestamp']):
+            candles_data = candles_data.assign(timestamp=pd.to_datetime(candles_data['timestamp']))
+        index = self.candle_index(candles_data)
+        end_timestamp = np.datetime64(pd.to_datetime(zone['timestamp']),'ns').astype(np.int64)
+
+        # Skip zones that go beyond candles
+        if index['is_sorted']:
+            start = np.searchsorted(index['timestamps'],end_timestamp,side='right')
+            if start == index['length']:
+                return zone
+        else:
+            start = 0
+            if not (index['timestamps'] > end_timestamp).any():
+                return zone
+
+        zone_high = float(zone['zone_high'])
+        zone_low = float(zone['zone_low'])
+        hit = self.first_hits(candles_data,np.array([start]),np.array([end_timestamp]),np.array([zone_high]),np.array([zone_low]),condition=self.zone_touch)[0]
 
         touch_type = None
         touch_index = None
         touch_candle = None
-
-        # Skip zones that go beyond candles
-        future_candles = candles.loc[candles['timestamp'] > end_timestamp]
-        if future_candles.empty:
-            return zone
-
-        for i, row in future_candles.iterrows():
-            open_, close, high, low = row['open'], row['close'], row['high'], row['low']
-            if (open_ > zone_high and low < zone_high) or (open_ < zone_low and high > zone_low):
-                touch_type = None
-                touch_candle = row
-
-                if zone_low <= close <= zone_high:
-                    touch_type = 'body_close_inside'
-                elif (open_ > zone_high and close < zone_low) or (open_ < zone_low and close > zone_high):
-                    touch_type = 'engulf'
-                elif close > zone_high and open_ > zone_high:
-                    touch_type = 'body_close_above'
-                elif close < zone_low and open_ < zone_low:
-                    touch_type = 'body_close_below'
-                else:
-                    touch_type = 'wick_touch'
-                break
+        if hit >= 0:
+            touch_candle = candles_data.iloc[hit]
+            touch_type = self.classify_touch(index['open'][[hit]],index['close'][[hit]],zone_high,zone_low)[0][0]
         zone_copy = zone.copy()
         zone_copy['touch_type'] = touch_type
         zone_copy['touch_index'] = touch_index
         zone_copy['touch_candle'] = touch_candle
         return zone_copy
-    
-    def get_zones_reaction(self, zones, candles_data):
-        candles_data['timestamp'] = pd.to_datetime(candles_data['timestamp'])
 
-        for zone in tqdm(zones, desc="Getting Zone Reactions"):
-            zone_high = zone['zone_high']
-            zone_low = zone['zone_low']
-            zone_type = zone['zone_type']
-            end_timestamp = pd.to_datetime(zone['timestamp'])  # use timestamp instead of index
-
-            if zone_type in ['Buy-Side Liq', 'Sell-Side Liq']:
-                touch_time = zone.get('swept_time', None)
-                if touch_time is not None:
-                    touch_time = pd.to_datetime(touch_time)
-                    touch_from = None
-                    touch_candle = candles_data.loc[candles_data['timestamp'] == touch_time]
-                    if touch_candle.empty:
-                        zone['touch_type'] = None
-                        zone['touch_candle'] = None
-                        zone['touch_from'] = touch_from
-                        yield zone
-                        continue
+    def candle_index(self,candles_data):
+        """
+        Timestamp index over a candle frame, kept while the same frame is used:
+        candle times as int64 nanoseconds in sorted order and the matching positions.
+        """
+        cached = getattr(self,'_candle_index',None)
+        if cached is not None and cached['candles'] is candles_data and cached['length'] == len(candles_data):
+            return cached
+        times = candles_data['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        order = np.argsort(times,kind='stable')
+        self._candle_index = {
+            'candles' : candles_data,
+            'length' : len(candles_data),
+            'order' : order,
+            'times' : times[order],
+            'timestamps' : times,
+            'is_sorted' : bool(np.all(times[1:] >= times[:-1])),
+            'open' : candles_data['open'].to_numpy(dtype=np.float64),
+            'high' : candles_data['high'].to_numpy(dtype=np.float64),
+            'low' : candles_data['low'].to_numpy(dtype=np.float64),
+            'close' : candles_data['close'].to_numpy(dtype=np.float64),
+        }
+        return self._candle_index
+
+    def find_candles(self,candles_data,times):
+        """
+        Position of the first candle whose timestamp equals each time (-1 when None or missing)
+        """
+        index = self.candle_index(candles_data)
+        wanted = np.array([pd.to_datetime(t).to_datetime64() if t is not None else np.datetime64('NaT') for t in times],dtype='datetime64[ns]')
+        missing = np.isnat(wanted)
+        wanted = wanted.astype(np.int64)
+        at = np.searchsorted(index['times'],wanted,side='left')
+        found = ~missing & (at < len(index['times']))
+        found[found] = index['times'][at[found]] == wanted[found]
+        return np.where(found,index['order'][np.minimum(at,len(index['order'])-1)],-1)
+
+    @staticmethod
+    def classify_touch(open_,close,zone_high,zone_low):
+        """
+        touch_type and touch_from of the touching candle for arrays of zones
+        """
+        touch_type = np.select(
+            [(zone_low <= close) & (close <= zone_high),
+             ((open_ > zone_high) & (close < zone_low)) | ((open_ < zone_low) & (close > zone_high)),
+             (close > zone_high) & (open_ > zone_high),
+             (close < zone_low) & (open_ < zone_low)],
+            ['body_close_inside','engulf','body_close_above','body_close_below'],'wick_touch')
+        touch_from = np.select([open_ > zone_high,open_ < zone_low],['Above','Below'],'Inside')
+        return touch_type.tolist(),touch_from.tolist()
 
-                    open_ = float(touch_candle['open'].iloc[0])
-                    close = float(touch_candle['close'].iloc[0])
-
-                    if open_ > zone_high :
-                        touch_from = 'Above'
-                    elif open_ < zone_low:
-                        touch_from = 'Below'
-                    else:
-                        touch_from = 'Inside'
-
-                    if zone_low <= close <= zone_high:
-                        touch_type = 'body_close_inside'
-                    elif (open_ > zone_high and close < zone_low) or (open_ < zone_low and close > zone_high):
-                        touch_type = 'engulf'
-                    elif close > zone_high and open_ > zone_high:
-                        touch_type = 'body_close_above'
-                    elif close < zone_low and open_ < zone_low:
-                        touch_type = 'body_close_below'
-                    else:
-                        touch_type = 'wick_touch'
-
-                    
-                    zone['touch_type'] = touch_type
-                    zone['touch_candle'] = touch_candle.iloc[0]
-                    zone['touch_from'] = touch_from
-                    yield zone
-                    continue
-                else:
-                    
-                    zone['touch_type'] = None
-                    zone['touch_candle'] = None
-                    zone['touch_from'] = touch_from
-                    yield zone
-                    continue
+    def get_zones_reaction(self, zones, candles_data):
+        if not pd.api.types.is_datetime64_any_dtype(candles_data['timestamp']):
+            candles_data['timestamp'] = pd.to_datetime(candles_data['timestamp'])
+
+        # liquidity zones react on the candle that swept them, others on the touching candle
+        times = [zone.get('swept_time', None) if zone['zone_type'] in ['Buy-Side Liq', 'Sell-Side Liq'] else zone.get('touch_time',None) for zone in zones]
+        positions = self.find_candles(candles_data,times)
+        index = self.candle_index(candles_data)
+        touched = np.flatnonzero(positions >= 0)
+        zone_high = np.array([zones[k]['zone_high'] for k in touched],dtype=np.float64)
+        zone_low = np.array([zones[k]['zone_low'] for k in touched],dtype=np.float64)
+        open_ = index['open'][positions[touched]]
+        close = index['close'][positions[touched]]
+        touch_type,touch_from = self.classify_touch(open_,close,zone_high,zone_low)
+        reaction = dict(zip(touched.tolist(),zip(touch_type,touch_from)))
+
+        for k, zone in enumerate(tqdm(zones, desc="Getting Zone Reactions")):
+            if k in reaction:
+                zone['touch_type'] = reaction[k][0]
+                zone['touch_candle'] = candles_data.iloc[positions[k]]
+                zone['touch_from'] = reaction[k][1]
             else:
-                touch_type = None
-                touch_candle = None
-                touch_from = None
-                touch_time = zone.get('touch_time',None)
-                if touch_time is None:
-                    zone['touch_type'] = None
-                    zone['touch_candle'] = None
-                    zone['touch_from'] = None
-                    yield zone
-                    continue
-                else:
-                    touch_time = pd.to_datetime(touch_time)
-                    touch_candle = candles_data.loc[candles_data['timestamp'] == touch_time]
-                    if touch_candle.empty:
-                        zone['touch_type'] = None
-                        zone['touch_candle'] = None
-                        zone['touch_from'] = None
-                        yield zone
-                        continue
-
-                    open_ = float(touch_candle['open'].iloc[0])
-                    close = float(touch_candle['close'].iloc[0])
-
-                    if open_ > zone_high :
-                        touch_from = 'Above'
-                    elif open_ < zone_low:
-                        touch_from = 'Below'
-                    else:
-                        touch_from = 'Inside'
-
-                    if zone_low <= close <= zone_high:
-                        touch_type = 'body_close_inside'
-                    elif (open_ > zone_high and close < zone_low) or (open_ < zone_low and close > zone_high):
-                        touch_type = 'engulf'
-                    elif close > zone_high and open_ > zone_high:
-                        touch_type = 'body_close_above'
-                    elif close < zone_low and open_ < zone_low:
-                        touch_type = 'body_close_below'
-                    else:
-                        touch_type = 'wick_touch'
-
-                zone['touch_type'] = touch_type
-                zone['touch_candle'] = touch_candle.iloc[0]
-                zone['touch_from'] = touch_from
-                yield zone
+                zone['touch_type'] = None
+                zone['touch_candle'] = None
+                zone['touch_from'] = None
+            yield zone
 
 
     def get_next_target_zone(self, zones,candles_data):
@@ -193,12 +167,73 @@ class ZoneReactor:
 
         return zone_targets
 
-    
+
+    @staticmethod
+    def target_hit(o,h,l,c,H,L):
+        """
+        Candle crosses level H down, crosses level L up, or trades strictly inside (L, H)
+        """
+        return ((o > H) & (c < H)) | ((o < L) & (c > L)) | ((h < H) & (l > L))
+
+    @staticmethod
+    def zone_touch(o,h,l,c,H,L):
+        """
+        Candle opens above H and wicks below it, or opens below L and wicks above it
+        """
+        return ((o > H) & (l < H)) | ((o < L) & (h > L))
+
+    def first_hits(self,candles_data,starts,after,level_high,level_low,condition=None,max_cells=1 << 22):
+        """
+        First candle position p >= start with timestamp > after where condition holds
+        for (level_high, level_low), target_hit by default; -1 when there is none.
+
+        All queries are swept together in windows that double in size, so zones
+        hit soon after their touch only look at a few candles.
+        """
+        condition = condition or self.target_hit
+        index = self.candle_index(candles_data)
+        opens, highs, lows, closes, times = index['open'], index['high'], index['low'], index['close'], index['timestamps']
+        n = index['length']
+        pos = np.asarray(starts,dtype=np.int64).copy()
+        result = np.full(len(pos),-1,dtype=np.int64)
+        active = np.flatnonzero(pos < n)
+        chunk = 64
+        while len(active):
+            size = int(max(1,min(chunk,max_cells // len(active))))
+            window = pos[active,None] + np.arange(size)
+            inside = window < n
+            window = np.minimum(window,n - 1)
+            o, h, l, c = opens[window], highs[window], lows[window], closes[window]
+            H = level_high[active,None]
+            L = level_low[active,None]
+            cond = condition(o,h,l,c,H,L)
+            cond &= inside & (times[window] > after[active,None])
+            hit = cond.any(axis=1)
+            first = cond.argmax(axis=1)
+            result[active[hit]] = window[hit,first[hit]]
+            pos[active] += size
+            active = active[~hit & (pos[active] < n)]
+            chunk *= 2
+        return result
+
     def getTargetFromTwoZones(self, zones, candles_data):
         
-        candles_data['timestamp'] = pd.to_datetime(candles_data['timestamp'])
-
-        for zone in tqdm(zones, desc='Adding Target zones'):
+        if not pd.api.types.is_datetime64_any_dtype(candles_data['timestamp']):
+            candles_data['timestamp'] = pd.to_datetime(candles_data['timestamp'])
+        index = self.candle_index(candles_data)
+
+        # zones with both neighbours and a touch candle are labelled in one batch
+        labelled = [k for k,zone in enumerate(zones) if zone.get('above_timestamp', None) is not None and zone.get('below_timestamp', None) is not None and zone.get('touch_candle',None) is not None]
+        after = np.array([pd.to_datetime(zones[k]['touch_candle']['timestamp']).to_datetime64() for k in labelled],dtype='datetime64[ns]').astype(np.int64)
+        starts = np.searchsorted(index['timestamps'],after,side='right') if index['is_sorted'] else np.zeros(len(after),dtype=np.int64)
+        levels = {}
+        for side in ['above','below']:
+            levels[side] = [np.array([zones[k].get(f'{side}_zone_{bound}',None) for k in labelled],dtype=np.float64) for bound in ['high','low']]
+        hits = np.stack([self.first_hits(candles_data,starts,after,*levels['above']),
+                         self.first_hits(candles_data,starts,after,*levels['below'])],axis=1) if labelled else np.zeros((0,2),dtype=np.int64)
+        hits = dict(zip(labelled,hits.tolist()))
+
+        for k, zone in enumerate(tqdm(zones, desc='Adding Target zones')):
             touch_candle = zone.get('touch_candle',None)
             above_zone = zone.get('above_timestamp', None)
             below_zone = zone.get('below_timestamp', None)
@@ -208,30 +243,10 @@ class ZoneReactor:
                 continue
 
             if touch_candle is not None:
-                touch_time = pd.to_datetime(touch_candle['timestamp'])
-                future_candles = candles_data.loc[candles_data['timestamp'] > touch_time ]
-
-                # Above zone conditions
-                next_high1 = zone.get('above_zone_high',None)
-                next_low1 = zone.get('above_zone_low',None)
-                cond1 = (
-                    ((future_candles['open'] > next_high1) & (future_candles['close'] < next_high1)) |
-                    ((future_candles['open'] < next_low1) & (future_candles['close'] > next_low1)) |
-                    ((future_candles['high'] < next_high1) & (future_candles['low'] > next_low1))
-                )
-
-                # Below zone conditions
-                next_high2 = zone.get('below_zone_high',None)
-                next_low2 = zone.get('below_zone_low',None)
-                cond2 = (
-                    ((future_candles['open'] > next_high2) & (future_candles['close'] < next_high2)) |
-                    ((future_candles['open'] < next_low2) & (future_candles['close'] > next_low2)) |
-                    ((future_candles['high'] < next_high2) & (future_candles['low'] > next_low2))
-                )
-
-                # Find the first True index for each condition
-                first_above = cond1.idxmax() if cond1.any() else None
-                first_below = cond2.idxmax() if cond2.any() else None
+                # index labels of the first candle hitting each zone
+                hit_above, hit_below = hits[k]
+                first_above = candles_data.index[hit_above] if hit_above >= 0 else None
+                first_below = candles_data.index[hit_below] if hit_below >= 0 else None
 
                 # Pick whichever happened first
                 if first_above is not None and (first_below is None or first_above < first_below):
@@ -245,62 +260,67 @@ class ZoneReactor:
 
 
     
-    def get_last_candle_reaction(self,zones,candle):
+    @staticmethod
+    def zone_key(zone):
+        return (zone.get('id',zone.get('timestamp')),zone.get('zone_low'),zone.get('zone_high'))
+
+    def level_index(self,zones,version=None):
+        """
+        ZoneLevelIndex over zones. With a version it is kept while the version, the number
+        of zones and the last zone stay the same; without one it is rebuilt.
+        Callers must bump the version on every store, delete or in-place edit of the zones:
+        the length and last-zone checks only catch zones added or dropped without a bump.
+        """
+        key = (version,len(zones),self.zone_key(zones[-1]) if zones else None)
+        cached = getattr(self,'_level_index',None)
+        if version is not None and cached is not None and self._level_key == key:
+            return cached
+        self._level_index = ZoneLevelIndex(zones)
+        self._level_key = key
+        return self._level_index
+
+    def get_last_candle_reaction(self,zones,candle,touch_all=False,version=None):
+        """
+        Reaction of the first zone (in list order) touched by the candle, or of every
+        touched zone when touch_all is set. Raises CandleNotTouch when none is touched.
+        version is the zone source's change counter (see level_index).
+        """
         high, low, close, open_ = candle['high'], candle['low'], candle['close'], candle['open']
-        for zone in zones:
+        reactions = []
+        index = self.level_index(zones,version)
+        for k in index.touched(open_,high,low):
+            zone = index.zones[k]
             zone_high = zone['zone_high']
             zone_low = zone['zone_low']
-            zone_timestamp = pd.to_datetime(zone['timestamp'])
-            zone_id = zone['id']
-            zone_type = zone['zone_type']
-            if (zone_low > open_ and zone_low <= high) or (zone_high < open_ and zone_high >= low):
-                touch_from = 'Inside'
-                if zone_low > open_:
-                    touch_from = 'Below'
-                elif zone_high < open_:
-                    touch_from = 'Above'
-
-                if zone_low <= close <= zone_high:
-                    return {
-                        'touch_from':touch_from,
-                        'touch_type':'body_close_inside',
-                        'touch_time':zone_timestamp,
-                        'id': zone_id,
-                        'type' : zone_type
-                        }
-                elif (open_ > zone_high and close < zone_low) or (open_ < zone_low and close > zone_high):
-                    return {
-                        'touch_from':touch_from,
-                        'touch_type':'engulf',
-                        'touch_time':zone_timestamp,
-                        'id': zone_id,
-                        'type' : zone_type
-                        }
-                elif close > zone_high and open_ > zone_high:
-                    return {
-                        'touch_from':touch_from,
-                        'touch_type':'body_close_above',
-                        'touch_time':zone_timestamp,
-                        'id': zone_id,
-                        'type' : zone_type
-                        }
-                elif close < zone_low and open_ < zone_low:
-                    return {
-                        'touch_from':touch_from,
-                        'touch_type':'body_close_below',
-                        'touch_time':zone_timestamp,
-                        'id': zone_id,
-                        'type' : zone_type
-                        }
-                else:
-                    return {
-                        'touch_from':touch_from,
-                        'touch_type':'wick_touch',
-                        'touch_time':zone_timestamp,
-                        'id': zone_id,
-                        'type' : zone_type
-                        }
-        raise CandleNotTouch
+            touch_from = 'Inside'
+            if zone_low > open_:
+                touch_from = 'Below'
+            elif zone_high < open_:
+                touch_from = 'Above'
+
+            if zone_low <= close <= zone_high:
+                touch_type = 'body_close_inside'
+            elif (open_ > zone_high and close < zone_low) or (open_ < zone_low and close > zone_high):
+                touch_type = 'engulf'
+            elif close > zone_high and open_ > zone_high:
+                touch_type = 'body_close_above'
+            elif close < zone_low and open_ < zone_low:
+                touch_type = 'body_close_below'
+            else:
+                touch_type = 'wick_touch'
+            reaction = {
+                'touch_from':touch_from,
+                'touch_type':touch_type,
+                'touch_time':pd.to_datetime(zone['timestamp']),
+                'id': zone['id'],
+                'type' : zone['zone_type']
+                }
+            if not touch_all:
+                return reaction
+            reactions.append(reaction)
+        if not reactions:
+            raise CandleNotTouch
+        return reactions
 
     @mu.log_memory
     def perform_reaction_check(self,zones,candles_data):
@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+
+class ZoneTable:
+    """
+    Struct-of-arrays container for zones.
+
+    Every field is one NumPy column. 'zone_type' and 'time_frame' are stored as
+    small integer codes plus a category list. Fields that were None are kept in a
+    null mask and fields a zone never had (e.g. 'swept_time' on an FVG) in an
+    absent mask, so to_records() rebuilds exactly the dicts the pipeline used.
+    """
+    CATEGORICAL = ('zone_type', 'time_frame')
+
+    def __init__(self, length=0):
+        self.length = length
+        self.keys = []
+        self.columns = {}
+        self.categories = {}
+        self.nulls = {}
+        self.absent = {}
+        self.native = set()
+        self.boxed = set()
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    # ------------------------------------------------------------------
+    # construction
+    # ------------------------------------------------------------------
+    def set_column(self, key, values, nulls=None, absent=None):
+        """
+        Store one field. values may be an array, a scalar shared by every zone or None.
+        """
+        if key not in self.columns:
+            self.keys.append(key)
+        if values is None:
+            values = np.zeros(self.length, dtype=np.float32)
+            nulls = np.ones(self.length, dtype=bool)
+        elif np.isscalar(values):
+            values = np.full(self.length, values, dtype=object)
+
+        if key in self.CATEGORICAL:
+            labels = np.asarray(values, dtype=object)
+            if absent is not None:
+                labels = np.where(absent, labels[0] if self.length else '', labels)
+            categories, codes = np.unique(labels.astype(str), return_inverse=True)
+            self.categories[key] = categories.tolist()
+            values = codes.astype(np.int16)
+
+        self.columns[key] = np.asarray(values)
+        if nulls is not None and nulls.any():
+            self.nulls[key] = nulls
+        if absent is not None and absent.any():
+            self.absent[key] = absent
+
+    @classmethod
+    def from_columns(cls, columns, keys, nulls=None, native=()):
+        """
+        Build a table from detector output (field -> array, scalar or None).
+        """
+        nulls = nulls or {}
+        table = cls(len(columns['timestamp']))
+        for key in keys:
+            table.set_column(key, columns[key], nulls=nulls.get(key))
+        table.native.update(k for k in native if k in table.columns)
+        return table
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a table from a list of zone dicts.
+        """
+        table = cls(len(records))
+        keys = {}
+        for record in records:
+            keys.update(dict.fromkeys(record))
+        for key in keys:
+            missing = object()
+            raw = [record.get(key, missing) for record in records]
+            absent = np.array([v is missing for v in raw], dtype=bool)
+            nulls = np.array([v is None for v in raw], dtype=bool)
+            sample = next((v for v in raw if v is not missing and v is not None), None)
+            filled = [sample if (v is missing or v is None) else v for v in raw]
+
+            if sample is None:
+                values = None
+                nulls = ~absent
+            elif isinstance(sample, str) and key in cls.CATEGORICAL:
+                values = filled
+            elif isinstance(sample, pd.Timestamp):
+                values = np.array([pd.Timestamp(v).to_datetime64() for v in filled], dtype='datetime64[ns]')
+                table.boxed.add(key)
+            elif isinstance(sample, np.datetime64):
+                values = np.array(filled, dtype='datetime64[ns]')
+            elif isinstance(sample, (bool, int, float)) and not isinstance(sample, np.generic):
+                values = np.array(filled)
+                if values.dtype == object:
+                    values = np.array(filled, dtype=object)
+                else:
+                    table.native.add(key)
+            elif isinstance(sample, np.generic):
+                values = np.array(filled)
+            else:
+                values = np.empty(len(filled), dtype=object)
+                for k, v in enumerate(filled):
+                    values[k] = v
+            table.set_column(key, values, nulls=nulls, absent=absent)
+        return table
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        Stack tables row-wise. Fields missing from one table are absent on its rows.
+        """
+        tables = [t for t in tables if t is not None]
+        table = cls(sum(len(t) for t in tables))
+        if not tables:
+            return table
+        keys = []
+        for t in tables:
+            keys += [k for k in t.keys if k not in keys]
+        for key in keys:
+            parts, nulls, absent = [], [], []
+            for t in tables:
+                if key in t.columns:
+                    parts.append(t.column(key) if key in cls.CATEGORICAL else t.columns[key])
+                    nulls.append(t.nulls.get(key, np.zeros(len(t), dtype=bool)))
+                    absent.append(t.absent.get(key, np.zeros(len(t), dtype=bool)))
+                else:
+                    parts.append(None)
+                    nulls.append(np.zeros(len(t), dtype=bool))
+                    absent.append(np.ones(len(t), dtype=bool))
+            # a table where every value is None only holds placeholders for this field
+            placeholder = [p is None or (n | a).all() for p, n, a in zip(parts, nulls, absent)]
+            template = next((p for p, ph in zip(parts, placeholder) if not ph), next(p for p in parts if p is not None))
+            parts = [np.zeros(len(t), dtype=template.dtype) if ph else p for p, t, ph in zip(parts, tables, placeholder)]
+            if len({p.dtype for p in parts if len(p)}) > 1 and any(p.dtype == object for p in parts if len(p)):
+                parts = [p.astype(object) for p in parts]
+            table.set_column(key, np.concatenate(parts), nulls=np.concatenate(nulls), absent=np.concatenate(absent))
+            if any(key in t.native for t in tables):
+                table.native.add(key)
+            if any(key in t.boxed for t in tables):
+                table.boxed.add(key)
+        return table
+
+    # ------------------------------------------------------------------
+    # access
+    # ------------------------------------------------------------------
+    def column(self, key):
+        """
+        Decoded column (categorical fields come back as an object array of labels)
+        """
+        values = self.columns[key]
+        if key in self.categories:
+            return np.asarray(self.categories[key], dtype=object)[values]
+        return values
+
+    def isin(self, key, labels):
+        """
+        Boolean mask of rows whose categorical field is one of labels
+        """
+        wanted = [self.categories[key].index(l) for l in labels if l in self.categories.get(key, [])]
+        return np.isin(self.columns[key], wanted)
+
+    def is_null(self, key):
+        """
+        True where the field is None or absent
+        """
+        mask = np.zeros(self.length, dtype=bool)
+        if key in self.nulls:
+            mask |= self.nulls[key]
+        if key in self.absent:
+            mask |= self.absent[key]
+        return mask
+
+    def take(self, idx):
+        """
+        New table holding the given rows (positions or boolean mask)
+        """
+        idx = np.flatnonzero(idx) if np.asarray(idx).dtype == bool else np.asarray(idx, dtype=np.int64)
+        table = ZoneTable(len(idx))
+        table.keys = list(self.keys)
+        table.columns = {k: v[idx] for k, v in self.columns.items()}
+        table.categories = dict(self.categories)
+        table.nulls = {k: v[idx] for k, v in self.nulls.items()}
+        table.absent = {k: v[idx] for k, v in self.absent.items()}
+        table.native = set(self.native)
+        table.boxed = set(self.boxed)
+        return table
+
+    @property
+    def nbytes(self):
+        return sum(v.nbytes for v in self.columns.values()) + sum(v.nbytes for v in self.nulls.values())
+
+    # ------------------------------------------------------------------
+    # export
+    # ------------------------------------------------------------------
+    def to_records(self):
+        """
+        Rebuild the list of zone dicts
+        """
+        fields = []
+        for key in self.keys:
+            values = self.column(key)
+            if key in self.native or key in self.categories:
+                values = values.tolist()
+            elif key in self.boxed:
+                values = [pd.Timestamp(v) for v in values]
+            fields.append((key, values, self.nulls.get(key), self.absent.get(key)))
+
+        records = []
+        for k in range(self.length):
+            record = {}
+            for key, values, nulls, absent in fields:
+                if absent is not None and absent[k]:
+                    continue
+                record[key] = None if nulls is not None and nulls[k] else values[k]
+            records.append(record)
+        return records
@@ -0,0 +1,158 @@
+import numpy as np
+
+class TouchIndex:
+    """
+    Precomputed "next crossing" searches over one candle history.
+
+    Answers, for many (start, level) pairs at once:
+        - first candle j >= start that opens above level and closes below it
+        - first candle j >= start that opens below level and closes above it
+        - first candle j >= start whose high reaches level / whose low reaches level
+
+    Crossing searches use a sorted-event sweep over all queries (Fenwick tree of
+    active candles), high/low reach searches use a sparse table with binary lifting.
+    Every search returns an int64 array of positions, -1 where nothing is found.
+    """
+    def __init__(self, opens, highs, lows, closes):
+        self.opens = np.asarray(opens)
+        self.highs = np.asarray(highs)
+        self.lows = np.asarray(lows)
+        self.closes = np.asarray(closes)
+        self.length = len(self.opens)
+        self._high_table = None
+        self._low_table = None
+
+    def first_cross_down(self, starts, levels):
+        """
+        First candle at or after start with open > level and close < level
+        """
+        return self._first_inside(self.closes, self.opens, starts, levels)
+
+    def first_cross_up(self, starts, levels):
+        """
+        First candle at or after start with open < level and close > level
+        """
+        return self._first_inside(self.opens, self.closes, starts, levels)
+
+    def first_high_reach(self, starts, levels):
+        """
+        First candle at or after start with high >= level
+        """
+        if self._high_table is None:
+            self._high_table = self._sparse_table(self.highs, np.maximum)
+        return self._first_reach(self._high_table, starts, levels, np.greater_equal)
+
+    def first_low_reach(self, starts, levels):
+        """
+        First candle at or after start with low <= level
+        """
+        if self._low_table is None:
+            self._low_table = self._sparse_table(self.lows, np.minimum)
+        return self._first_reach(self._low_table, starts, levels, np.less_equal)
+
+    def _first_inside(self, lower, upper, starts, levels):
+        """
+        First candle j >= start with lower[j] < level < upper[j].
+
+        Queries are swept in ascending level order. A candle is active while
+        lower[j] < level < upper[j], so it is inserted when the sweep passes lower[j]
+        and removed when it reaches upper[j]. The answer is the first active
+        position at or after start, found with a Fenwick order-statistic descent.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        levels = np.asarray(levels, dtype=np.float64)
+        result = np.full(len(starts), -1, dtype=np.int64)
+        n = self.length
+        if n == 0 or len(starts) == 0:
+            return result
+
+        candles = np.flatnonzero(lower < upper)
+        add_order = candles[np.argsort(lower[candles], kind='stable')]
+        remove_order = candles[np.argsort(upper[candles], kind='stable')]
+        add_at = lower[add_order].tolist()
+        remove_at = upper[remove_order].tolist()
+        add_order = (add_order + 1).tolist()
+        remove_order = (remove_order + 1).tolist()
+
+        tree = [0] * (n + 1)
+        top = 1 << (n.bit_length() - 1)
+        active = 0
+        a = r = 0
+        start_list = starts.tolist()
+        level_list = levels.tolist()
+
+        for q in np.argsort(levels, kind='stable').tolist():
+            level = level_list[q]
+            if level != level:
+                continue
+            while a < len(add_at) and add_at[a] < level:
+                pos = add_order[a]
+                while pos <= n:
+                    tree[pos] += 1
+                    pos += pos & -pos
+                active += 1
+                a += 1
+            while r < len(remove_at) and remove_at[r] <= level:
+                pos = remove_order[r]
+                while pos <= n:
+                    tree[pos] -= 1
+                    pos += pos & -pos
+                active -= 1
+                r += 1
+
+            start = start_list[q]
+            if start >= n or active == 0:
+                continue
+            # active candles strictly before start
+            before = 0
+            pos = max(start, 0)
+            while pos > 0:
+                before += tree[pos]
+                pos -= pos & -pos
+            if before == active:
+                continue
+            # position of the (before + 1)-th active candle
+            rank = before + 1
+            pos = 0
+            step = top
+            while step:
+                nxt = pos + step
+                if nxt <= n and tree[nxt] < rank:
+                    pos = nxt
+                    rank -= tree[nxt]
+                step >>= 1
+            result[q] = pos
+        return result
+
+    @staticmethod
+    def _sparse_table(values, reduce):
+        table = [np.asarray(values)]
+        span = 1
+        while span * 2 <= len(values):
+            prev = table[-1]
+            table.append(reduce(prev[:-span], prev[span:]))
+            span *= 2
+        return table
+
+    def _first_reach(self, table, starts, levels, reaches):
+        """
+        Binary lifting over the sparse table: jump over every block that cannot
+        reach the level, largest blocks first.
+        """
+        pos = np.asarray(starts, dtype=np.int64).copy()
+        levels = np.asarray(levels)
+        n = self.length
+        if n == 0 or len(pos) == 0:
+            return np.full(len(pos), -1, dtype=np.int64)
+        pos = np.maximum(pos, 0)
+        for k in range(len(table) - 1, -1, -1):
+            block = table[k]
+            span = 1 << k
+            can_jump = pos + span <= n
+            clipped = np.minimum(pos, len(block) - 1)
+            jump = can_jump & ~reaches(block[clipped], levels)
+            pos = np.where(jump, pos + span, pos)
+        inside = pos < n
+        hit = np.zeros(len(pos), dtype=bool)
+        hit[inside] = reaches(table[0][pos[inside]], levels[inside])
+        return np.where(hit, pos, -1)
@@ -0,0 +1,125 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from .timeFrames import timeFrame
+
+class CandleRing:
+    """
+    Last `capacity` closed candles of one symbol/interval in fixed-size NumPy arrays.
+
+    Candles must arrive contiguous (each opened one interval after the previous one).
+    A candle after a gap marks the ring as broken until it is refilled from REST.
+    """
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'number_of_trades']
+
+    def __init__(self, interval, capacity=500):
+        self.period = pd.Timedelta(interval).value // 1_000_000  # ms
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((len(self.COLUMNS), capacity), dtype=np.float32)
+        self.count = 0
+        self.broken = False
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def last_timestamp(self):
+        return int(self.timestamps[(self.count - 1) % self.capacity]) if self.count else None
+
+    def push(self, timestamp, values):
+        """
+        Append one closed candle (open time in ms, COLUMNS values)
+        """
+        last = self.last_timestamp()
+        if last is not None and timestamp <= last:
+            return
+        if last is not None and timestamp != last + self.period:
+            self.broken = True
+        slot = self.count % self.capacity
+        self.timestamps[slot] = timestamp
+        self.values[:, slot] = values
+        self.count += 1
+
+    def fill(self, data):
+        """
+        Replace the contents with the (closed, contiguous) candles of a get_ohlcv frame
+        """
+        data = data.iloc[-self.capacity:]
+        self.count = len(data)
+        self.timestamps[:self.count] = data['timestamp'].to_numpy().astype('datetime64[ms]').view(np.int64)
+        for k, column in enumerate(self.COLUMNS):
+            self.values[k, :self.count] = data[column].to_numpy()
+        self.broken = False
+
+    def is_current(self, now_ms):
+        """
+        True when the ring is unbroken and holds the most recently closed candle
+        """
+        last = self.last_timestamp()
+        return not self.broken and last is not None and last >= (now_ms // self.period - 1) * self.period
+
+    def frame(self, limit):
+        """
+        Last `limit` candles, oldest first, laid out like get_ohlcv
+        """
+        n = min(limit, len(self))
+        order = (np.arange(self.count - n, self.count)) % self.capacity
+        index = pd.DatetimeIndex(self.timestamps[order].astype('datetime64[ms]'), name='timestamp')
+        df = pd.DataFrame({column: self.values[k, order] for k, column in enumerate(self.COLUMNS)}, index=index)
+        df['timestamp'] = df.index
+        return df
+
+
+class CandleBuffer:
+    """
+    Process-wide rolling buffer of closed candles fed by the kline websocket.
+
+    The listener appends every closed kline it receives. Readers get the recent
+    candles of a symbol/interval without a REST call as long as the ring is
+    current. After a cold start, a gap (missed candles, reconnect) or a stall it
+    returns None, and the reader backfills it from REST with fill().
+    """
+    CAPACITY = 500
+    # current time in ms, unless a reader passes its own clock to recent()
+    now = staticmethod(lambda: int(time.time() * 1000))
+
+    _rings = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def ring(cls, symbol, interval):
+        key = (symbol, interval)
+        if key not in cls._rings:
+            cls._rings[key] = CandleRing(interval, cls.CAPACITY)
+        return cls._rings[key]
+
+    @classmethod
+    def append_kline(cls, kline):
+        """
+        Append a closed websocket kline (Binance 'k' payload)
+        """
+        if not kline.get("x"):
+            return
+        interval = timeFrame().getInterval(kline["i"])
+        values = [float(kline[key]) for key in ("o", "h", "l", "c", "v", "n")]
+        with cls._lock:
+            cls.ring(kline["s"], interval).push(int(kline["t"]), values)
+
+    @classmethod
+    def fill(cls, symbol, interval, data):
+        with cls._lock:
+            cls.ring(symbol, interval).fill(data)
+
+    @classmethod
+    def recent(cls, symbol, interval, limit, now=None):
+        """
+        Last `limit` closed candles of symbol/interval as of now (ms, default the wall clock),
+        None when the buffer needs a REST backfill
+        """
+        now = cls.now() if now is None else now
+        with cls._lock:
+            ring = cls._rings.get((symbol, interval))
+            if ring is None or not ring.is_current(now):
+                return None
+            return ring.frame(limit)
@@ -1,32 +1,111 @@
 from .binanceAPI import BinanceAPI
+from .ReplayBinanceAPI import ReplayBinanceAPI
+from .CandleResampler import CandleResampler
+from .MarketDataCache import MarketDataCache
+from .CandleBuffer import CandleBuffer
+from .timeFrames import timeFrame
 from Core.TA import TA
+from Core.TechnicalAnalysis.Streaming import StreamingTA
 from Exceptions.ServiceExceptions import *
 from Utility.Logger import Logger
 from dotenv import load_dotenv
+import pandas as pd
+import asyncio
 import os
 class CandleData:
     def __init__(self):
         load_dotenv()
-        self.api = BinanceAPI()
+        self.api = ReplayBinanceAPI.shared() if ReplayBinanceAPI.enabled() else BinanceAPI()
         self.data_root = os.getenv("DATA_PATH")
         self.logger = Logger()
+        self.indicators = {}
+
+    async def getMarketData(self,symbol,interval,lookback=None,limit=None):
+        """
+        BTCUSDT candles and close returns for the rolling regression of symbol, (None, None) for BTCUSDT itself
+        """
+        if symbol == 'BTCUSDT' : 
+            return None,None
+        return await MarketDataCache.get(self.api,interval,lookback=lookback,limit=limit)
 
     async def getCandleData(self,symbol,interval,lookback):
-        based_data = await self.api.get_ohlcv(symbol,interval,lookback)
+        based_data,(market_data,market_returns) = await asyncio.gather(
+            self.api.get_ohlcv(symbol,interval,lookback),
+            self.getMarketData(symbol,interval,lookback=lookback)
+        )
+        return self.addIndicators(based_data,market_data,market_returns)
+
+    def addIndicators(self,based_data,market_data=None,market_returns=None):
         self.TA = TA()
-        data = self.TA.add(based_data)
-        if symbol != 'BTCUSDT' : 
-            market_data = await self.api.get_ohlcv('BTCUSDT',interval,lookback)
-            data = self.TA.add_RollingRegression(data,market_data)
+        data = self.TA.add_fused(based_data)
+        if market_data is not None:
+            data = self.TA.add_RollingRegression(data,market_data,market_returns)
         return data
+
+    async def getCandleDataSet(self,symbol,intervals,lookback):
+        """
+        getCandleData of several intervals from one download of the smallest one.
+        Intervals timeFrame.multiplier maps from it are resampled locally, any other is fetched.
+
+        Returns:
+            dict of interval -> candle data with indicators.
+        """
+        base = min(intervals,key=timeFrame().getTFOrder)
+        resampler = CandleResampler()
+        fetched = [interval for interval in intervals if not resampler.can_resample(base,interval)]
+        # the base candles, BTCUSDT and any interval that cannot be resampled download concurrently
+        based_data,(market_data,market_returns),*fetched_data = await asyncio.gather(
+            self.api.get_ohlcv(symbol,base,lookback),
+            self.getMarketData(symbol,base,lookback=lookback),
+            *(self.getCandleData(symbol,interval,lookback) for interval in fetched)
+        )
+        candles = dict(zip(fetched,fetched_data))
+        for interval in intervals:
+            if interval == base:
+                candles[interval] = self.addIndicators(based_data,market_data,market_returns)
+            elif interval not in candles:
+                ohlcv = resampler.resample(based_data,base,interval)
+                market = resampler.resample(market_data,base,interval) if market_data is not None else None
+                candles[interval] = self.addIndicators(ohlcv,market)
+        return {interval: candles[interval] for interval in intervals}
     
+    def streamIndicators(self,symbol,interval,closed):
+        """
+        Streaming TA state of symbol/interval fed up to the last closed candle.
+        Seeded from the given history once, and again only if candles were missed.
+        """
+        stream = self.indicators.get((symbol,interval))
+        if stream is None or not stream.update_frame(closed):
+            stream = StreamingTA().seed(closed)
+            self.indicators[(symbol,interval)] = stream
+        return stream
+
+    async def recentCandles(self,symbol,interval,limit = 100):
+        """
+        Last `limit` closed candles of symbol/interval from the websocket candle buffer.
+        The buffer is backfilled from REST only when it is empty, has a gap or lags behind.
+        """
+        # freshness and closing are judged by the API's clock, the replay clock when replaying
+        now = self.api.now()
+        closed = CandleBuffer.recent(symbol,interval,limit,now=now)
+        if closed is None:
+            data = await self.api.get_ohlcv(symbol,interval,limit = limit + 1)
+            closed = data[data['timestamp'] + pd.Timedelta(interval) <= pd.Timestamp(now,unit='ms')]
+            CandleBuffer.fill(symbol,interval,closed)
+            closed = closed.iloc[-limit:]
+        return closed
+
     async def getLatestCandle(self,symbol,interval):
-        based_data = await self.api.get_ohlcv(symbol,interval,limit = 100)
-        self.TA = TA()
-        data = self.TA.add(based_data)
+        fetches = [self.recentCandles(symbol,interval)]
         if symbol != 'BTCUSDT' : 
-            market_data = await self.api.get_ohlcv('BTCUSDT',interval,limit = 100)
-            data = self.TA.add_RollingRegression(data,market_data)
+            fetches.append(self.recentCandles('BTCUSDT',interval))
+        based_data,*market_data = await asyncio.gather(*fetches)
+        # the buffer holds closed candles: the ones before the latest update the indicators, it only peeks
+        stream = self.streamIndicators(symbol,interval,based_data.iloc[:-1])
+        data = based_data.iloc[-1:].assign(**stream.peek(based_data['close'].iloc[-1]))
+        if market_data : 
+            regression = TA().add_RollingRegression(based_data,market_data[0])
+            data = data.join(regression[['alpha','beta','gamma','r2']])
         return data.iloc[-1]
 
     def store_OHLCV(self, symbol, interval,lookback):
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from .timeFrames import timeFrame
+
+class CandleResampler:
+    """
+    Higher-timeframe candles aggregated from already fetched base-timeframe candles.
+
+    A higher candle covers timeFrame.multiplier[base][target] base candles. Buckets
+    are aligned to the Unix epoch, as Binance aligns its minute, hour and day klines,
+    so a complete bucket is the kline the exchange returns for that period:
+    open = first, high = max, low = min, close = last, volume / trades = sum.
+    A leading bucket that starts before the first base candle is dropped; the last
+    bucket holds the candles seen so far, like the still-forming kline.
+    """
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'number_of_trades']
+
+    def __init__(self):
+        self.tf = timeFrame()
+
+    def can_resample(self, base, target):
+        return target in self.tf.multiplier.get(base, {})
+
+    def resample(self, data, base, target):
+        """
+        get_ohlcv-style candles of `target` built from `base` candles in data
+        """
+        if base == target:
+            return data
+        period = pd.Timedelta(base).value * self.tf.getMultiplier(base, target)
+        timestamps = data['timestamp'].to_numpy().astype('datetime64[ns]').view(np.int64)
+        bucket = timestamps // period
+
+        if len(bucket) and timestamps[0] != bucket[0] * period:
+            complete = bucket != bucket[0]
+            data, bucket = data[complete], bucket[complete]
+        if not len(bucket):
+            return data[self.COLUMNS + ['timestamp']].iloc[:0]
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends = np.r_[starts[1:], len(bucket)] - 1
+
+        columns = {column: data[column].to_numpy() for column in self.COLUMNS}
+        aggregated = {
+            'open': columns['open'][starts],
+            'high': np.maximum.reduceat(columns['high'], starts),
+            'low': np.minimum.reduceat(columns['low'], starts),
+            'close': columns['close'][ends],
+        }
+        for column in ('volume', 'number_of_trades'):
+            values = columns[column]
+            aggregated[column] = np.add.reduceat(values.astype(np.float64), starts).astype(values.dtype)
+
+        opens = (bucket[starts] * period).astype('datetime64[ns]').astype(data['timestamp'].dtype)
+        index = pd.DatetimeIndex(opens, name='timestamp')
+        df = pd.DataFrame(aggregated, index=index)
+        df['timestamp'] = df.index
+        return df
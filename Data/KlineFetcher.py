@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from binance.helpers import interval_to_milliseconds
+
+class RateLimiter:
+    """
+    Token bucket: at most `rate` requests per `per` seconds, bursting up to `rate`.
+
+    Shared across threads and event loops: reserve() takes a token under a lock
+    and returns how long the caller has to wait for it, and acquire() does that
+    wait on the event loop, so no thread is held while waiting.
+    """
+    def __init__(self, rate, per=60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / per
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, cost=1):
+        """
+        Take cost tokens, going into debt if needed; seconds until they are available
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+            self.updated = now
+            self.tokens -= cost
+            return max(0.0, -self.tokens / self.fill_rate)
+
+    async def acquire(self, cost=1):
+        wait = self.reserve(cost)
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class KlineFetcher:
+    """
+    Non-blocking kline downloads over the synchronous Binance client.
+
+    Requests run on a process-wide thread pool, so the event loop keeps running
+    while they wait on the network. Each event loop lets at most KLINE_WORKERS
+    requests through at a time, and a process-wide token bucket bounds the request
+    rate (KLINE_REQUESTS_PER_MINUTE), whichever loop or service they come from.
+    Both waits happen on the event loop, so pool threads only block on the network.
+
+    A lookback is split into fixed time pages of PAGE candles, known up front from
+    the interval, and all pages are requested concurrently.
+    """
+    PAGE = 1000
+    WORKERS = int(os.getenv("KLINE_WORKERS", 8))
+    REQUESTS_PER_MINUTE = int(os.getenv("KLINE_REQUESTS_PER_MINUTE", 600))
+
+    _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="klines")
+    _limiter = RateLimiter(REQUESTS_PER_MINUTE)
+    _earliest = {}
+    _slots = weakref.WeakKeyDictionary()
+    _slots_lock = threading.Lock()
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def slots(cls, loop):
+        """
+        Semaphore bounding the requests in flight from loop
+        """
+        with cls._slots_lock:
+            if loop not in cls._slots:
+                cls._slots[loop] = asyncio.Semaphore(cls.WORKERS)
+            return cls._slots[loop]
+
+    async def call(self, **params):
+        loop = asyncio.get_running_loop()
+        async with self.slots(loop):
+            await self._limiter.acquire()
+            return await loop.run_in_executor(self._executor, functools.partial(self.client.get_klines, **params))
+
+    async def earliest(self, symbol, interval):
+        """
+        Open time (ms) of the first kline the exchange has for symbol/interval, None if there is none
+        """
+        key = (symbol, interval)
+        if key not in self._earliest:
+            first = await self.call(symbol=symbol, interval=interval, startTime=0, limit=1)
+            self._earliest[key] = first[0][0] if first else None
+        return self._earliest[key]
+
+    async def klines(self, symbol, interval, start, end=None):
+        """
+        Raw klines opened between start and end (ms, end defaults to now), in order
+        """
+        first = await self.earliest(symbol, interval)
+        if first is None:
+            return []
+        start = max(start, first)
+        end = int(time.time() * 1000) if end is None else end
+        step = interval_to_milliseconds(interval) * self.PAGE
+        pages = await asyncio.gather(*(
+            self.call(symbol=symbol, interval=interval, startTime=page, endTime=min(page + step - 1, end), limit=self.PAGE)
+            for page in range(start, end + 1, step)
+        ))
+        return [kline for page in pages for kline in page]
+
+    async def latest(self, symbol, interval, limit):
+        """
+        The last `limit` raw klines, the forming one included
+        """
+        return await self.call(symbol=symbol, interval=interval, limit=limit)
@@ -0,0 +1,87 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import pandas as pd
+
+class MarketDataCache:
+    """
+    Process-wide cache of the BTCUSDT market data fed to the rolling regression.
+
+    Entries are keyed by (interval, lookback, limit) and shared by every CandleData,
+    so the altcoin services refreshing together reuse one BTC fetch and one
+    pct_change series. An entry expires after TTL seconds, or earlier when the last
+    cached candle closes, so a new candle is never served stale. A miss registers
+    one in-flight future per key; concurrent misses for that key, from any thread
+    or event loop, wait on it instead of starting another fetch. Cached frames are
+    shared: callers must not modify them.
+    """
+    SYMBOL = 'BTCUSDT'
+    TTL = 60  # seconds
+
+    _entries = {}
+    _pending = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    async def get(cls, api, interval, lookback=None, limit=None):
+        """
+        (candles, close pct_change) of BTCUSDT, fetched through api when not cached
+        """
+        key = (interval, lookback, limit)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                return entry[1], entry[2]
+            future = cls._pending.get(key)
+            owner = future is None
+            if owner:
+                future = cls._pending[key] = concurrent.futures.Future()
+        # shielded: a caller being cancelled must not cancel the fetch the others wait on
+        if owner:
+            return await asyncio.shield(asyncio.create_task(cls.fetch(api, key, future)))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    @classmethod
+    async def fetch(cls, api, key, future):
+        """
+        Fetch key, cache it and resolve its in-flight future
+        """
+        interval, lookback, limit = key
+        try:
+            data = await api.get_ohlcv(cls.SYMBOL, interval, lookback=lookback, limit=limit)
+            returns = data['close'].pct_change()
+        except BaseException as e:
+            with cls._lock:
+                if cls._pending.get(key) is future:
+                    del cls._pending[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+            raise
+        now = time.time()
+        expires = min(now + cls.TTL, cls.candle_close(data, interval, now))
+        # cached and no longer pending in one step, so no caller sees neither
+        with cls._lock:
+            cls._entries = {k: e for k, e in cls._entries.items() if e[0] > now}
+            cls._entries[key] = (expires, data, returns)
+            if cls._pending.get(key) is future:
+                del cls._pending[key]
+        future.set_result((data, returns))
+        return data, returns
+
+    @staticmethod
+    def candle_close(data, interval, default):
+        """
+        Close time (epoch seconds) of the last candle in data
+        """
+        if data.empty:
+            return default
+        return (data['timestamp'].iloc[-1] + pd.Timedelta(interval)).timestamp()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries = {}
+            cls._pending = {}
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+class OHLCVStore:
+    """
+    Append-only on-disk OHLCV store, one file per symbol/interval.
+
+    Each file is a flat array of RECORD rows (open time in ms, then the float32
+    columns get_ohlcv returns), read back with np.memmap. Only closed candles are
+    stored; new ones are appended after the last stored open time, so a refresh
+    writes just the delta. A small JSON file next to it keeps `since`, the
+    earliest time the stored history was requested from.
+
+    Use OHLCVStore.shared(root) so every client in a process works on the same
+    store; writes also take an OS file lock per symbol/interval, so separate
+    processes (main.py, schedule_runner) don't interleave appends.
+    """
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'number_of_trades']
+    RECORD = np.dtype([('timestamp', np.int64)] + [(column, np.float32) for column in COLUMNS])
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def shared(cls, root):
+        """
+        The store of root, created once per process
+        """
+        key = os.path.abspath(root)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(root)
+            return cls._instances[key]
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol}_{interval}.ohlcv")
+
+    def meta_path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol}_{interval}.json")
+
+    def lock_path(self, symbol, interval):
+        return os.path.join(self.root, f"{symbol}_{interval}.lock")
+
+    @contextmanager
+    def locked(self, symbol, interval):
+        """
+        Hold the symbol/interval write lock, in this process and across processes
+        """
+        with self.lock, open(self.lock_path(symbol, interval), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # read
+    # ------------------------------------------------------------------
+    def read(self, symbol, interval):
+        """
+        Stored candles as a read-only memmap of RECORD rows (empty array when nothing is stored)
+        """
+        path = self.path(symbol, interval)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        # a write cut short leaves a partial row at the end, which is ignored
+        count = size // self.RECORD.itemsize
+        if not count:
+            return np.empty(0, dtype=self.RECORD)
+        return np.memmap(path, dtype=self.RECORD, mode='r', shape=(count,))
+
+    def since(self, symbol, interval):
+        path = self.meta_path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['since']
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Open time (ms) of the last stored candle, None when nothing is stored
+        """
+        records = self.read(symbol, interval)
+        return int(records['timestamp'][-1]) if len(records) else None
+
+    def window(self, symbol, interval, start):
+        """
+        Stored candles opened at or after start (ms)
+        """
+        records = self.read(symbol, interval)
+        return records[np.searchsorted(records['timestamp'], start):]
+
+    # ------------------------------------------------------------------
+    # write
+    # ------------------------------------------------------------------
+    def append(self, symbol, interval, records):
+        """
+        Append the records opened after the last stored candle.
+
+        Records at or before the last stored open time, and repeated or
+        out-of-order ones within the batch, are dropped so the file stays
+        strictly increasing.
+
+        Returns:
+            number of records written.
+        """
+        records = self.increasing(records)
+        with self.locked(symbol, interval):
+            path = self.path(symbol, interval)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            last = self.last_timestamp(symbol, interval)
+            if last is not None:
+                records = records[records['timestamp'] > last]
+            if len(records):
+                with open(path, 'ab') as f:
+                    # drop a partial row left by an interrupted write before appending after it
+                    if size % self.RECORD.itemsize:
+                        f.truncate(size - size % self.RECORD.itemsize)
+                    f.write(np.ascontiguousarray(records, dtype=self.RECORD).tobytes())
+            return len(records)
+
+    def replace(self, symbol, interval, records, since):
+        """
+        Replace the stored history with records, requested from `since` (ms)
+        """
+        records = self.increasing(records)
+        with self.locked(symbol, interval):
+            self.write_atomic(self.path(symbol, interval),
+                              np.ascontiguousarray(records, dtype=self.RECORD).tobytes())
+            self.write_atomic(self.meta_path(symbol, interval),
+                              json.dumps({'since': int(since)}).encode())
+
+    @staticmethod
+    def write_atomic(path, data):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def increasing(cls, records):
+        """
+        records sorted by open time with repeated open times dropped (first one kept)
+        """
+        records = np.asarray(records, dtype=cls.RECORD)
+        timestamps = records['timestamp']
+        if len(records) < 2 or (np.diff(timestamps) > 0).all():
+            return records
+        _, first = np.unique(timestamps, return_index=True)
+        return records[first]
+
+    # ------------------------------------------------------------------
+    # conversion
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_klines(cls, klines):
+        """
+        RECORD rows of raw Binance klines
+        """
+        records = np.empty(len(klines), dtype=cls.RECORD)
+        if not len(klines):
+            return records
+        values = np.array([k[:6] + [k[8]] for k in klines], dtype=object)
+        records['timestamp'] = values[:, 0].astype(np.int64)
+        for k, column in enumerate(cls.COLUMNS, start=1):
+            records[column] = values[:, k].astype(np.float64)
+        return records
+
+    @classmethod
+    def to_frame(cls, records):
+        """
+        Candles as get_ohlcv returns them: float32 columns indexed by timestamp, plus a timestamp column
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(records['timestamp']), unit='ms'), name='timestamp')
+        df = pd.DataFrame({column: np.array(records[column]) for column in cls.COLUMNS}, index=index)
+        df['timestamp'] = df.index
+        return df
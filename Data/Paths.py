@@ -15,6 +15,7 @@ class Paths :
     columns_list : str = field(init= False)
     feature_list : str = field(init=False)
     backtest_history : str = field(init= False)
+    ohlcv_store : str = field(init= False)
 
     def __post_init__(self):
         load_dotenv()  
@@ -28,4 +29,5 @@ class Paths :
         self.root = os.getenv("DATA_PATH")
         self.columns_list = os.getenv("COLUMNS_LIST")
         self.feature_list = os.getenv("FEATURE_LIST")
-        self.backtest_history = os.getenv("BACKTEST_HISTORY")
\ No newline at end of file
+        self.backtest_history = os.getenv("BACKTEST_HISTORY")
+        self.ohlcv_store = os.getenv("OHLCV_STORE")
\ No newline at end of file
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import time
+import numpy as np
+import pandas as pd
+from binance.helpers import date_to_milliseconds
+from Utility.Logger import Logger
+from .binanceAPI import BinanceAPI
+from .OHLCVStore import OHLCVStore
+from .Paths import Paths
+from .timeFrames import timeFrame
+
+class ReplayStats:
+    """
+    Timings of a replay: one row per burst (all klines closing at the same time)
+    """
+    def __init__(self):
+        self.bursts = []  # (close time ms, klines, callback seconds, drain seconds)
+        self.callbacks = []
+        self.started = time.perf_counter()
+
+    def add(self, close_time, callbacks, drain):
+        self.callbacks += callbacks
+        self.bursts.append((close_time, len(callbacks), sum(callbacks), drain))
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        klines = len(self.callbacks)
+        callbacks = np.array(self.callbacks) * 1000 if klines else np.zeros(1)
+        bursts = np.array([b[2] + b[3] for b in self.bursts]) * 1000 if self.bursts else np.zeros(1)
+        return {
+            'klines': klines,
+            'bursts': len(self.bursts),
+            'seconds': elapsed,
+            'klines_per_second': klines / elapsed if elapsed else 0.0,
+            'callback_ms_p50': float(np.percentile(callbacks, 50)),
+            'callback_ms_p99': float(np.percentile(callbacks, 99)),
+            'callback_ms_max': float(callbacks.max()),
+            'burst_ms_p50': float(np.percentile(bursts, 50)),
+            'burst_ms_p99': float(np.percentile(bursts, 99)),
+            'burst_ms_max': float(bursts.max()),
+        }
+
+
+class ReplayBinanceAPI(BinanceAPI):
+    """
+    Offline stand-in for BinanceAPI that replays klines from the local OHLCV store.
+
+    listen_kline() streams the stored candles of the requested symbols/intervals
+    through the callback in close-time order, as closed websocket klines, at
+    `speed` times real time ('max' for no pauses). Candles closing together are
+    delivered as one burst, as the exchange does at 5m/15m/1h/4h boundaries.
+    get_ohlcv() serves the candles closed as of the replay clock from the same files.
+
+    `wait_idle`, when given, is a blocking callable run after each burst (e.g. a task
+    queue's join) so the burst timings cover the work the klines triggered.
+    Settings come from BINANCE_REPLAY_SPEED, BINANCE_REPLAY_START and
+    BINANCE_REPLAY_END (date strings); without a start the last 7 stored days are
+    replayed. The store is filled by get_ohlcv running live with OHLCV_STORE set.
+    """
+    _shared = None
+
+    def __init__(self, root=None, speed=None, start=None, end=None, wait_idle=None, hold=True):
+        self.logger = Logger()
+        root = root or Paths().ohlcv_store
+        if not root:
+            raise RuntimeError("Set OHLCV_STORE to the OHLCV store to replay")
+        self.store = OHLCVStore.shared(root)
+        self.apiclient = None
+        self.fetcher = None
+        self.broadcast_client = None
+        self.bm = None
+        speed = speed if speed is not None else os.getenv("BINANCE_REPLAY_SPEED", "max")
+        self.speed = None if str(speed) == "max" else float(speed)
+        start = start if start is not None else os.getenv("BINANCE_REPLAY_START")
+        end = end if end is not None else os.getenv("BINANCE_REPLAY_END")
+        self.start = date_to_milliseconds(start) if start else None
+        self.end = date_to_milliseconds(end) if end else None
+        self.wait_idle = wait_idle
+        self.hold = hold
+        self.clock = self.start
+        self.stats = None
+
+    @staticmethod
+    def enabled():
+        return bool(os.getenv("BINANCE_REPLAY_SPEED"))
+
+    @classmethod
+    def shared(cls):
+        """
+        The process-wide replay API, so the listener and every service share one replay clock
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def now(self):
+        """
+        The replay clock (ms), the wall clock before the replay has started
+        """
+        return self.clock if self.clock is not None else super().now()
+
+    async def connect(self):
+        self.bm = self
+
+    async def close(self):
+        self.bm = None
+
+    # ------------------------------------------------------------------
+    # candles
+    # ------------------------------------------------------------------
+    def closed_records(self, symbol, interval, until=None):
+        """
+        Stored candles of symbol/interval closed at or before until (ms)
+        """
+        records = self.store.read(symbol, interval)
+        if until is None or not len(records):
+            return records
+        period = pd.Timedelta(interval).value // 1_000_000
+        return records[:np.searchsorted(records['timestamp'], until - period, side='right')]
+
+    async def get_ohlcv(self, symbol, interval, lookback=None, limit=None):
+        """
+        get_ohlcv from the store, as of the replay clock
+        """
+        records = self.closed_records(symbol, interval, self.clock)
+        if lookback is not None:
+            span = int(time.time() * 1000) - date_to_milliseconds(lookback)
+            until = self.clock if self.clock is not None else (int(records['timestamp'][-1]) if len(records) else 0)
+            records = records[np.searchsorted(records['timestamp'], until - span):]
+        else:
+            records = records[-(limit or 100):]
+        return OHLCVStore.to_frame(records)
+
+    # ------------------------------------------------------------------
+    # websocket
+    # ------------------------------------------------------------------
+    def series(self, symbols, intervals):
+        """
+        (symbol, interval, period ms, records) of every stored series to replay, closed by the replay end
+        """
+        series = []
+        for itv in intervals:
+            interval = timeFrame().getInterval(itv)
+            period = pd.Timedelta(interval).value // 1_000_000
+            for sym in symbols:
+                records = self.closed_records(sym, interval, self.end)
+                if not len(records):
+                    self.logger.warning(f"{self.__class__}: no stored {sym} {interval} candles to replay")
+                    continue
+                series.append((sym, itv, period, records))
+        return series
+
+    def events(self, series, start):
+        """
+        (close times, klines) of the stored candles closing at or after start (ms), ordered by close time
+        """
+        close_times, klines = [], []
+        for sym, itv, period, records in series:
+            # only the candles in the replay window become klines
+            records = records[np.searchsorted(records['timestamp'], start - period):]
+            for record in records.tolist():
+                close_times.append(record[0] + period)
+                klines.append({
+                    't': record[0], 'T': record[0] + period - 1, 's': sym, 'i': itv,
+                    'o': str(record[1]), 'h': str(record[2]), 'l': str(record[3]), 'c': str(record[4]),
+                    'v': str(record[5]), 'n': int(record[6]), 'x': True,
+                })
+        close_times = np.array(close_times, dtype=np.int64)
+        order = np.argsort(close_times, kind='stable')
+        return close_times[order], [klines[k] for k in order]
+
+    async def listen_kline(self, symbols, intervals, callback):
+        """
+        Replay the stored klines through callback like the live kline socket.
+        Returns the replay stats summary, or with hold=True keeps the socket open afterwards.
+        """
+        if not self.bm:
+            raise RuntimeError("Call connect() before listen_kline()")
+        series = self.series(symbols, intervals)
+        if self.start is not None:
+            start = self.start
+        else:
+            last = max((int(records['timestamp'][-1]) + period for _, _, period, records in series), default=None)
+            start = last - 7 * 86_400_000 if last is not None else 0
+        close_times, klines = self.events(series, start)
+        bursts = np.flatnonzero(np.r_[True, close_times[1:] != close_times[:-1]]) if len(close_times) else np.empty(0, dtype=np.intp)
+        # services see the market as it was when the replay starts
+        self.clock = start
+
+        self.stats = ReplayStats()
+        self.logger.info(f"{self.__class__}: replaying {len(close_times)} klines in {len(bursts)} bursts at {self.speed or 'max'} speed")
+        loop = asyncio.get_running_loop()
+        origin = time.perf_counter()
+        for b, begin in enumerate(bursts.tolist()):
+            close_time = int(close_times[begin])
+            if self.speed is not None:
+                due = origin + (close_time - int(close_times[0])) / 1000 / self.speed
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            else:
+                await asyncio.sleep(0)
+            self.clock = close_time
+            callbacks = []
+            for kline in klines[begin:bursts[b + 1] if b + 1 < len(bursts) else len(klines)]:
+                t0 = time.perf_counter()
+                await callback(kline)
+                callbacks.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            if self.wait_idle is not None:
+                await loop.run_in_executor(None, self.wait_idle)
+            self.stats.add(close_time, callbacks, time.perf_counter() - t0)
+
+        summary = self.stats.summary()
+        self.logger.info(f"{self.__class__}: replay finished {summary}")
+        while self.hold and self.bm:
+            await asyncio.sleep(1)
+        return summary
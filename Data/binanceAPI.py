@@ -1,12 +1,18 @@
 import os
+import time
+import numpy as np
 import pandas as pd
 import asyncio
 import websockets
 from binance import AsyncClient, BinanceSocketManager
 from binance.client import Client
+from binance.helpers import date_to_milliseconds
 from dotenv import load_dotenv
 import ta
 from .timeFrames import timeFrame
+from .OHLCVStore import OHLCVStore
+from .KlineFetcher import KlineFetcher
+from .Paths import Paths
 from Exceptions.ServiceExceptions import *
 from Utility.Logger import Logger
 from Core.TechnicalAnalysis.RollingRegression import RollingRegression
@@ -18,9 +24,17 @@ class BinanceAPI:
         self.api_secret = os.getenv("BINANCE_SECRET_KEY")
         
         self.apiclient = Client(self.api_key, self.api_secret)
+        self.fetcher = KlineFetcher(self.apiclient)
         self.broadcast_client = None
         self.bm = None
         self.logger = Logger()
+        store_root = Paths().ohlcv_store
+        self.store = OHLCVStore.shared(store_root) if store_root else None
+
+    @staticmethod
+    def now():
+        """Current time in ms, the clock the candle buffer judges freshness by."""
+        return int(time.time() * 1000)
 
     async def connect(self):
         """Initialize async client + socket manager."""
@@ -89,10 +103,12 @@ class BinanceAPI:
             lookback = '3 years'
         tf = timeFrame()
         try:
+            if lookback is not None and self.store is not None:
+                return await self.stored_ohlcv(symbol, interval, lookback)
             if lookback is not None :
-                klines = self.apiclient.get_historical_klines(symbol,tf.getTimeFrame(interval) , lookback)
+                klines = await self.fetcher.klines(symbol, tf.getTimeFrame(interval), date_to_milliseconds(lookback))
             else:
-                klines = self.apiclient.get_historical_klines(symbol,tf.getTimeFrame(interval) , limit = 100)
+                klines = await self.fetcher.latest(symbol, tf.getTimeFrame(interval), limit = limit)
 
             df = pd.DataFrame(klines, columns=[
                 'timestamp', 'open', 'high', 'low', 'close', 'volume',
@@ -110,6 +126,35 @@ class BinanceAPI:
         except Exception as e:
             self.logger.error(f"{self.__class__}:Error:{e}")
             raise CantFetchCandleData
+
+    async def stored_ohlcv(self, symbol, interval, lookback):
+        """
+        get_ohlcv served from the local OHLCV store.
+
+        The first call (or a lookback reaching before the stored history) fetches the
+        whole lookback and stores it; later calls only fetch the candles after the last
+        stored one. Closed candles are appended to the store, the still-forming one is
+        returned without being stored.
+        """
+        binance_interval = timeFrame().getTimeFrame(interval)
+        start = date_to_milliseconds(lookback)
+        since = self.store.since(symbol, interval)
+        # taken before the request: a kline that closed before it is final in the response
+        now = int(time.time() * 1000)
+        if since is None or start < since:
+            klines = await self.fetcher.klines(symbol, binance_interval, start)
+            closed = [k for k in klines if k[6] < now]
+            self.store.replace(symbol, interval, OHLCVStore.from_klines(closed), start)
+        else:
+            last = self.store.last_timestamp(symbol, interval)
+            klines = await self.fetcher.klines(symbol, binance_interval, start if last is None else last + 1)
+            closed = [k for k in klines if k[6] < now]
+            self.store.append(symbol, interval, OHLCVStore.from_klines(closed))
+        self.logger.info(f'{symbol} {interval}: fetched {len(klines)} candles, {len(closed)} closed stored')
+
+        forming = OHLCVStore.from_klines([k for k in klines if k[6] >= now])
+        records = np.concatenate([self.store.window(symbol, interval, start), forming])
+        return OHLCVStore.to_frame(records)
         
     
     
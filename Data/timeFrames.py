@@ -38,6 +38,12 @@ class timeFrame:
                 '4h' : 48,
                 '1D' : 288
             },
+            '15min' : {
+                '15min' : 1,
+                '1h' : 4,
+                '4h' : 16,
+                '1D' : 96
+            },
             '1h' : {
                 '1h' : 1,
                 '4h' : 4,
@@ -54,6 +60,12 @@ class timeFrame:
 
     def getTimeFrame(self,interval):
         return self.tf[interval]
+
+    def getInterval(self,binance_interval):
+        """
+        Interval name ('15min') of a Binance kline interval ('15m')
+        """
+        return {v : k for k,v in self.tf.items()}[binance_interval]
     
     def getTFOrder(self,interval):
         return self.tfOrder.index(interval)
@@ -1,6 +1,7 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from Services.signalService import SignalService
 from Data.binanceAPI import BinanceAPI
+from Data.CandleBuffer import CandleBuffer
 import queue,threading,asyncio,itertools,logging,os
 from dotenv import load_dotenv
 
@@ -72,6 +73,7 @@ class BaseScheduler():
 
         async def on_kline_close(kline):
             try:
+                CandleBuffer.append_kline(kline)
                 await self._handle_kline(kline)
             except Exception as e:
                 self.logger.error(f"[{self.name}-Listener] Error: {e}")
@@ -1,6 +1,7 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from Services.signalService import SignalService
 from Data.binanceAPI import BinanceAPI
+from Data.CandleBuffer import CandleBuffer
 import queue, threading, asyncio, itertools, time, traceback,json,logging,os
 from dotenv import load_dotenv
 from Database.Cache import Cache
@@ -99,6 +100,9 @@ class SchedulerManager:
         while not self._stop_event.is_set():
             try:
                 priority, _, func = self.task_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
                 self.logger.info(f"Worker picked task priority={priority}, func={getattr(func,'__name__',str(func))}")
     
                 with self.db_lock:
@@ -109,13 +113,12 @@ class SchedulerManager:
                     if asyncio.iscoroutine(result):
                         loop.run_until_complete(result)
     
-                self.task_queue.task_done()
-    
-            except queue.Empty:
-                continue
             except Exception as e:
                 self.logger.error(f"Worker error: {e}")
                 traceback.print_exc()
+            finally:
+                # failed tasks count as done too, so task_queue.join() returns
+                self.task_queue.task_done()
 
     # -------------------------------------------------------------------------
     # 🕒 Scheduler
@@ -194,6 +197,8 @@ class SchedulerManager:
         
             async def callback(kline):
                 try:
+                    # kept for the services, which read recent candles from the buffer
+                    CandleBuffer.append_kline(kline)
                     symbol = kline.get("s")
                     interval = kline.get("i")
                     service_1h = self.services_based_1h.get(symbol)
@@ -44,6 +44,8 @@ class SignalService:
         self.ignore_cols = IgnoreColumns()
         self.subscribers = []
         self.zoneHandler = ZoneHandlingService(self.symbol,self.threshold,self.timeframes)
+        # kept across candles so the zone level index is only rebuilt when zoneHandler.zones_version changes
+        self.reactor = ZoneReactor()
         if not initial:
             datacleaner = DataCleaner(symbol=self.symbol,timeframes=self.timeframes)
             model_handler1 = ModelHandler(symbol=self.symbol,timeframes=self.timeframes,model_type='xgb')
@@ -91,9 +93,8 @@ class SignalService:
             zones = await self.zoneHandler.get_untouched_zones()
             ATH = await self.zoneHandler.getUpdatedATH()
 
-            reactor = ZoneReactor()
             datagen = DatasetGenerator(self.symbol,self.timeframes)
-            reaction_data = reactor.get_last_candle_reaction(zones,candle)
+            reaction_data = self.reactor.get_last_candle_reaction(zones,candle,version=self.zoneHandler.zones_version)
             nearbyzone = NearbyZones(threshold=self.threshold)
             signal,use_zones = await self.get_predicted_result(zones,candle,ATH,datagen,nearbyzone,reaction_data)
             if signal != 'None' and signal is not None:
@@ -140,10 +141,19 @@ class SignalService:
         model_trainer.test_result()
 
     def data_extraction(self):
+        loop = asyncio.new_event_loop()
         try:
-            loop = asyncio.new_event_loop()
-            total = loop.run_until_complete(self.zoneHandler.get_dataset(for_predict=self.local))
+            total = loop.run_until_complete(self.extract_dataset())
+        finally:
             loop.close()
+        return total
+
+    async def extract_dataset(self):
+        """
+        data_extraction as a coroutine, so several services can download their candles concurrently
+        """
+        try:
+            total = await self.zoneHandler.get_dataset(for_predict=self.local)
         except CantFetchCandleData:
             raise CantFetchCandleData
         total = self.clean_dataset(total)
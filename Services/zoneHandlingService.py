@@ -1,12 +1,17 @@
 from Core.ATH_Handler import ATHHandler
 from Core.zone_confluents import ConfluentsFinder
 from Core.zone_detection import ZoneDetector
+from Core.zone_incremental import IncrementalZoneDetector
 from Core.zone_nearby import NearbyZones
 from Core.zone_reactions import ZoneReactor
+from Core.zone_table import ZoneTable
 from Core.TechnicalAnalysis.RollingRegression import RollingRegression
+from Core.TechnicalAnalysis.Streaming import StreamingTA
+from Core.TA import TA
 from ML.datasetGeneration import DatasetGenerator
 from Exceptions.ServiceExceptions import *
 from Data.CandleData import CandleData
+from Data.CandleBuffer import CandleBuffer
 from Database.DataModels.FVG import FVG
 from Database.DataModels.OB import OB
 from Database.DataModels.Liq import LIQ
@@ -16,9 +21,16 @@ from Utility.MemoryUsage import MemoryUsage as mu
 from Utility.UtilityClass import UtilityFunctions as utility
 from Utility.Logger import Logger
 from dotenv import load_dotenv
-import os,json,logging
+import os,json,logging,asyncio
+import numpy as np
+import pandas as pd
 
 class ZoneHandlingService():
+    # candles kept by each incremental detector, about 6 months of 1h candles
+    INCREMENTAL_CANDLES = 4500
+    # candles before the new ones for the 50-candle rolling regression window
+    REGRESSION_WARMUP = 60
+
     def __init__(self,symbol,threshold,timeframes):
         self.candleFetcher = CandleData()
         self.symbol = symbol
@@ -32,36 +44,143 @@ class ZoneHandlingService():
             self.lookback = '5 years'
         else:
             self.lookback = '3 years'
+        self.detectors = {}
+        self.streams = {}
+        # bumped whenever stored zones are added or deleted, so readers can keep indexes over them
+        self.zones_version = 0
         self.logger = Logger()
 
-    async def get_zones(self,interval,lookback):
+    async def get_zones(self,interval,lookback,incremental = False):
         try:
             df = await self.candleFetcher.getCandleData(symbol=self.symbol,interval=interval,lookback=lookback)
         except CantFetchCandleData as e:
             raise CantFetchCandleData
+        return self.detect_zones(interval,df,incremental=incremental)
+
+    def detect_zones(self,interval,df,incremental = False):
         if interval ==  self.timeframes[0]:
             self.based_candles = df
+        if incremental:
+            return self.start_detector(interval,df)
         detector = ZoneDetector(df)
-        zones = detector.get_zones(threshold=self.threshold)
+        zones = detector.get_zone_table(threshold=self.threshold)
         return zones
 
+    def now(self):
+        """
+        Current time from the API clock, the replay clock when replaying
+        """
+        return pd.Timestamp(self.candleFetcher.api.now(),unit='ms')
+
+    def start_detector(self,interval,df):
+        """
+        (Re)build the interval's incremental detector and TA stream from the closed candles of df
+        """
+        closed = df[df['timestamp'] + pd.Timedelta(interval) <= self.now()]
+        self.detectors[interval] = IncrementalZoneDetector(closed,threshold=self.threshold,max_candles=self.INCREMENTAL_CANDLES)
+        self.streams[interval] = StreamingTA().seed(closed)
+        return self.detectors[interval].get_zone_table()
+
+    async def closed_since(self,interval):
+        """
+        Candles of interval closed after the detector's last one, with the detector's TA
+        and regression columns. None when the candle buffer can't serve them without a gap.
+        """
+        detector = self.detectors[interval]
+        schema = detector.schema()
+        last = detector.last_timestamp()
+        period = pd.Timedelta(interval)
+        missed = (self.now().floor(interval) - period - last) // period
+        if missed <= 0:
+            return schema
+        limit = missed + self.REGRESSION_WARMUP
+        if limit > CandleBuffer.CAPACITY:
+            return None
+        fetches = [self.candleFetcher.recentCandles(self.symbol,interval,limit)]
+        if self.symbol != 'BTCUSDT':
+            fetches.append(self.candleFetcher.recentCandles('BTCUSDT',interval,limit))
+        closed,*market = await asyncio.gather(*fetches)
+        new = closed[closed['timestamp'] > last]
+        if new.empty:
+            return schema
+        if new['timestamp'].iloc[0] != last + period:
+            return None
+        stream = self.streams[interval]
+        indicators = [stream.update(close,timestamp) for close,timestamp in zip(new['close'].to_numpy(),new['timestamp'].to_numpy())]
+        new = new.join(pd.DataFrame(indicators,index=new.index))
+        if market:
+            regression = TA().add_RollingRegression(closed,market[0])
+            new = new.join(regression[['alpha','beta','gamma','r2']])
+        return new[schema.columns].astype(schema.dtypes.to_dict())
+
+    def affected_zones(self,table,changed):
+        """
+        Table positions of the changed zones and of the zones whose confluence window
+        (zone_high +/- threshold) overlaps one of them
+        """
+        highs = table.columns['zone_high'].astype(np.float64) if len(table) else np.array([])
+        affected = np.zeros(len(table),dtype=bool)
+        for zone in changed:
+            affected |= (highs >= zone['zone_low'] - self.threshold) & (highs <= zone['zone_high'] + self.threshold)
+        return np.flatnonzero(affected)
+
+    async def get_updated_zones(self):
+        """
+        Changed zones after feeding every detector the candles closed since its last update,
+        run through confluence, nearby and reaction checks. Only the changed zones and the
+        zones whose confluence they affect are processed.
+        Returns None when a detector can't be caught up and the zones have to be rebuilt.
+        """
+        new_candles = await asyncio.gather(*(self.closed_since(tf) for tf in self.timeframes))
+        if any(candles is None for candles in new_candles):
+            return None
+        tables, positions, changed = [], [], []
+        offset = 0
+        for tf,candles in zip(self.timeframes,new_candles):
+            detector = self.detectors[tf]
+            delta = detector.update(candles)
+            self.logger.info(f"{self.symbol} {tf}: {len(delta['new'])} new, {len(delta['touched'])} touched, {len(delta['swept'])} swept, {len(delta['removed'])} removed zones")
+            table = detector.get_zone_table()
+            zones = [zone for key in ('new','touched','swept') for zone in delta[key]]
+            # a drifted detector was rebuilt from a full recompute: every zone may have changed
+            positions.append(np.arange(len(table)) + offset if detector.drifted else detector.positions(zones) + offset)
+            changed += zones + delta['removed']
+            tables.append(table)
+            offset += len(table)
+        table = ZoneTable.concat(tables)
+        only = np.union1d(np.concatenate(positions),self.affected_zones(table,changed)).astype(np.int64)
+        if not len(only):
+            return []
+
+        self.based_candles = self.detectors[self.timeframes[0]].df
+        confluentfinder = ConfluentsFinder(table,threshold=self.threshold)
+        # liquidity zones are the nearby candidates, their confluence is copied onto the zones near them
+        liquidity = np.flatnonzero(table.isin('zone_type',ConfluentsFinder.LIQ_TYPES))
+        zones = confluentfinder.getConfluents(only=np.union1d(only,liquidity))
+        zones = [zones[i] for i in only]
+        nearByZones = NearbyZones(zones,self.based_candles,threshold=self.threshold,availability=confluentfinder.availability.select(only))
+        zones = nearByZones.getNearbyZone()
+        zones = ZoneReactor().perform_reaction_check(zones,self.based_candles)
+        return sorted(zones,key=lambda x : x.get("timestamp",None))
+
     @mu.log_memory
-    async def get_latest_zones(self,lookback='1 years',initial_state = False):
+    async def get_latest_zones(self,lookback='1 years',initial_state = False,incremental = False):
         t_zones = []
         self.logger.info(f"{self.__class__}: getting updated zone for {self.symbol}")
+        try:
+            # higher timeframes are resampled from the smallest one instead of downloaded again
+            candles = await self.candleFetcher.getCandleDataSet(self.symbol,self.timeframes,lookback)
+        except CantFetchCandleData:
+            raise CantFetchCandleData
         for tf in self.timeframes:
-            try:
-                zone = await self.get_zones(tf,lookback)
-                
-                t_zones = t_zones + zone
-            except CantFetchCandleData:
-                raise CantFetchCandleData
-        confluentfinder = ConfluentsFinder(t_zones,threshold=self.threshold)
+            zone = self.detect_zones(tf,candles[tf],incremental=incremental)
+            t_zones.append(zone)
+        confluentfinder = ConfluentsFinder(ZoneTable.concat(t_zones),threshold=self.threshold)
         zones = confluentfinder.getConfluents()
         if initial_state:
             athHandler = ATHHandler(self.symbol,self.based_candles)
             await athHandler.updateATH()
-        nearByZones = NearbyZones(zones,self.based_candles,threshold=self.threshold)
+        nearByZones = NearbyZones(zones,self.based_candles,threshold=self.threshold,availability=confluentfinder.availability)
         zones = nearByZones.getNearbyZone()
         reactor = ZoneReactor()
         zones = reactor.perform_reaction_check(zones,self.based_candles)
@@ -97,7 +216,10 @@ class ZoneHandlingService():
     async def update_untouched_zones(self):
         try:
             self.logger.info(f"{self.symbol}:Updating Untouch Zones")
-            df_from_candle = await self.get_latest_zones('6 months')
+            # after the first full run only the zones changed by the new candles are refreshed
+            df_from_candle = await self.get_updated_zones() if self.detectors else None
+            if df_from_candle is None:
+                df_from_candle = await self.get_latest_zones('6 months',incremental=True)
             temp_df = []
             for i,row in enumerate(df_from_candle):
                 #print(row['touch_type'])
@@ -107,7 +229,10 @@ class ZoneHandlingService():
                 else:
                     temp_df.append(row)
             datagen = DatasetGenerator(symbol=self.symbol,timeframes = self.timeframes)
-            await datagen.store_untouch_zones(temp_df)
+            try:
+                await datagen.store_untouch_zones(temp_df)
+            finally:
+                self.zones_version += 1
         except CantFetchCandleData as e:
             self.logger.error(f'Error : Updating Untouch Zones{self.symbol}:{(e)}')
         except Exception as e:
@@ -129,6 +254,7 @@ class ZoneHandlingService():
         return ATH
     
     async def deleteUsedZones(self,use_zones):
+        self.zones_version += 1
         for zone in use_zones:
             id = zone.get('id',None)
             if id is not None:
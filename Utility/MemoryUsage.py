@@ -1,8 +1,12 @@
-import psutil, os, functools
+import psutil, os, functools, time, tracemalloc, threading
 from contextlib import contextmanager
+from Utility.Logger import Logger
 
 class MemoryUsage:
     _LOG_MEMORY_ENABLED = True  # class-level flag
+    # tracemalloc slows every allocation down, so peak tracing is opt-in (LOG_PEAK_MEMORY=1)
+    _PEAK_MEMORY_ENABLED = os.getenv("LOG_PEAK_MEMORY") == "1"
+    _peak_lock = threading.Lock()
 
     @staticmethod
     @contextmanager
@@ -23,11 +27,47 @@ class MemoryUsage:
 
             process = psutil.Process(os.getpid())
             before = process.memory_info().rss / 1024 ** 2
+            start = time.perf_counter()
             result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
             after = process.memory_info().rss / 1024 ** 2
             print(
                 f"[MEM] {func.__name__}: "
-                f"{before:.2f} MB -> {after:.2f} MB (Δ {after-before:.2f} MB)"
+                f"{before:.2f} MB -> {after:.2f} MB (Δ {after-before:.2f} MB) in {elapsed:.3f}s"
+            )
+            return result
+        return wrapper
+
+    @staticmethod
+    def log_peak_memory(func):
+        """
+        Like log_memory, but logs the peak of the allocations made during the call
+        (traced with tracemalloc, NumPy buffers included) instead of the RSS change.
+        Only active with LOG_PEAK_MEMORY=1; traced calls run one at a time, as
+        tracemalloc's peak is process-wide.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (MemoryUsage._PEAK_MEMORY_ENABLED and MemoryUsage._LOG_MEMORY_ENABLED):
+                return func(*args, **kwargs)
+
+            with MemoryUsage._peak_lock:
+                tracing = tracemalloc.is_tracing()
+                if not tracing:
+                    tracemalloc.start()
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    after, peak = tracemalloc.get_traced_memory()
+                    if not tracing:
+                        tracemalloc.stop()
+            Logger().info(
+                f"[MEM] {func.__name__}: "
+                f"peak +{(peak-before)/1024**2:.2f} MB, kept +{(after-before)/1024**2:.2f} MB in {elapsed:.3f}s"
             )
             return result
         return wrapper
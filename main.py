@@ -1,4 +1,5 @@
 import time
+import asyncio
 import pandas as pd
 import argparse
 
@@ -56,12 +57,13 @@ services_based_1D = {s: make_signal_service(s, "1D") for s in symbols}
 # ----------------------------------------------------------------------
 # UTILITY WRAPPERS
 # ----------------------------------------------------------------------
-def run_training(service,initiate_all = False):
+def run_training(service,initiate_all = False,total = None):
     """Extract + Train wrapper with uniform exception handling."""
     try:
         if not initiate_all:
             initiate_database()
-        total = service.data_extraction()
+        if total is None:
+            total = service.data_extraction()
         service.training_process(total)
     except (CantFetchCandleData, TrainingFail) as e:
         print(str(e))
@@ -71,6 +73,27 @@ def run_training(service,initiate_all = False):
         raise
 
 
+def extract_all(services, parallel=4):
+    """
+    data_extraction of every service on one event loop, at most `parallel` at a time,
+    so their candle downloads overlap. Returns the totals in service order.
+    """
+    async def extract():
+        semaphore = asyncio.Semaphore(parallel)
+
+        async def one(service):
+            async with semaphore:
+                return await service.extract_dataset()
+
+        return await asyncio.gather(*(one(service) for service in services))
+
+    try:
+        return asyncio.run(extract())
+    except CantFetchCandleData as e:
+        print(str(e))
+        raise FailInitialState
+
+
 # ----------------------------------------------------------------------
 # MAIN ACTIONS
 # ----------------------------------------------------------------------
@@ -80,16 +103,11 @@ def initiateAll():
     try:
         initiate_database()
 
-        # Train 1h models
-        for service in services_based_1h.values():
-            run_training(service,True)
-
-        # Train 15 min models
-        for service in services_based_15m.values():
-            run_training(service,True)
-
-        for service in services_based_1D.values():
-            run_training(service,True)
+        # 1h, 15 min and 1D datasets are extracted together, then each model is trained
+        services = [*services_based_1h.values(), *services_based_15m.values(), *services_based_1D.values()]
+        totals = extract_all(services)
+        for service, total in zip(services, totals):
+            run_training(service,True,total)
 
         # Train prediction models
         initiate_prediction_models()
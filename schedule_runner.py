@@ -3,6 +3,7 @@ from Scheduler.bnbScheduler import BnbScheduler
 from Scheduler.btcScheduler import BtcScheduler
 from Services.signalService import SignalService
 from Data.binanceAPI import BinanceAPI
+from Data.ReplayBinanceAPI import ReplayBinanceAPI
 from Database.DB import MySQLDB as DB
 import time,asyncio,signal,sys
 from Database.Cache import Cache
@@ -24,8 +25,12 @@ signal.signal(signal.SIGINT, handle_shutdown)
 if __name__ == "__main__":
     logger = Logger()
     DB.init_logger("schedule_runner_db.log")
-    api = BinanceAPI()
+    # BINANCE_REPLAY_SPEED replays the local OHLCV store instead of connecting to Binance
+    replay = ReplayBinanceAPI.enabled()
+    api = ReplayBinanceAPI.shared() if replay else BinanceAPI()
     scheduler = SchedulerManager(api=api)
+    if replay:
+        api.wait_idle = scheduler.task_queue.join
     scheduler.start()  # <-- assuming this starts internal threads or loops
 
     try:
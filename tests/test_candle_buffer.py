@@ -0,0 +1,32 @@
+import asyncio
+import pandas as pd
+import pytest
+from Data.CandleBuffer import CandleBuffer
+from Data.ReplayBinanceAPI import ReplayBinanceAPI
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer():
+    CandleBuffer._rings.clear()
+    yield
+    CandleBuffer._rings.clear()
+
+
+def candles(start, periods):
+    index = pd.date_range(start, periods=periods, freq='1h', name='timestamp')
+    df = pd.DataFrame({column: 1.0 for column in ['open', 'high', 'low', 'close', 'volume', 'number_of_trades']}, index=index)
+    df['timestamp'] = df.index
+    return df
+
+
+def test_replay_clock_stays_with_the_replay(tmp_path):
+    wall_clock = CandleBuffer.now
+    api = ReplayBinanceAPI(root=str(tmp_path), start='2024-01-02')
+    asyncio.run(api.connect())
+    assert CandleBuffer.now is wall_clock
+
+    # the last candle closed by the replay start is 2024-01-01 23:00
+    CandleBuffer.fill('BTCUSDT', '1h', candles('2024-01-01', 24))
+    assert len(CandleBuffer.recent('BTCUSDT', '1h', 10, now=api.now())) == 10
+    assert CandleBuffer.recent('BTCUSDT', '1h', 10) is None
+    asyncio.run(api.close())
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+import Utility.MemoryUsage as memory_usage
+from Utility.MemoryUsage import MemoryUsage
+from Core.TA import TA
+from Core.TechnicalAnalysis.FusedTA import FusedTA
+
+
+class RecordingLogger:
+    messages = []
+
+    def info(self, msg):
+        self.messages.append(msg)
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    RecordingLogger.messages = []
+    monkeypatch.setattr(memory_usage, 'Logger', RecordingLogger)
+    return RecordingLogger.messages
+
+
+def candles(length=200):
+    index = pd.date_range('2024-01-01', periods=length, freq='1h')
+    return pd.DataFrame({'close': np.linspace(100, 120, length)}, index=index)
+
+
+def random_walk(length, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=length, freq='1h')
+    return pd.DataFrame({'close': (30000 + np.cumsum(rng.normal(0, 150, length))).astype('float32')}, index=index)
+
+
+def test_add_logs_peak_memory_when_opted_in(monkeypatch, logged):
+    monkeypatch.setattr(MemoryUsage, '_PEAK_MEMORY_ENABLED', True)
+    result = FusedTA().add(candles())
+    assert list(result.columns[-len(FusedTA.COLUMNS):]) == FusedTA.COLUMNS
+    assert len(logged) == 1
+    assert logged[0].startswith('[MEM] add: peak +')
+
+
+def test_add_skips_peak_memory_by_default(monkeypatch, logged):
+    monkeypatch.setattr(MemoryUsage, '_PEAK_MEMORY_ENABLED', False)
+    FusedTA().add(candles())
+    assert logged == []
+
+
+def test_columns_match_ta_add():
+    # a small chunk carries the filter state and windows across chunk borders
+    data = random_walk(3000)
+    expected = TA().add(data)
+    for fused in (FusedTA().add(data), FusedTA(chunk=256).add(data)):
+        assert fused.index.equals(data.index)
+        for column in FusedTA.COLUMNS:
+            assert fused[column].dtype == np.float32
+            np.testing.assert_allclose(fused[column].to_numpy(dtype=np.float64), expected[column].to_numpy(dtype=np.float64),
+                                       rtol=1e-5, atol=1e-4, equal_nan=True, err_msg=column)
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+from Data.KlineFetcher import KlineFetcher, RateLimiter
+
+
+class Client:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def get_klines(self, **params):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return [[params.get('startTime', 0)]]
+
+
+def test_requests_in_flight_are_bounded_per_loop():
+    client = Client()
+    fetcher = KlineFetcher(client)
+
+    async def main():
+        return await asyncio.gather(*(fetcher.call(symbol='X', interval='1h', startTime=k, limit=1)
+                                      for k in range(3 * KlineFetcher.WORKERS)))
+
+    pages = asyncio.run(main())
+    assert [page[0][0] for page in pages] == list(range(3 * KlineFetcher.WORKERS))
+    assert client.peak <= KlineFetcher.WORKERS
+
+
+def test_rate_limit_waits_on_the_event_loop():
+    limiter = RateLimiter(10, per=1.0)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        await asyncio.gather(*(limiter.acquire() for _ in range(15)))
+        task.cancel()
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(main())
+    assert 0.45 < elapsed < 1.0
+    assert ticks >= 20
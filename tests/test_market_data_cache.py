@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import pandas as pd
+import pytest
+from Data.MarketDataCache import MarketDataCache
+
+
+class SlowAPI:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def get_ohlcv(self, symbol, interval, lookback=None, limit=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError('down')
+        index = pd.date_range(pd.Timestamp.now().floor('1h') - pd.Timedelta('9h'), periods=10, freq='1h')
+        return pd.DataFrame({'close': range(10), 'timestamp': index}, index=index)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    MarketDataCache.clear()
+    yield
+    MarketDataCache.clear()
+
+
+def test_concurrent_misses_share_one_fetch():
+    api = SlowAPI()
+
+    async def main():
+        return await asyncio.gather(*(MarketDataCache.get(api, '1h', limit=10) for _ in range(8)))
+
+    results = asyncio.run(main())
+    assert api.calls == 1
+    assert all(data is results[0][0] for data, _ in results)
+
+
+def test_misses_on_other_loops_share_one_fetch():
+    api = SlowAPI()
+    results = []
+
+    def run():
+        results.append(asyncio.run(MarketDataCache.get(api, '1h', limit=10)))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert api.calls == 1
+    assert len(results) == 4 and all(data is results[0][0] for data, _ in results)
+
+
+def test_failed_fetch_reaches_every_waiter_and_is_retried():
+    api = SlowAPI(fail=True)
+
+    async def main():
+        return await asyncio.gather(*(MarketDataCache.get(api, '1h', limit=10) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(main()))
+    assert api.calls == 1
+    api.fail = False
+    asyncio.run(MarketDataCache.get(api, '1h', limit=10))
+    assert api.calls == 2
+
+
+def test_cancelled_caller_leaves_the_fetch_running():
+    api = SlowAPI()
+
+    async def main():
+        owner = asyncio.create_task(MarketDataCache.get(api, '1h', limit=10))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(MarketDataCache.get(api, '1h', limit=10))
+        await asyncio.sleep(0)
+        owner.cancel()
+        return await waiter
+
+    data, _ = asyncio.run(main())
+    assert api.calls == 1 and len(data) == 10
@@ -0,0 +1,34 @@
+import numpy as np
+from Data.OHLCVStore import OHLCVStore
+
+H = 3600_000
+
+
+def rows(timestamps):
+    records = np.zeros(len(timestamps), dtype=OHLCVStore.RECORD)
+    records['timestamp'] = timestamps
+    records['close'] = np.asarray(timestamps) / H
+    return records
+
+
+def test_one_store_per_root(tmp_path):
+    assert OHLCVStore.shared(str(tmp_path)) is OHLCVStore.shared(str(tmp_path) + '/')
+
+
+def test_append_keeps_open_times_increasing(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    assert store.append('X', '1h', rows([2 * H, H, 2 * H])) == 2
+    assert store.append('X', '1h', rows([H, 4 * H, 3 * H, 3 * H])) == 2
+    records = store.read('X', '1h')
+    assert list(records['timestamp']) == [H, 2 * H, 3 * H, 4 * H]
+    assert (records['close'] == records['timestamp'] / H).all()
+
+
+def test_append_drops_a_torn_row(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    store.replace('X', '1h', rows([H, 2 * H]), since=H)
+    with open(store.path('X', '1h'), 'ab') as f:
+        f.write(b'\0' * 5)
+    assert store.append('X', '1h', rows([3 * H])) == 1
+    assert list(store.read('X', '1h')['timestamp']) == [H, 2 * H, 3 * H]
+    assert store.since('X', '1h') == H
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from Core.TechnicalAnalysis.RollingRegression import RollingRegression
+
+
+def returns(flat_from, flat_to, length=300, window=50):
+    rng = np.random.default_rng(7)
+    x = rng.normal(0, 0.01, length)
+    y = 0.002 + 0.8 * x + 3 * x * x + rng.normal(0, 0.002, length)
+    y[flat_from:flat_to] = 0.0
+    index = pd.date_range('2024-01-01', periods=length, freq='1h')
+    return pd.Series(y, index=index), pd.Series(x, index=index)
+
+
+def test_matches_sklearn_on_every_window():
+    y, x = returns(100, 200)
+    reg = RollingRegression(None, None)
+    result = reg.rolling_regression(y, x, window=50, fillna=False)
+    for i in range(50, len(y)):
+        expected = reg.fit_window(y.to_numpy()[i - 50:i], x.to_numpy()[i - 50:i])
+        np.testing.assert_allclose(result.iloc[i].to_numpy(), expected, rtol=1e-6, atol=1e-9)
+
+
+def test_constant_window_r2_matches_sklearn():
+    y, x = returns(100, 200)
+    reg = RollingRegression(None, None)
+    result = reg.rolling_regression(y, x, window=50, fillna=False)
+    for i in range(150, 201):
+        _, _, _, r2 = reg.fit_window(y.to_numpy()[i - 50:i], x.to_numpy()[i - 50:i])
+        assert result['r2'].iloc[i] == r2
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from Core.TA import TA
+from Core.TechnicalAnalysis.Streaming import StreamingTA
+
+
+def candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = (30000 + np.cumsum(rng.normal(0, 150, n))).astype('float32')
+    index = pd.date_range('2024-01-01', periods=n, freq='1h', name='timestamp')
+    df = pd.DataFrame({'close': close}, index=index)
+    df['timestamp'] = df.index
+    return df
+
+
+def streamed(stream, data):
+    rows = [stream.update(close, timestamp) for close, timestamp in zip(data['close'].to_numpy(), data['timestamp'].to_numpy())]
+    return pd.DataFrame(rows, index=data.index)[StreamingTA.COLUMNS]
+
+
+def assert_matches_batch(actual, data):
+    expected = TA().add(data)
+    for column in StreamingTA.COLUMNS:
+        np.testing.assert_allclose(actual[column].to_numpy(dtype=np.float64), expected[column].to_numpy(dtype=np.float64),
+                                   rtol=1e-5, atol=1e-6, equal_nan=True, err_msg=column)
+
+
+def test_streamed_columns_match_ta_add_from_the_first_candle():
+    # the first 50 candles cover every warm-up window
+    data = candles(400)
+    assert_matches_batch(streamed(StreamingTA(), data), data)
+
+
+def test_peek_leaves_the_state_unchanged():
+    data = candles(120, seed=1)
+    stream = StreamingTA().seed(data.iloc[:-1])
+    peeked = stream.peek(data['close'].iloc[-1])
+    assert stream.update(data['close'].iloc[-1], data['timestamp'].iloc[-1]) == peeked
+
+
+def test_a_gap_needs_a_reseed_that_matches_ta_add():
+    data = candles(400, seed=2)
+    stream = StreamingTA().seed(data.iloc[:200])
+    # an overlapping frame only feeds the candles after the last one seen
+    assert stream.update_frame(data.iloc[150:260])
+    assert stream.last_timestamp == data['timestamp'].to_numpy()[259]
+    # a frame starting after a gap is refused, and the stream is reseeded from it
+    later = data.iloc[270:]
+    assert not stream.update_frame(later)
+    assert_matches_batch(streamed(StreamingTA(), later), later)
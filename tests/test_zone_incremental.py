@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+from Core.zone_detection import ZoneDetector
+from Core.zone_incremental import IncrementalZoneDetector
+
+THRESHOLD = 150
+
+
+def candles(n, seed):
+    """
+    Random-walk hourly candles with the indicator columns ZoneDetector reads
+    """
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 150, n))
+    open_ = np.r_[close[0], close[:-1]] + rng.normal(0, 40, n)
+    jumps = rng.random(n) < 0.05
+    open_[jumps] += rng.normal(0, 600, jumps.sum())
+    df = pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + np.abs(rng.normal(0, 120, n)),
+        'low': np.minimum(open_, close) - np.abs(rng.normal(0, 120, n)),
+        'close': close,
+        'volume': np.abs(rng.normal(100, 30, n)),
+        'number_of_trades': rng.integers(100, 1000, n).astype(float),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='1h', name='timestamp')).astype('float32')
+    df['timestamp'] = df.index
+    closes = df['close']
+    for column, values in {
+        'ma_short': closes.rolling(20).mean(), 'ma_long': closes.rolling(50).mean(),
+        'ema_short': closes.ewm(span=20).mean(), 'ema_long': closes.ewm(span=50).mean(),
+        'atr': (df['high'] - df['low']).rolling(20).mean(), 'rsi': closes.pct_change().rolling(5).mean(),
+        'bb_mid': closes.rolling(20).mean(), 'bb_high': closes.rolling(20).max(), 'bb_low': closes.rolling(20).min(),
+    }.items():
+        df[column] = values.astype('float32')
+    df['atr_mean'] = df['atr'].rolling(50).mean()
+    return df
+
+
+def assert_same_zones(actual, expected):
+    assert len(actual) == len(expected)
+    for a, b in zip(actual, expected):
+        assert IncrementalZoneDetector.same_zone(a, b), (a, b)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_updates_match_batch_detection(seed):
+    df = candles(700, seed)
+    rng = np.random.default_rng(seed)
+    detector = IncrementalZoneDetector(df.iloc[:300], threshold=THRESHOLD, check_every=0)
+    position = 300
+    while position < len(df):
+        step = int(rng.integers(1, 4))
+        # rows the detector already has are ignored
+        detector.update(df.iloc[max(0, position - 5):position + step])
+        position = min(position + step, len(df))
+        expected = ZoneDetector(df.iloc[:position]).get_zones(threshold=THRESHOLD, inner_func=True)
+        assert_same_zones(detector.get_zones(), expected)
+
+
+def test_check_trims_to_max_candles():
+    df = candles(500, 3)
+    detector = IncrementalZoneDetector(df.iloc[:400], threshold=THRESHOLD, check_every=10, max_candles=400)
+    for position in range(400, 500, 2):
+        detector.update(df.iloc[:position + 2])
+        assert not detector.drifted
+    assert len(detector) <= 400 + 2 * 10
+    expected = ZoneDetector(detector.df).get_zones(threshold=THRESHOLD, inner_func=True)
+    assert_same_zones(detector.get_zones(), expected)
+
+
+def test_updates_only_detect_on_the_tail(monkeypatch):
+    df = candles(400, 4)
+    detector = IncrementalZoneDetector(df.iloc[:300], threshold=THRESHOLD, check_every=0)
+    sizes = []
+    original = ZoneDetector.__init__
+
+    def record(self, frame, *args, **kwargs):
+        sizes.append(len(frame))
+        original(self, frame, *args, **kwargs)
+
+    monkeypatch.setattr(ZoneDetector, '__init__', record)
+    for position in range(300, 400, 2):
+        detector.update(df.iloc[:position + 2])
+    assert sizes and max(sizes) <= IncrementalZoneDetector.TAIL + 2
+    assert detector.df['timestamp'].equals(df['timestamp'])
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from Core.zone_reactions import ZoneReactor
+from Exceptions.ServiceExceptions import CandleNotTouch
+
+
+def zones():
+    return [
+        {'id': 1, 'timestamp': '2024-01-01 00:00', 'zone_type': 'Bullish FVG', 'zone_low': 100.0, 'zone_high': 105.0},
+        {'id': 2, 'timestamp': '2024-01-01 01:00', 'zone_type': 'Bearish OB', 'zone_low': 120.0, 'zone_high': 125.0},
+    ]
+
+
+def candle(open_, high, low, close):
+    return pd.Series({'open': open_, 'high': high, 'low': low, 'close': close})
+
+
+def test_index_is_kept_while_the_version_is_unchanged():
+    reactor = ZoneReactor()
+    index = reactor.level_index(zones(), version=3)
+    # a fresh list of the same zones, as read from storage on every candle
+    assert reactor.level_index(zones(), version=3) is index
+    assert reactor.level_index(zones(), version=4) is not index
+
+
+def test_index_is_rebuilt_without_a_version():
+    reactor = ZoneReactor()
+    current = zones()
+    index = reactor.level_index(current)
+    assert reactor.level_index(current) is not index
+
+
+def test_in_place_level_edits_are_seen_after_a_version_bump():
+    reactor = ZoneReactor()
+    current = zones()
+    assert reactor.get_last_candle_reaction(current, candle(110, 112, 103, 108), version=0)['id'] == 1
+    current[0]['zone_high'] = 101.0
+    current[0]['zone_low'] = 99.0
+    with pytest.raises(CandleNotTouch):
+        reactor.get_last_candle_reaction(current, candle(110, 112, 103, 108), version=1)
+
+
+def test_zones_changed_without_a_version_bump_rebuild_the_index():
+    reactor = ZoneReactor()
+    index = reactor.level_index(zones(), version=3)
+    added = zones() + [{'id': 3, 'timestamp': '2024-01-01 02:00', 'zone_type': 'Bullish OB', 'zone_low': 90.0, 'zone_high': 95.0}]
+    assert reactor.level_index(added, version=3) is not index
+    assert reactor.level_index(zones()[:1], version=3) is not index
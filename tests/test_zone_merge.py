@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from Core.zone_merge import ZoneMerger
+
+START = pd.Timestamp('2024-01-01')
+
+
+def candles(touches={}):
+    """
+    Hourly candles flat at 100; touches maps an hour to the low of that candle
+    """
+    df = pd.DataFrame({'open': 100.0, 'high': 100.0, 'low': 100.0, 'close': 100.0,
+                       'volume': 1.0, 'number_of_trades': 1}, index=range(24))
+    for hour, low in touches.items():
+        df.loc[hour, 'low'] = low
+    df['timestamp'] = pd.date_range(START, periods=len(df), freq='1h')
+    return df
+
+
+def zone(hour, low, high, zone_type='Order Block'):
+    return {'zone_type': zone_type, 'time_frame': '1h', 'index': hour,
+            'timestamp': START + pd.Timedelta(hours=hour), 'zone_low': low, 'zone_high': high,
+            'swept_time': None}
+
+
+@pytest.mark.parametrize('method', ['greedy', 'sweep'])
+def test_merged_zone_takes_zones_after_its_touch(method):
+    # the merged zone of the first core zone is touched at hour 5
+    zones = [zone(1, 10.0, 12.0), zone(3, 11.0, 13.0), zone(8, 11.0, 12.0)]
+    merged = ZoneMerger(candles({5: 11.0}), zones).merge(method)
+
+    assert [m['count'] for m in merged] == [2, 1]
+    assert [z['timestamp'] for z in merged[0]['built_by']] == [zones[0]['timestamp'], zones[2]['timestamp']]
+    assert merged[1]['built_by'] == [zones[1]]
+
+
+def test_sweep_takes_the_whole_liquidity_overlap_group():
+    # A only overlaps the core zone once B has widened the group
+    core = zone(10, 10.0, 11.0)
+    liq_a = zone(1, 12.0, 13.0, 'Buy-Side Liq')
+    liq_b = zone(2, 11.0, 12.0, 'Buy-Side Liq')
+    merger = ZoneMerger(candles(), [core, liq_a, liq_b])
+
+    greedy = merger.merge('greedy')
+    sweep = merger.merge('sweep')
+
+    assert len(greedy) == len(sweep) == 1
+    assert greedy[0]['built_by'] == [core, liq_b]
+    assert (greedy[0]['zone_low'], greedy[0]['zone_high']) == (10.0, 12.0)
+    assert sweep[0]['built_by'] == [core, liq_a, liq_b]
+    assert (sweep[0]['zone_low'], sweep[0]['zone_high']) == (10.0, 13.0)
+
+
+def test_methods_agree_without_liquidity_zones():
+    zones = [zone(1, 10.0, 12.0), zone(2, 20.0, 21.0), zone(4, 11.5, 14.0), zone(6, 20.5, 22.0)]
+    greedy = ZoneMerger(candles({3: 11.0}), [dict(z) for z in zones]).merge('greedy')
+    sweep = ZoneMerger(candles({3: 11.0}), [dict(z) for z in zones]).merge('sweep')
+
+    def summary(merged):
+        return [(m['zone_low'], m['zone_high'], m['count']) for m in merged]
+    assert summary(greedy) == summary(sweep)